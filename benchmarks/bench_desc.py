@@ -0,0 +1,108 @@
+"""
+Measures the time and memory needed to load the descs of a synthetic sync database
+
+Usage: python -m benchmarks.bench_desc [package count]
+"""
+import sys
+import time
+import tracemalloc
+from typing import Callable, List
+
+from boxman.desc import Desc
+
+DESC_TEMPLATE = """%FILENAME%
+{name}-{version}-mips.pkg.tar.gz
+
+%NAME%
+{name}
+
+%BASE%
+{name}
+
+%VERSION%
+{version}
+
+%DESC%
+Synthetic package number {number} used for benchmarking boxman
+
+%CSIZE%
+49378
+
+%ISIZE%
+135283
+
+%MD5SUM%
+52976c1ef3ebad0f981b1e240c111034
+
+%SHA256SUM%
+bd5d0538e945a456dc3b5001377b3ff5079065ce6f4ab686fbbb14e1d1ec9c12
+
+%URL%
+https://github.com/pspdev/psp-packages
+
+%LICENSE%
+GPL
+
+%ARCH%
+mips
+
+%BUILDDATE%
+1666255374
+
+%PACKAGER%
+Unknown Packager
+
+%DEPENDS%
+package-{dependency}
+
+"""
+
+
+def generate_descs(count: int) -> List[str]:
+    return [
+        DESC_TEMPLATE.format(
+            name=f"package-{number}",
+            version=f"1.{number % 100}.{number % 7}-1",
+            number=number,
+            dependency=max(number - 1, 0),
+        )
+        for number in range(count)
+    ]
+
+
+def load(contents: List[str], access: Callable[[Desc], object]) -> List[Desc]:
+    descs = []
+    for content in contents:
+        desc = Desc(content, "benchmark")
+        access(desc)
+        descs.append(desc)
+    return descs
+
+
+def measure(name: str, contents: List[str], access: Callable[[Desc], object]):
+    start = time.perf_counter()
+    load(contents, access)
+    duration = time.perf_counter() - start
+
+    # Memory is measured in a separate run, because tracing slows down the parsing
+    tracemalloc.start()
+    descs = load(contents, access)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del descs
+
+    print(f"{name:<24} {duration * 1000:>10.1f} ms {size / 1024 / 1024:>10.1f} MiB")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    contents = generate_descs(count)
+    print(f"Loading {count} descs")
+    measure("construct", contents, lambda desc: None)
+    measure("name and version", contents, lambda desc: (desc.name, desc.version))
+    measure("resolve dependencies", contents, lambda desc: desc.dependencies)
+    measure("all fields", contents, str)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Generates synthetic pacman repositories to benchmark boxman with
+
+Usage: python -m benchmarks.generator <directory> [package count]
+"""
+import io
+import os
+import random
+import sys
+import tarfile
+from dataclasses import dataclass
+from typing import Dict, List
+
+from boxman.checksums import calculate_checksums
+
+DESC_TEMPLATE = """%FILENAME%
+{file_name}
+
+%NAME%
+{name}
+
+%BASE%
+{name}
+
+%VERSION%
+{version}
+
+%DESC%
+Synthetic package number {number} used for benchmarking boxman
+
+%GROUPS%
+benchmark
+
+%CSIZE%
+{compressed_size}
+
+%ISIZE%
+{installed_size}
+
+%MD5SUM%
+{md5}
+
+%SHA256SUM%
+{sha256}
+
+%URL%
+https://github.com/pspdev/psp-packages
+
+%LICENSE%
+GPL
+
+%ARCH%
+mips
+
+%BUILDDATE%
+1666255374
+
+%PACKAGER%
+Unknown Packager
+
+%DEPENDS%
+{dependencies}
+
+"""
+
+
+@dataclass
+class RepositorySpec:
+    name: str = "benchmark"
+    package_count: int = 1000
+    fan_out: int = 3
+    file_count: int = 10
+    file_size: int = 1024
+    release: int = 1
+    compression: str = "gz"
+    seed: int = 0
+
+
+def get_package_name(number: int) -> str:
+    return f"package-{number}"
+
+
+def get_dependencies(spec: RepositorySpec) -> Dict[int, List[int]]:
+    """
+    Every package depends on up to fan_out packages with a lower number
+    """
+    generator = random.Random(spec.seed)
+    return {
+        number: generator.sample(range(number), min(spec.fan_out, number))
+        for number in range(spec.package_count)
+    }
+
+
+def add_file(archive: tarfile.TarFile, name: str, content: bytes) -> None:
+    info = tarfile.TarInfo(name)
+    info.size = len(content)
+    info.mode = 0o644
+    archive.addfile(info, io.BytesIO(content))
+
+
+def add_directory(archive: tarfile.TarFile, name: str) -> None:
+    info = tarfile.TarInfo(name)
+    info.type = tarfile.DIRTYPE
+    info.mode = 0o755
+    archive.addfile(info)
+
+
+def write_package(path: str, name: str, version: str, spec: RepositorySpec) -> None:
+    with tarfile.open(path, f"w:{spec.compression}") as archive:
+        add_file(
+            archive, ".PKGINFO", f"pkgname = {name}\npkgver = {version}\n".encode()
+        )
+        add_directory(archive, "psp")
+        add_directory(archive, "psp/share")
+        add_directory(archive, f"psp/share/{name}")
+        for number in range(spec.file_count):
+            content = os.urandom(spec.file_size)
+            add_file(archive, f"psp/share/{name}/file-{number}", content)
+
+
+def generate_repository(directory: str, spec: RepositorySpec) -> str:
+    """
+    Writes a sync database and package archives into a directory
+    :param directory: directory which is used as server of the repository
+    :param spec: shape of the repository
+    :return: path of the sync database
+    """
+    os.makedirs(directory, exist_ok=True)
+    dependencies = get_dependencies(spec)
+    database_path = os.path.join(directory, f"{spec.name}.db")
+    with tarfile.open(database_path, "w:gz") as database:
+        for number in range(spec.package_count):
+            name = get_package_name(number)
+            version = f"1.{number % 100}.{number % 7}-{spec.release}"
+            file_name = f"{name}-{version}-mips.pkg.tar.{spec.compression}"
+            package_path = os.path.join(directory, file_name)
+            write_package(package_path, name, version, spec)
+
+            checksums = calculate_checksums(package_path)
+            desc = DESC_TEMPLATE.format(
+                file_name=file_name,
+                name=name,
+                version=version,
+                number=number,
+                compressed_size=os.path.getsize(package_path),
+                installed_size=spec.file_count * spec.file_size,
+                md5=checksums.md5,
+                sha256=checksums.sha256,
+                dependencies="\n".join(
+                    get_package_name(dependency) for dependency in dependencies[number]
+                ),
+            )
+            add_directory(database, f"{name}-{version}")
+            add_file(database, f"{name}-{version}/desc", desc.encode())
+    return database_path
+
+
+def main():
+    directory = sys.argv[1]
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    print(generate_repository(directory, RepositorySpec(package_count=count)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+"""
+Times the hot paths of boxman against a synthetic repository and writes the
+results as JSON, so they can be compared between commits
+
+Usage: python -m benchmarks.run [--packages 1000] [--output results.json]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.generator import RepositorySpec, generate_repository, get_package_name
+from boxman.archive import extract_archive
+from boxman.data.options import Options
+from boxman.database_manager import DatabaseManager
+from boxman.local_database import LocalDatabase
+from boxman.repository import Repository
+from boxman.version import get_segment_key, get_version_key, parse_version
+
+
+class BenchmarkRunner:
+    results: Dict[str, Dict]
+
+    def __init__(self, repeat: int):
+        self.repeat = repeat
+        self.results = {}
+
+    def measure(
+        self,
+        name: str,
+        function: Callable[[], object],
+        setup: Optional[Callable[[], None]] = None,
+    ) -> None:
+        """
+        Runs a function repeat times, only the function itself is timed
+        Output of boxman is discarded, so it doesn't influence the timing
+        """
+        durations = []
+        for _ in range(self.repeat):
+            with contextlib.redirect_stdout(io.StringIO()):
+                if setup:
+                    setup()
+                start = time.perf_counter()
+                function()
+                durations.append(time.perf_counter() - start)
+        self.results[name] = {
+            "min": min(durations),
+            "median": statistics.median(durations),
+            "max": max(durations),
+            "runs": durations,
+        }
+        print(f"{name:<28} {min(durations) * 1000:>10.1f} ms", file=sys.stderr)
+
+
+class Environment:
+    def __init__(self, directory: str, spec: RepositorySpec):
+        """
+        Root directory with a repository served from a file:// url
+        """
+        self.directory = directory
+        self.spec = spec
+        self.server = os.path.join(directory, "server")
+        self.root = os.path.join(directory, "root")
+        generate_repository(self.server, spec)
+
+    @property
+    def config(self):
+        db_path = os.path.join(self.root, "var", "lib", "boxman")
+        options = Options(
+            root_dir=self.root,
+            db_path=db_path,
+            cache_dir=os.path.join(self.root, "var", "cache", "boxman"),
+        )
+        repository = Repository(self.spec.name, f"file://{self.server}", db_path)
+        return SimpleNamespace(options=options, repositories=[repository])
+
+    def reset_root(self, keep_sync: bool = True) -> None:
+        """
+        Removes installed packages and the package cache
+        """
+        sync = os.path.join(self.root, "var", "lib", "boxman", "sync")
+        for name in os.listdir(self.root) if os.path.isdir(self.root) else []:
+            path = os.path.join(self.root, name)
+            if name != "var":
+                shutil.rmtree(path)
+        for path in [
+            os.path.join(self.root, "var", "lib", "boxman", "local"),
+            os.path.join(self.root, "var", "cache"),
+        ]:
+            shutil.rmtree(path, ignore_errors=True)
+        if not keep_sync:
+            shutil.rmtree(sync, ignore_errors=True)
+
+    def create_database_manager(self) -> DatabaseManager:
+        config = self.config
+        return DatabaseManager(LocalDatabase(config), config, refresh_after=10**9)
+
+
+def benchmark_versions(runner: BenchmarkRunner, count: int) -> None:
+    generator = random.Random(0)
+    versions = [
+        f"{generator.randint(0, 2)}:{generator.randint(0, 20)}.{generator.randint(0, 99)}"
+        f"{generator.choice(['', 'a', 'rc1', '.r5.gabc'])}-{generator.randint(1, 9)}"
+        for _ in range(count)
+    ]
+
+    def clear_caches():
+        for function in [get_segment_key, get_version_key, parse_version]:
+            function.cache_clear()
+
+    runner.measure(
+        "version_sort_cold", lambda: sorted(versions, key=parse_version), clear_caches
+    )
+    runner.measure("version_sort_warm", lambda: sorted(versions, key=parse_version))
+    parsed = [parse_version(version) for version in versions]
+    runner.measure(
+        "version_compare",
+        lambda: [a > b for a, b in zip(parsed, parsed[1:])],  # noqa: E203
+    )
+
+
+def benchmark_database(runner: BenchmarkRunner, environment: Environment) -> None:
+    names = [
+        get_package_name(number) for number in range(environment.spec.package_count)
+    ]
+    state = SimpleNamespace(database_manager=None)
+
+    def cold_start():
+        environment.reset_root(keep_sync=False)
+        state.database_manager = environment.create_database_manager()
+
+    runner.measure(
+        "database_first_refresh",
+        lambda: state.database_manager.refresh_databases(),
+        cold_start,
+    )
+
+    def warm_start():
+        state.database_manager = environment.create_database_manager()
+
+    runner.measure(
+        "database_single_desc",
+        lambda: state.database_manager.get_package_desc(names[0]),
+        warm_start,
+    )
+    runner.measure(
+        "database_load_catalog",
+        lambda: [database.packages for database in state.database_manager.databases],
+        warm_start,
+    )
+    database_manager = environment.create_database_manager()
+    database = database_manager.databases[0]
+    # Lookups without a loaded catalog are measured by database_single_desc
+    database.packages
+    runner.measure("database_get_desc", lambda: [database.get_desc(n) for n in names])
+    runner.measure("get_package_list", lambda: list(database.get_package_list()))
+    runner.measure(
+        "search_packages_name", lambda: list(database.search_packages("package-12"))
+    )
+    runner.measure(
+        "search_packages_description",
+        lambda: list(database.search_packages("synthetic", ignore_case=True)),
+    )
+    runner.measure(
+        "search_packages_regex",
+        lambda: list(database.search_packages(r"^package-\d+5$", regex=True)),
+    )
+
+
+def benchmark_install(runner: BenchmarkRunner, environment: Environment) -> None:
+    top_package = get_package_name(environment.spec.package_count - 1)
+    state = SimpleNamespace(database_manager=None)
+
+    def fresh_root():
+        environment.reset_root()
+        state.database_manager = environment.create_database_manager()
+
+    runner.measure(
+        "install_package",
+        lambda: state.database_manager.install_package(top_package),
+        fresh_root,
+    )
+
+    archive = os.path.join(
+        environment.server,
+        sorted(name for name in os.listdir(environment.server) if ".pkg." in name)[0],
+    )
+    target = os.path.join(environment.directory, "extract")
+    runner.measure(
+        "extract_archive",
+        lambda: extract_archive(archive, target),
+        lambda: shutil.rmtree(target, ignore_errors=True),
+    )
+
+
+def benchmark_update(runner: BenchmarkRunner, environment: Environment) -> None:
+    top_package = get_package_name(environment.spec.package_count - 1)
+    old_spec = environment.spec
+    new_spec = RepositorySpec(**{**old_spec.__dict__, "release": old_spec.release + 1})
+    state = SimpleNamespace(database_manager=None)
+
+    def install_old_versions():
+        shutil.rmtree(environment.server)
+        environment.spec = old_spec
+        generate_repository(environment.server, old_spec)
+        environment.reset_root(keep_sync=False)
+        database_manager = environment.create_database_manager()
+        database_manager.install_package(top_package)
+
+        shutil.rmtree(environment.server)
+        environment.spec = new_spec
+        generate_repository(environment.server, new_spec)
+        state.database_manager = environment.create_database_manager()
+        state.database_manager.refresh_databases(force=True)
+
+    runner.measure(
+        "update_packages",
+        lambda: state.database_manager.update_packages([]),
+        install_old_versions,
+    )
+
+
+def get_metadata(spec: RepositorySpec, repeat: int) -> Dict:
+    return {
+        "timestamp": int(time.time()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "repository": spec.__dict__,
+    }
+
+
+def parse_arguments(arguments: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("--packages", type=int, default=1000)
+    parser.add_argument("--fan-out", type=int, default=3)
+    parser.add_argument("--files", type=int, default=10)
+    parser.add_argument("--file-size", type=int, default=1024)
+    parser.add_argument("--compression", choices=["gz", "bz2", "xz"], default="gz")
+    parser.add_argument("--versions", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="file to write the JSON results to")
+    return parser.parse_args(arguments)
+
+
+def main(arguments: Optional[List[str]] = None) -> None:
+    args = parse_arguments(sys.argv[1:] if arguments is None else arguments)
+    spec = RepositorySpec(
+        package_count=args.packages,
+        fan_out=args.fan_out,
+        file_count=args.files,
+        file_size=args.file_size,
+        compression=args.compression,
+    )
+    runner = BenchmarkRunner(args.repeat)
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"Generating {args.packages} packages", file=sys.stderr)
+        environment = Environment(directory, spec)
+        benchmark_versions(runner, args.versions)
+        benchmark_database(runner, environment)
+        benchmark_install(runner, environment)
+        benchmark_update(runner, environment)
+
+    output = json.dumps(
+        {"metadata": get_metadata(spec, args.repeat), "results": runner.results},
+        indent=2,
+    )
+    if args.output:
+        with open(args.output, "w") as output_file:
+            output_file.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
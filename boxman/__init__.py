@@ -1,15 +1,44 @@
-from boxman.config import Config
+import importlib
+import sys
+
 from boxman.args_parser import parse_args
-from boxman.boxman import Boxman
-from boxman.local_database import LocalDatabase
-from boxman.database_manager import DatabaseManager
+from boxman.timings import profile, span, timings
 
+# Imported on first access, so commands only load the modules they need
+LAZY_ATTRIBUTES = {
+    "Config": "boxman.config",
+    "Boxman": "boxman.boxman",
+    "LocalDatabase": "boxman.local_database",
+    "DatabaseManager": "boxman.database_manager",
+    "create_local_database": "boxman.local_database_factory",
+}
+
+
+def __getattr__(name: str):
+    if name in LAZY_ATTRIBUTES:
+        return getattr(importlib.import_module(LAZY_ATTRIBUTES[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-def run():
-    config = Config()
-    local_database = LocalDatabase(config)
-    database_manager = DatabaseManager(local_database, config)
 
+def run():
     args = parse_args()
-    boxman = Boxman(config, database_manager)
-    boxman.run(args)
+    if args.timings:
+        timings.enable()
+
+    try:
+        with span("startup"):
+            from boxman.boxman import Boxman
+            from boxman.config import Config
+
+            boxman = Boxman(Config())
+
+        if args.profile:
+            with profile(args.profile):
+                boxman.run(args)
+        else:
+            boxman.run(args)
+    finally:
+        if args.timings:
+            print(timings.format(), file=sys.stderr)
+            if args.timings_file:
+                timings.write_json(args.timings_file)
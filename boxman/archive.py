@@ -0,0 +1,160 @@
+import os
+import shutil
+import tarfile
+from typing import List, Optional, Set
+
+from boxman.constants import CHUNK_SIZE
+from boxman.decompress import open_tar
+from boxman.files import is_inside_root
+
+
+def is_safe_name(path: str) -> bool:
+    """
+    Checks a path from a package archive for metadata like .PKGINFO and for names
+    which could lead outside of the root directory
+    """
+    return not (path.startswith(".") or ".." in path or ":\\" in path)
+
+
+def is_safe_link(linkname: str) -> bool:
+    return not os.path.isabs(linkname) and is_safe_name(linkname)
+
+
+def get_target_path(root_dir: str, member: tarfile.TarInfo) -> Optional[str]:
+    """
+    Returns the path a member of a package archive should be extracted to
+    :param root_dir: directory the package is installed into
+    :param member: member of the package archive
+    :return: path inside the root directory or None if the member should be skipped
+    """
+    if not is_safe_name(member.path):
+        return None
+    target = os.path.join(root_dir, member.path)
+    if len(target) < (len(root_dir) + len(member.path) - 1):
+        raise Exception(
+            f"Failed to concatenate {root_dir} and {member.path}, result was {target}"
+        )
+    return target
+
+
+def get_link_source(root_dir: str, linkname: str) -> Optional[str]:
+    """
+    Returns the file a hardlink in a package archive points to
+    :return: path inside the root directory or None if it points outside of it
+    """
+    if not is_safe_link(linkname):
+        return None
+    source = os.path.join(root_dir, linkname)
+    if not is_inside_root(root_dir, os.path.dirname(source)):
+        return None
+    return source
+
+
+def make_directory(path: str, root_dir: str, created_directories: Set[str]) -> bool:
+    """
+    Creates a directory unless a symlink would make it end up outside of the root
+    :return: False if the directory is outside of the root directory
+    """
+    if path in created_directories:
+        return True
+    if not is_inside_root(root_dir, path):
+        return False
+    os.makedirs(path, exist_ok=True)
+    created_directories.add(path)
+    return True
+
+
+def remove_existing_file(path: str) -> None:
+    if os.path.islink(path) or os.path.isfile(path):
+        os.remove(path)
+
+
+def extract_file(archive: tarfile.TarFile, member: tarfile.TarInfo, target: str):
+    remove_existing_file(target)
+    with open(target, "wb") as target_file:
+        shutil.copyfileobj(archive.extractfile(member), target_file, CHUNK_SIZE)
+    os.chmod(target, member.mode)
+
+
+def extract_link(root_dir: str, member: tarfile.TarInfo, target: str) -> bool:
+    if member.issym():
+        remove_existing_file(target)
+        os.symlink(member.linkname, target)
+        return True
+    source = get_link_source(root_dir, member.linkname)
+    if not source:
+        return False
+    remove_existing_file(target)
+    os.link(source, target)
+    return True
+
+
+def extract_member(
+    archive: tarfile.TarFile,
+    member: tarfile.TarInfo,
+    root_dir: str,
+    created_directories: Set[str],
+) -> Optional[str]:
+    target = get_target_path(root_dir, member)
+    if not target:
+        return None
+
+    # Symlinks extracted earlier must not lead members out of the root directory
+    directory = target if member.isdir() else os.path.dirname(target)
+    if not make_directory(directory, root_dir, created_directories):
+        print(f"Skipping {member.path}, it would be written outside of the root")
+        return None
+    if member.isdir() or extract_entry(archive, member, root_dir, target):
+        return member.path
+    return None
+
+
+def extract_entry(
+    archive: tarfile.TarFile, member: tarfile.TarInfo, root_dir: str, target: str
+) -> bool:
+    """
+    Extracts a file, symlink or hardlink
+    :return: False if the member was skipped
+    """
+    if member.isfile():
+        extract_file(archive, member, target)
+        return True
+    if not (member.issym() or member.islnk()):
+        return False
+    if not extract_link(root_dir, member, target):
+        print(f"Skipping {member.path}, it links to a file outside of the root")
+        return False
+    return True
+
+
+def list_archive_files(archive: str) -> List[str]:
+    """
+    Lists the files a package archive would install without extracting it
+    Directories are left out, since those can be shared between packages
+    :param archive: path to the package archive
+    :return: list of paths relative to the root directory
+    """
+    files = []
+    with open_tar(archive) as t:
+        for member in t:
+            is_file = member.isfile() or member.issym() or member.islnk()
+            if is_file and get_target_path("", member):
+                files.append(member.path)
+    return files
+
+
+def extract_archive(archive: str, root_dir: str) -> List[str]:
+    """
+    Extracts a package archive into the root directory in a single streaming pass
+    :param archive: path to the package archive
+    :param root_dir: directory the package is installed into
+    :return: list of the installed files
+    """
+    files = []
+    created_directories: Set[str] = set()
+    with open_tar(archive) as t:
+        for member in t:
+            path = extract_member(t, member, root_dir, created_directories)
+            if path:
+                files.append(path)
+    return files
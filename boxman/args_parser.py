@@ -28,10 +28,20 @@ def add_list_parser(subparser: _SubParsersAction) -> None:
 
 def add_search_parser(subparser: _SubParsersAction) -> None:
     parser = subparser.add_parser(
-        name="search", help="Search for packages with a specific string in their name"
+        name="search",
+        help="Search for packages by name, description, provides and groups",
     )
 
     parser.add_argument("string", nargs=1, type=str, help="Search string")
+    parser.add_argument(
+        "-r",
+        "--regex",
+        action="store_true",
+        help="Treat the search string as a regular expression",
+    )
+    parser.add_argument(
+        "-i", "--ignore-case", action="store_true", help="Search case insensitively"
+    )
 
 
 def add_installed_parser(subparser: _SubParsersAction) -> None:
@@ -42,6 +52,10 @@ def add_config_parser(subparser: _SubParsersAction) -> None:
     subparser.add_parser(name="config", help="Show the configuration")
 
 
+def add_sync_parser(subparser: _SubParsersAction) -> None:
+    subparser.add_parser(name="sync", help="Refresh all repository databases")
+
+
 def add_remove_parser(subparser: _SubParsersAction) -> None:
     parser = subparser.add_parser(name="remove", help="Remove the installed packages")
 
@@ -81,6 +95,53 @@ def add_files_parser(subparser: _SubParsersAction) -> None:
     )
 
 
+def add_owns_parser(subparser: _SubParsersAction) -> None:
+    parser = subparser.add_parser(
+        name="owns", help="Show which installed package owns a file"
+    )
+
+    parser.add_argument("path", nargs=1, type=str, help="Path of the file")
+
+
+def add_localdb_parser(subparser: _SubParsersAction) -> None:
+    parser = subparser.add_parser(
+        name="localdb",
+        help="Copy installed packages between the sqlite and pacman local database",
+    )
+
+    parser.add_argument(
+        "action",
+        choices=["import", "export"],
+        help="import from or export to the pacman local database",
+    )
+
+
+def add_clean_parser(subparser: _SubParsersAction) -> None:
+    parser = subparser.add_parser(
+        name="clean", help="Remove packages exceeding the cache limits from the cache"
+    )
+
+    parser.add_argument(
+        "-n",
+        "--dry-run",
+        action="store_true",
+        help="Only show which packages would be removed",
+    )
+    parser.add_argument(
+        "-k",
+        "--keep",
+        type=int,
+        help="Amount of versions to keep per package, overrides CacheKeepVersions",
+    )
+
+
+def add_verify_cache_parser(subparser: _SubParsersAction) -> None:
+    subparser.add_parser(
+        name="verify-cache",
+        help="Check the cached packages against the repository checksums",
+    )
+
+
 def add_update_parser(subparser: _SubParsersAction) -> None:
     parser = subparser.add_parser(
         name="update", help="Update all or specific installed packages"
@@ -92,16 +153,22 @@ def add_update_parser(subparser: _SubParsersAction) -> None:
         type=str,
         help="List of packages to update (optional)",
     )
+    parser.add_argument(
+        "-c",
+        "--check",
+        action="store_true",
+        help="Only check for updates, exit with 1 if there are any",
+    )
 
 
 def get_mode_from_args(args: Namespace):
     mode = Mode.NOT_SET
     if args.mode:
-        mode = Mode[args.mode.upper()]
+        mode = Mode[args.mode.upper().replace("-", "_")]
     return mode
 
 
-def get_argument_list_from_args(args: Namespace, mode: Mode):
+def get_argument_list_from_args(args: Namespace, mode: Mode):  # noqa: C901
     arguments = None
     if mode in [Mode.INSTALL, Mode.UPDATE, Mode.REMOVE]:
         arguments = args.packages
@@ -111,6 +178,10 @@ def get_argument_list_from_args(args: Namespace, mode: Mode):
         arguments = [args.repository]
     elif mode == Mode.SEARCH:
         arguments = args.string
+    elif mode == Mode.OWNS:
+        arguments = args.path
+    elif mode == Mode.LOCALDB:
+        arguments = [args.action]
     return arguments
 
 
@@ -126,6 +197,24 @@ def parse_args(args_list: Optional[List[str]] = None) -> ParsedArguments:
         prog=get_program_name(),
     )
 
+    parser.add_argument(
+        "--timings",
+        action="store_true",
+        help="Print the time spent per phase when done",
+    )
+    parser.add_argument(
+        "--timings-file",
+        type=str,
+        metavar="FILE",
+        help="Write the time spent per phase to a JSON file",
+    )
+    parser.add_argument(
+        "--profile",
+        type=str,
+        metavar="FILE",
+        help="Profile the run with cProfile and write the stats to a file",
+    )
+
     subparser = parser.add_subparsers(
         title="mode",
         dest="mode",
@@ -142,9 +231,25 @@ def parse_args(args_list: Optional[List[str]] = None) -> ParsedArguments:
     add_show_parser(subparser)
     add_files_parser(subparser)
     add_update_parser(subparser)
+    add_sync_parser(subparser)
+    add_owns_parser(subparser)
+    add_localdb_parser(subparser)
+    add_clean_parser(subparser)
+    add_verify_cache_parser(subparser)
 
     # Parse and return the arguments
     args = parser.parse_args(args=args_list)
     mode = get_mode_from_args(args)
     arguments = get_argument_list_from_args(args, mode)
-    return ParsedArguments(mode=mode, arguments=arguments)
+    return ParsedArguments(
+        mode=mode,
+        arguments=arguments,
+        regex=getattr(args, "regex", False),
+        ignore_case=getattr(args, "ignore_case", False),
+        check=getattr(args, "check", False),
+        dry_run=getattr(args, "dry_run", False),
+        keep=getattr(args, "keep", None),
+        timings=args.timings or bool(args.timings_file),
+        timings_file=args.timings_file,
+        profile=args.profile,
+    )
@@ -0,0 +1,105 @@
+import copy
+import os
+from abc import ABC, abstractmethod
+from typing import Dict, Iterator, List, Optional
+
+from boxman.config import Config
+from boxman.desc import Desc
+from boxman.file_index import FileIndex
+from boxman.files import Files
+from boxman.version import Version, parse_version
+
+
+class BaseLocalDatabase(ABC):
+    config: Config
+
+    def __init__(self, config: Config):
+        """
+        Storage of the installed packages, implemented by the ALPM and SQLite backends
+        """
+        self.config = config
+
+    @property
+    @abstractmethod
+    def packages(self) -> Dict[str, str]:
+        """
+        Directory in the name-version-rel format per installed package
+        """
+
+    @property
+    @abstractmethod
+    def file_index(self) -> FileIndex:
+        """
+        Index of the owner of each installed file
+        """
+
+    @abstractmethod
+    def get_desc_list(self) -> Iterator[Desc]:
+        pass
+
+    @abstractmethod
+    def get_package_desc(self, package: str) -> Optional[Desc]:
+        pass
+
+    @abstractmethod
+    def get_package_files(self, package: str) -> Optional[Files]:
+        pass
+
+    @abstractmethod
+    def remove_package(self, package: str) -> bool:
+        pass
+
+    @abstractmethod
+    def write_package(
+        self, package: str, directory_name: str, desc: str, files: Files
+    ) -> None:
+        """
+        Stores an installed package
+        :param package: name of the package
+        :param directory_name: directory of the package in the name-version-rel format
+        :param desc: content of the desc file, already converted to a local desc
+        :param files: files installed by the package
+        """
+
+    def get_file_owners(self, path: str) -> List[str]:
+        """
+        Returns the installed packages which own a file
+        :param path: path relative to the root directory or absolute inside of it
+        """
+        root_dir = os.path.abspath(self.config.options.root_dir)
+        if os.path.isabs(path) and os.path.abspath(path).startswith(root_dir):
+            path = os.path.relpath(path, root_dir)
+        return self.file_index.get_owners(path.strip("/"))
+
+    def get_installed_packages(self) -> List[str]:
+        return list(self.packages.keys())
+
+    def get_installed_files(self, package: Optional[str] = None) -> Iterator[Files]:
+        """
+        Yields the files lists of one or all installed packages, sorted by name
+        """
+        packages = [package] if package else sorted(self.packages)
+        for name in packages:
+            files = self.get_package_files(name)
+            if files:
+                yield files
+
+    def get_package_directories(self) -> List[str]:
+        return list(self.packages.values())
+
+    def get_package_directory(self, package: str) -> Optional[str]:
+        return self.packages.get(package)
+
+    def get_package_version(self, package: str) -> Optional[Version]:
+        package_directory = self.get_package_directory(package)
+        if package_directory:
+            return parse_version(package_directory[len(package) + 1 :])  # noqa: E203
+        return None
+
+    def install(
+        self, desc: Desc, files: Files, installed_explicitly: bool = True
+    ) -> None:
+        # The desc can be shared with the sync database catalog, so convert a copy
+        desc = copy.deepcopy(desc)
+        desc.convert_to_local(installed_explicitly)
+        self.write_package(desc.name, f"{desc.name}-{desc.version}", repr(desc), files)
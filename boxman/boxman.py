@@ -1,25 +1,57 @@
-from typing import List
+import re
+from typing import TYPE_CHECKING, List, Optional
 
 from boxman.config import Config
 from boxman.args_parser import ParsedArguments
 from boxman.data.mode import Mode
-from boxman.database_manager import DatabaseManager
+
+if TYPE_CHECKING:
+    from boxman.database_manager import DatabaseManager
+    from boxman.base_local_database import BaseLocalDatabase
 
 
 class Boxman:
-    def __init__(self, config: Config, database_manager: DatabaseManager):
+    __local_database: Optional["BaseLocalDatabase"]
+    __database_manager: Optional["DatabaseManager"]
+
+    def __init__(
+        self, config: Config, database_manager: Optional["DatabaseManager"] = None
+    ):
+        """
+        The databases are created when a command first needs them, so commands like
+        config don't import the download and archive code
+        """
         self.config = config
-        self.database_manager = database_manager
+        self.__database_manager = database_manager
+        self.__local_database = None
+        if database_manager:
+            self.__local_database = database_manager.local_database
+
+    @property
+    def local_database(self) -> "BaseLocalDatabase":
+        if self.__local_database is None:
+            from boxman.local_database_factory import create_local_database
+
+            self.__local_database = create_local_database(self.config)
+        return self.__local_database
+
+    @property
+    def database_manager(self) -> "DatabaseManager":
+        if self.__database_manager is None:
+            from boxman.database_manager import DatabaseManager
+
+            self.__database_manager = DatabaseManager(self.local_database, self.config)
+        return self.__database_manager
 
     def run(self, args: ParsedArguments) -> None:  # noqa: C901
         if args.mode == Mode.INSTALL:
             self.__run_install(args.arguments)
         elif args.mode == Mode.UPDATE:
-            self.__run_update(args.arguments)
+            self.__run_update(args.arguments, args.check)
         elif args.mode == Mode.REMOVE:
             self.__run_remove(args.arguments)
         elif args.mode == Mode.SEARCH:
-            self.__run_search(args.arguments[0])
+            self.__run_search(args.arguments[0], args.regex, args.ignore_case)
         elif args.mode == Mode.SHOW:
             self.__run_show(args.arguments[0])
         elif args.mode == Mode.LIST:
@@ -30,69 +62,129 @@ class Boxman:
             self.__run_files(args.arguments[0])
         elif args.mode == Mode.CONFIG:
             self.__run_config()
+        elif args.mode == Mode.SYNC:
+            self.__run_sync()
+        elif args.mode == Mode.OWNS:
+            self.__run_owns(args.arguments[0])
+        elif args.mode == Mode.LOCALDB:
+            self.__run_localdb(args.arguments[0])
+        elif args.mode == Mode.CLEAN:
+            self.__run_clean(args.dry_run, args.keep)
+        elif args.mode == Mode.VERIFY_CACHE:
+            self.__run_verify_cache()
         elif args.mode == Mode.NOT_SET:
             raise ValueError("Mode was not set")
 
     def __run_install(self, packages: List[str]) -> None:
-        failed = False
-        for package in packages:
-            if self.database_manager.install_package(package):
-                print(f"Installed {package} successfully")
-            else:
-                failed = True
-                print(f"Failed to install {package}")
-        if failed:
+        self.database_manager.refresh_databases()
+        if self.database_manager.install_packages(packages):
+            print(f"Installed {', '.join(packages)} successfully")
+        else:
+            print(f"Failed to install {', '.join(packages)}")
             exit(1)
 
-    def __run_update(self, packages: List[str]) -> None:
+    def __run_update(self, packages: List[str], check: bool) -> None:
+        self.database_manager.refresh_databases()
+        if check:
+            if self.database_manager.get_updates(packages):
+                exit(1)
+            return
+
         success = self.database_manager.update_packages(packages)
         if not success:
             exit(1)
 
     def __run_remove(self, packages: List[str]) -> None:
-        for package in packages:
-            self.database_manager.remove_package(package)
+        if not self.database_manager.remove_packages(packages):
+            exit(1)
 
-    def __run_search(self, search_string: str) -> None:
-        packages = self.database_manager.search_packages(search_string)
+    def __run_search(self, search_string: str, regex: bool, ignore_case: bool) -> None:
+        try:
+            packages = self.database_manager.search_packages(
+                search_string, regex, ignore_case
+            )
+        except re.error as error:
+            print(f"error: invalid regular expression {search_string}: {error}")
+            exit(1)
         for package in packages:
             print(package)
 
     def __run_show(self, package: str) -> None:
-        result = self.database_manager.show_package(package)
-        if result:
-            print(result, end="")
-        else:
+        found = False
+        for desc in self.database_manager.show_package(package):
+            print(desc, end="")
+            found = True
+        if not found:
             print(f"package {package} not found")
             exit(1)
 
     def __run_list(self, repository: str) -> None:
-        packages = self.database_manager.get_package_list(repository)
-        for package in packages:
+        for package in self.database_manager.get_package_list(repository):
             print(package)
 
     def __run_installed(self) -> None:
-        package_directories = self.database_manager.get_installed_list()
-        package_directories.sort()
-        for package in package_directories:
-            name, version, rel = package.rsplit("-", 2)
+        packages = self.local_database.packages
+        for package in sorted(packages):
+            name, version, rel = packages[package].rsplit("-", 2)
             print(f"{name} {version}-{rel}")
 
     def __run_files(self, package: str) -> None:
-        result = self.database_manager.show_files(package)
-        if result:
-            result.sort()
-            for files in result:
-                for file in files.get_files():
-                    print(f"{files.package} {file}")
-        else:
+        found = False
+        for files in self.local_database.get_installed_files(package):
+            for file in files.get_files():
+                print(f"{files.package} {file}")
+            found = True
+        if not found:
             print(f"package {package} not found")
             exit(1)
 
+    def __run_owns(self, path: str) -> None:
+        owners = self.database_manager.get_file_owners(path)
+        if not owners:
+            print(f"error: no package owns {path}")
+            exit(1)
+        for name, version in owners:
+            print(f"{path} is owned by {name} {version}")
+
+    def __run_localdb(self, action: str) -> None:
+        from boxman.sqlite_local_database import SqliteLocalDatabase
+
+        local_database = self.local_database
+        if not isinstance(local_database, SqliteLocalDatabase):
+            print("error: LocalDBBackend has to be set to sqlite")
+            exit(1)
+        if action == "import":
+            local_database.import_alpm()
+            print(f"Imported {len(local_database.packages)} packages")
+        else:
+            local_database.export_alpm()
+            print(f"Exported {len(local_database.packages)} packages")
+
+    def __run_clean(self, dry_run: bool, keep: Optional[int]) -> None:
+        if not self.database_manager.clean_cache(dry_run, keep):
+            exit(1)
+
+    def __run_verify_cache(self) -> None:
+        self.database_manager.refresh_databases()
+        if not self.database_manager.verify_cache():
+            exit(1)
+
+    def __run_sync(self) -> None:
+        if not self.database_manager.refresh_databases(force=True):
+            exit(1)
+
     def __run_config(self):
         print(f"Root directory           : {self.config.options.root_dir}")
         print(f"Cache directory          : {self.config.options.cache_dir}")
         print(f"Local database directory : {self.config.options.db_path}")
+        print(f"Parallel downloads       : {self.config.options.parallel_downloads}")
+        print(
+            f"Local database backend   : {self.config.options.local_db_backend.value}"
+        )
+        print(f"Cache maximum size       : {self.config.options.cache_max_size}")
+        print(f"Cache versions kept      : {self.config.options.cache_keep_versions}")
+        content_store = "yes" if self.config.options.content_store else "no"
+        print(f"Content store            : {content_store}")
         print("Repositories             :")
         for repository in self.config.repositories:
             print(f"- {repository.name}: {repository.url.rsplit('/',1)[0]}")
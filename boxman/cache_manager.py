@@ -0,0 +1,241 @@
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Match, Optional, Tuple
+
+from boxman.checksums import Checksums, calculate_checksums
+from boxman.data.cache_entry import CacheEntry
+from boxman.desc import Desc
+from boxman.verification_ledger import VerificationLedger
+from boxman.version import parse_version
+
+# name-pkgver-pkgrel-arch.pkg.tar.ext, the name itself can contain dashes
+ARCHIVE_PATTERN = re.compile(r"^(.+)-([^-]+-[^-]+)-[^-]+\.pkg\.tar(\.\w+)?$")
+LEDGER_NAME = "verified.idx"
+PART_SUFFIX = ".part"
+
+
+class CacheManager:
+    def __init__(self, directory: str, max_size: int = 0, keep_versions: int = 0):
+        """
+        Keeps the package cache within the configured limits
+        :param directory: directory the package archives are downloaded to
+        :param max_size: maximum size of the cache in bytes, 0 for no limit
+        :param keep_versions: amount of versions kept per package, 0 for no limit
+        """
+        self.directory = directory
+        self.max_size = max_size
+        self.keep_versions = keep_versions
+        # Parts of downloads which were not written to since then are stale
+        self.started = time.time()
+        self.ledger = VerificationLedger(os.path.join(directory, LEDGER_NAME))
+
+    @property
+    def has_limits(self) -> bool:
+        return self.max_size > 0 or self.keep_versions > 0
+
+    def is_cached(
+        self, path: str, md5_checksum: Optional[str], sha256_checksum: Optional[str]
+    ) -> bool:
+        """
+        Checks whether a cached archive matches the checksums, archives which were
+        verified before and didn't change since then are not hashed again
+        """
+        if not os.path.isfile(path):
+            return False
+        if self.ledger.is_verified(path, md5_checksum, sha256_checksum):
+            return True
+
+        checksums = calculate_checksums(path)
+        if not checksums.matches(md5_checksum, sha256_checksum):
+            return False
+        self.ledger.record(path, checksums)
+        return True
+
+    def get_sha256(self, path: str) -> str:
+        """
+        Returns the SHA-256 checksum of a cached archive, from the ledger if it was
+        verified before
+        """
+        checksums = self.ledger.get_checksums(path)
+        if checksums:
+            return checksums[1]
+        calculated = calculate_checksums(path)
+        self.ledger.record(path, calculated)
+        return calculated.sha256
+
+    def mark_used(self, path: str) -> None:
+        """
+        Sets the access time of an archive, which is used to evict the least recently
+        used archives first. It is set explicitly, as filesystems are often mounted
+        with noatime or relatime.
+        """
+        os.utime(path, ns=(time.time_ns(), os.stat(path).st_mtime_ns))
+
+    def get_entries(self) -> List[CacheEntry]:
+        return self.__scan(partial=False)
+
+    def get_stale_parts(self) -> List[CacheEntry]:
+        """
+        Returns the parts of interrupted downloads which were not written to since
+        this process started, parts of the current transaction are kept for resuming
+        """
+        return [
+            entry
+            for entry in self.__scan(partial=True)
+            if entry.last_used < self.started
+        ]
+
+    def __scan(self, partial: bool) -> List[CacheEntry]:
+        entries = []
+        if not os.path.isdir(self.directory):
+            return entries
+
+        with os.scandir(self.directory) as directory_entries:
+            for directory_entry in directory_entries:
+                name = directory_entry.name
+                if name.endswith(PART_SUFFIX) != partial:
+                    continue
+                if partial:
+                    name = name[: -len(PART_SUFFIX)]  # noqa: E203
+                match = ARCHIVE_PATTERN.match(name)
+                if match and directory_entry.is_file():
+                    entries.append(create_entry(directory_entry, match, partial))
+        return sorted(entries, key=lambda entry: entry.file_name)
+
+    def get_evictions(
+        self, keep_versions: Optional[int] = None, remove_parts: bool = False
+    ) -> List[CacheEntry]:
+        """
+        Finds the archives which exceed the limits, older versions are evicted first
+        and the least recently used archives after that until the size fits
+        Stale parts of interrupted downloads count towards the size as well
+        :param keep_versions: overrides the configured amount of versions to keep
+        :param remove_parts: evict all stale parts regardless of the limits
+        """
+        if keep_versions is None:
+            keep_versions = self.keep_versions
+        entries = self.get_entries()
+        parts = self.get_stale_parts()
+        evicted = get_old_versions(entries, keep_versions)
+        if remove_parts:
+            evicted.extend(parts)
+            parts = []
+        evicted_paths = {entry.path for entry in evicted}
+        kept = [entry for entry in entries if entry.path not in evicted_paths]
+        evicted.extend(get_least_recently_used(kept + parts, self.max_size))
+        return evicted
+
+    def clean(
+        self,
+        dry_run: bool = False,
+        keep_versions: Optional[int] = None,
+        remove_parts: bool = False,
+    ) -> List[CacheEntry]:
+        """
+        Removes the archives which exceed the limits
+        :param dry_run: only return the archives which would be removed
+        :param keep_versions: overrides the configured amount of versions to keep
+        :param remove_parts: remove all stale parts of interrupted downloads
+        :return: the removed archives
+        """
+        evicted = self.get_evictions(keep_versions, remove_parts)
+        if not dry_run:
+            for entry in evicted:
+                os.remove(entry.path)
+                self.ledger.forget(entry.path)
+        return evicted
+
+    def verify(
+        self, find_desc: Callable[[str], Optional[Desc]], workers: int
+    ) -> Tuple[int, List[CacheEntry]]:
+        """
+        Hashes the cached archives in parallel and removes the ones which don't match
+        the checksums in the sync databases. Files are hashed in chunks and always
+        hashed again, regardless of the ledger.
+        :param find_desc: function which finds the sync desc of an archive file name
+        :return: amount of archives verified and the corrupt archives, which were removed
+        """
+        known = []
+        for entry in self.get_entries():
+            desc = find_desc(entry.file_name)
+            if desc:
+                known.append((entry, desc))
+
+        corrupt = []
+        paths = [entry.path for entry, _ in known]
+        for (entry, desc), checksums in zip(known, hash_archives(paths, workers)):
+            if checksums.matches(desc.md5_checksum, desc.sha256_checksum):
+                self.ledger.record(entry.path, checksums)
+            else:
+                os.remove(entry.path)
+                self.ledger.forget(entry.path)
+                corrupt.append(entry)
+        return len(known), corrupt
+
+
+def create_entry(
+    directory_entry: os.DirEntry, match: Match, partial: bool
+) -> CacheEntry:
+    stat = directory_entry.stat()
+    return CacheEntry(
+        path=directory_entry.path,
+        file_name=directory_entry.name,
+        name=match.group(1),
+        version=parse_version(match.group(2)),
+        size=stat.st_size,
+        # Parts are not marked as used, they were last used when written to
+        last_used=stat.st_mtime if partial else stat.st_atime,
+    )
+
+
+def hash_archives(paths: List[str], workers: int) -> List[Checksums]:
+    """
+    Calculates the checksums of multiple files in parallel
+    """
+    if not paths:
+        return []
+    with ThreadPoolExecutor(max_workers=min(workers, len(paths))) as executor:
+        return list(executor.map(calculate_checksums, paths))
+
+
+def get_old_versions(entries: List[CacheEntry], keep_versions: int) -> List[CacheEntry]:
+    """
+    Returns the archives older than the newest keep_versions versions of a package
+    """
+    if keep_versions <= 0:
+        return []
+
+    versions: Dict[str, List[CacheEntry]] = {}
+    for entry in entries:
+        versions.setdefault(entry.name, []).append(entry)
+
+    old_versions = []
+    for package_entries in versions.values():
+        package_entries.sort(key=lambda entry: entry.version.key, reverse=True)
+        old_versions.extend(package_entries[keep_versions:])
+    return old_versions
+
+
+def get_least_recently_used(
+    entries: List[CacheEntry], max_size: int
+) -> List[CacheEntry]:
+    """
+    Returns the least recently used archives which have to go to fit in max_size
+    """
+    if max_size <= 0:
+        return []
+
+    size = sum(entry.size for entry in entries)
+    evicted = []
+    for entry in sorted(entries, key=lambda entry: entry.last_used):
+        if size <= max_size:
+            break
+        evicted.append(entry)
+        size -= entry.size
+    return evicted
+
+
+def format_size(size: int) -> str:
+    return f"{size / 1024 / 1024:.2f} MiB"
@@ -1,6 +1,48 @@
 import os
 from hashlib import sha256, md5
-from typing import Optional
+from typing import BinaryIO, Iterator, Optional
+
+from boxman.constants import CHUNK_SIZE
+
+
+class Checksums:
+    def __init__(self):
+        """
+        Calculates the MD5 and SHA-256 checksums of data in a single pass
+        """
+        self.__md5 = md5()
+        self.__sha256 = sha256()
+
+    def update(self, data: bytes) -> None:
+        self.__md5.update(data)
+        self.__sha256.update(data)
+
+    def matches(self, md5_checksum: Optional[str], sha256_checksum: Optional[str]):
+        if md5_checksum and self.md5 != md5_checksum:
+            return False
+        if sha256_checksum and self.sha256 != sha256_checksum:
+            return False
+        return True
+
+    @property
+    def md5(self) -> str:
+        return self.__md5.hexdigest()
+
+    @property
+    def sha256(self) -> str:
+        return self.__sha256.hexdigest()
+
+
+def read_chunks(file: BinaryIO) -> Iterator[bytes]:
+    return iter(lambda: file.read(CHUNK_SIZE), b"")
+
+
+def calculate_checksums(file_path: str) -> Checksums:
+    checksums = Checksums()
+    with open(file_path, "rb") as file:
+        for chunk in read_chunks(file):
+            checksums.update(chunk)
+    return checksums
 
 
 def checksums_match(
@@ -9,13 +51,12 @@ def checksums_match(
     if not os.path.isfile(file_path):
         return False
 
-    match = True
+    return calculate_checksums(file_path).matches(md5_checksum, sha256_checksum)
+
+
+def calculate_sha256(file_path: str) -> str:
+    hasher = sha256()
     with open(file_path, "rb") as file:
-        content = file.read()
-        if md5_checksum:
-            if not md5(content).hexdigest() == md5_checksum:
-                match = False
-        if sha256_checksum:
-            if not sha256(content).hexdigest() == sha256_checksum:
-                match = False
-    return match
+        for chunk in read_chunks(file):
+            hasher.update(chunk)
+    return hasher.hexdigest()
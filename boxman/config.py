@@ -3,11 +3,12 @@ import os.path
 import re
 import sys
 from configparser import ConfigParser, SectionProxy
-from typing import List
+from typing import List, Optional
 
 import __main__
 
 from boxman.constants import APPLICATION_NAME
+from boxman.data.local_db_backend import LocalDBBackend
 from boxman.data.options import Options
 from boxman.repository import Repository
 
@@ -81,7 +82,9 @@ class Config:
         else:
             return os.getcwd()
 
-    def __parse_config_options(self, options_section: SectionProxy) -> None:
+    def __parse_config_options(  # noqa: C901
+        self, options_section: SectionProxy
+    ) -> None:
         for key in options_section.keys():
             if key == "rootdir":
                 self.options.root_dir = self.get_root_path(
@@ -95,6 +98,47 @@ class Config:
                 self.options.db_path = self.get_relative_path(
                     options_section.get("dbpath")
                 )
+            elif key == "paralleldownloads":
+                self.__parse_parallel_downloads(options_section.get(key))
+            elif key == "localdbbackend":
+                self.__parse_local_db_backend(options_section.get(key))
+            elif key == "cachemaxsize":
+                self.__parse_cache_max_size(options_section.get(key))
+            elif key == "cachekeepversions":
+                self.__parse_cache_keep_versions(options_section.get(key))
+            elif key == "contentstore":
+                self.__parse_content_store(options_section, key)
+
+    def __parse_parallel_downloads(self, value: str) -> None:
+        if not value or not value.isdecimal() or int(value) < 1:
+            print(f"ParallelDownloads value {value} is not a positive number")
+            return
+        self.options.parallel_downloads = int(value)
+
+    def __parse_local_db_backend(self, value: str) -> None:
+        try:
+            self.options.local_db_backend = LocalDBBackend((value or "").lower())
+        except ValueError:
+            print(f"LocalDBBackend value {value} is not alpm or sqlite")
+
+    def __parse_cache_max_size(self, value: str) -> None:
+        size = parse_size(value or "")
+        if size is None:
+            print(f"CacheMaxSize value {value} is not a size like 500M or 2G")
+            return
+        self.options.cache_max_size = size
+
+    def __parse_cache_keep_versions(self, value: str) -> None:
+        if not value or not value.isdecimal():
+            print(f"CacheKeepVersions value {value} is not a number")
+            return
+        self.options.cache_keep_versions = int(value)
+
+    def __parse_content_store(self, options_section: SectionProxy, key: str) -> None:
+        try:
+            self.options.content_store = options_section.getboolean(key)
+        except ValueError:
+            print(f"ContentStore value {options_section.get(key)} is not yes or no")
 
     def __parse_config_repository(self, section: SectionProxy) -> None:
         # Make sure the required variables are set
@@ -157,3 +201,15 @@ class Config:
     @property
     def config_path(self) -> str:
         return self.__config_path
+
+
+def parse_size(value: str) -> Optional[int]:
+    """
+    Parses a size in bytes with an optional K, M or G suffix for KiB, MiB and GiB
+    :return: the size in bytes or None if the value is not a size
+    """
+    match = re.match(r"^\s*(\d+)\s*([KMG]?)i?B?\s*$", value, re.IGNORECASE)
+    if not match:
+        return None
+    exponent = " KMG".index(match.group(2).upper() or " ")
+    return int(match.group(1)) * 1024**exponent
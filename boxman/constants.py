@@ -1,2 +1,3 @@
 APPLICATION_NAME = "boxman"
 ALPM_DB_VERSION = "9"
+CHUNK_SIZE = 1024 * 1024
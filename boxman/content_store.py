@@ -0,0 +1,277 @@
+import errno
+import hashlib
+import json
+import os
+import shutil
+import tarfile
+import tempfile
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Set
+
+from boxman.archive import (
+    get_link_source,
+    get_target_path,
+    is_safe_link,
+    is_safe_name,
+    make_directory,
+    remove_existing_file,
+)
+from boxman.constants import CHUNK_SIZE
+from boxman.decompress import open_tar
+
+try:
+    import fcntl
+except ImportError:
+    # Windows, where the store isn't locked
+    fcntl = None
+
+MANIFEST_VERSION = 2
+LOCK_NAME = "lock"
+# Errors of os.link which mean the file has to be copied instead
+LINK_ERRORS = {errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP}
+
+# Entry types in a manifest
+DIRECTORY = "d"
+FILE = "f"
+SYMLINK = "l"
+HARDLINK = "h"
+
+
+class ContentStore:
+    def __init__(self, directory: str):
+        """
+        Stores every extracted file once, keyed by its hash and mode, and installs
+        packages by hardlinking the stored files into the root directory. Each archive
+        gets a manifest, so installing it again doesn't decompress it.
+        Files installed this way share their data with every other root using them,
+        so they should not be edited in place. Files being stored are written to a
+        separate tmp directory and the store is locked while packages are stored and
+        installed, so prune never removes files which are about to be linked.
+        :param directory: directory of the store inside the cache directory
+        """
+        self.directory = directory
+        self.objects_directory = os.path.join(directory, "objects")
+        self.manifests_directory = os.path.join(directory, "manifests")
+        self.temporary_directory = os.path.join(directory, "tmp")
+
+    @contextmanager
+    def lock(self, exclusive: bool = False) -> Iterator[bool]:
+        """
+        Takes a shared lock on the store, or an exclusive one for pruning
+        Exclusive locks don't wait for other processes using the store
+        :return: whether the lock was acquired
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, LOCK_NAME), "a") as lock_file:
+            if fcntl is None:
+                yield True
+                return
+            try:
+                if exclusive:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                else:
+                    fcntl.flock(lock_file, fcntl.LOCK_SH)
+            except BlockingIOError:
+                yield False
+                return
+            yield True
+
+    def get_object_path(self, key: str) -> str:
+        return os.path.join(self.objects_directory, key[:2], key)
+
+    def get_manifest_path(self, archive: str) -> str:
+        return os.path.join(
+            self.manifests_directory, f"{os.path.basename(archive)}.json"
+        )
+
+    def get_manifest(self, archive: str, sha256: str) -> Optional[dict]:
+        """
+        Returns the manifest of an archive if it is stored and all its files still are
+        :param sha256: checksum of the archive, a rebuilt package can have the same name
+        """
+        try:
+            with open(self.get_manifest_path(archive)) as manifest_file:
+                manifest = json.load(manifest_file)
+        except (OSError, ValueError):
+            return None
+        if (manifest.get("version"), manifest.get("sha256")) != (
+            MANIFEST_VERSION,
+            sha256,
+        ):
+            return None
+        for entry_type, _, key in manifest["entries"]:
+            if entry_type == FILE and not os.path.isfile(self.get_object_path(key)):
+                return None
+        return manifest
+
+    def add_archive(self, archive: str, sha256: str) -> dict:
+        """
+        Stores the files of an archive in a single streaming pass and writes its
+        manifest
+        """
+        os.makedirs(self.manifests_directory, exist_ok=True)
+        entries = []
+        with open_tar(archive) as t:
+            for member in t:
+                entry = self.__add_member(t, member)
+                if entry:
+                    entries.append(entry)
+
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "sha256": sha256,
+            "entries": entries,
+        }
+        write_atomically(self.get_manifest_path(archive), json.dumps(manifest))
+        return manifest
+
+    def __add_member(
+        self, archive: tarfile.TarFile, member: tarfile.TarInfo
+    ) -> Optional[List[str]]:
+        """
+        :return: type, path and object key or link target of a member of the archive
+        """
+        if not get_target_path("", member):
+            return None
+        if member.isdir():
+            return [DIRECTORY, member.path, ""]
+        if member.isfile():
+            return [FILE, member.path, self.__add_object(archive, member)]
+        if member.issym():
+            return [SYMLINK, member.path, member.linkname]
+        if member.islnk() and is_safe_link(member.linkname):
+            return [HARDLINK, member.path, member.linkname]
+        return None
+
+    def __add_object(self, archive: tarfile.TarFile, member: tarfile.TarInfo) -> str:
+        os.makedirs(self.temporary_directory, exist_ok=True)
+        hasher = hashlib.sha256()
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=self.temporary_directory)
+        try:
+            with os.fdopen(file_descriptor, "wb") as object_file:
+                source = archive.extractfile(member)
+                for chunk in iter(lambda: source.read(CHUNK_SIZE), b""):
+                    hasher.update(chunk)
+                    object_file.write(chunk)
+            os.chmod(temporary_path, member.mode)
+
+            # The mode is part of the key, as hardlinks share it
+            key = f"{hasher.hexdigest()}.{member.mode:o}"
+            object_path = self.get_object_path(key)
+            if os.path.isfile(object_path):
+                os.remove(temporary_path)
+            else:
+                os.makedirs(os.path.dirname(object_path), exist_ok=True)
+                os.replace(temporary_path, object_path)
+        except BaseException:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            raise
+        return key
+
+    def get_files(self, archive: str, sha256: str) -> List[str]:
+        """
+        Lists the files a package archive would install, storing it if needed
+        """
+        with self.lock():
+            manifest = self.get_manifest(archive, sha256) or self.add_archive(
+                archive, sha256
+            )
+        return [
+            path
+            for entry_type, path, _ in manifest["entries"]
+            if entry_type != DIRECTORY
+        ]
+
+    def install(self, archive: str, sha256: str, root_dir: str) -> List[str]:
+        """
+        Installs a package archive into the root directory from the store
+        :param archive: path to the package archive
+        :param sha256: checksum of the package archive
+        :param root_dir: directory the package is installed into
+        :return: list of the installed files
+        """
+        with self.lock():
+            manifest = self.get_manifest(archive, sha256) or self.add_archive(
+                archive, sha256
+            )
+            return self.__install_manifest(manifest, root_dir)
+
+    def __install_manifest(self, manifest: dict, root_dir: str) -> List[str]:
+        files = []
+        created_directories: Set[str] = set()
+        for entry_type, path, value in manifest["entries"]:
+            target = os.path.join(root_dir, path)
+            # Symlinks installed earlier must not lead entries out of the root
+            directory = target if entry_type == DIRECTORY else os.path.dirname(target)
+            if os.path.isabs(path) or not is_safe_name(path):
+                continue
+            if not make_directory(directory, root_dir, created_directories):
+                print(f"Skipping {path}, it would be written outside of the root")
+                continue
+            if entry_type == DIRECTORY or self.__install_entry(
+                entry_type, value, root_dir, target
+            ):
+                files.append(path)
+        return files
+
+    def __install_entry(
+        self, entry_type: str, value: str, root_dir: str, target: str
+    ) -> bool:
+        """
+        :return: False if a hardlink points outside of the root directory
+        """
+        if entry_type == HARDLINK:
+            source = get_link_source(root_dir, value)
+            if not source:
+                print(f"Skipping {target}, it links to a file outside of the root")
+                return False
+        remove_existing_file(target)
+        if entry_type == FILE:
+            link_or_copy(self.get_object_path(value), target)
+        elif entry_type == SYMLINK:
+            os.symlink(value, target)
+        else:
+            os.link(source, target)
+        return True
+
+    def prune(self) -> int:
+        """
+        Removes stored files which are not installed in any root anymore
+        Roots on other filesystems hold copies, so their files are removed as well
+        :return: amount of files removed, nothing is removed while the store is in use
+        """
+        with self.lock(exclusive=True) as locked:
+            if not locked:
+                return 0
+            return self.__remove_unused_objects()
+
+    def __remove_unused_objects(self) -> int:
+        removed = 0
+        for directory, _, names in os.walk(self.objects_directory):
+            for name in names:
+                path = os.path.join(directory, name)
+                if os.stat(path).st_nlink == 1:
+                    os.remove(path)
+                    removed += 1
+        return removed
+
+
+def link_or_copy(source: str, target: str) -> None:
+    """
+    Hardlinks a file, or copies it when the target is on another filesystem or the
+    filesystem doesn't support hardlinks
+    """
+    try:
+        os.link(source, target)
+    except OSError as error:
+        if error.errno not in LINK_ERRORS:
+            raise
+        shutil.copy2(source, target)
+
+
+def write_atomically(path: str, content: str) -> None:
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "w") as file:
+        file.write(content)
+    os.replace(temporary_path, path)
@@ -0,0 +1,17 @@
+from dataclasses import dataclass
+
+from boxman.version import Version
+
+
+@dataclass
+class CacheEntry:
+    """
+    Package archive in the cache, last_used is the access time set when it was used
+    """
+
+    path: str
+    file_name: str
+    name: str
+    version: Version
+    size: int
+    last_used: float
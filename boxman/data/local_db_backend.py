@@ -0,0 +1,6 @@
+from enum import Enum
+
+
+class LocalDBBackend(Enum):
+    ALPM = "alpm"
+    SQLITE = "sqlite"
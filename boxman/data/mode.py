@@ -11,4 +11,9 @@ class Mode(Enum):
     SHOW = auto()
     UPDATE = auto()
     CONFIG = auto()
+    SYNC = auto()
+    OWNS = auto()
+    LOCALDB = auto()
+    CLEAN = auto()
+    VERIFY_CACHE = auto()
     NOT_SET = auto()
@@ -1,8 +1,16 @@
 from dataclasses import dataclass
 
+from boxman.data.local_db_backend import LocalDBBackend
+
 
 @dataclass
 class Options:
     root_dir: str
     db_path: str
     cache_dir: str
+    parallel_downloads: int = 5
+    local_db_backend: LocalDBBackend = LocalDBBackend.ALPM
+    # Limits of the package cache, 0 means no limit
+    cache_max_size: int = 0
+    cache_keep_versions: int = 0
+    content_store: bool = False
@@ -0,0 +1,27 @@
+from dataclasses import dataclass, field
+from typing import Optional
+
+from boxman.desc import Desc
+
+
+@dataclass
+class Package:
+    """
+    Entry of a sync database, the desc is only parsed when it is requested
+    """
+
+    name: str
+    directory: str
+    content: bytes
+    source: str
+    parsed_desc: Optional[Desc] = field(default=None, repr=False, compare=False)
+
+    @property
+    def version(self) -> str:
+        return "-".join(self.directory.rsplit("-", 2)[1:])
+
+    @property
+    def desc(self) -> Desc:
+        if self.parsed_desc is None:
+            self.parsed_desc = Desc(self.content, self.source)
+        return self.parsed_desc
@@ -8,3 +8,11 @@ from boxman.data.mode import Mode
 class ParsedArguments:
     mode: Mode
     arguments: Optional[List[str]] = None
+    regex: bool = False
+    ignore_case: bool = False
+    check: bool = False
+    dry_run: bool = False
+    keep: Optional[int] = None
+    timings: bool = False
+    timings_file: Optional[str] = None
+    profile: Optional[str] = None
@@ -0,0 +1,32 @@
+from dataclasses import dataclass, field
+from enum import Enum, auto
+from typing import List, Optional
+
+from boxman.desc import Desc
+
+
+class Action(Enum):
+    INSTALL = auto()
+    UPGRADE = auto()
+    REMOVE = auto()
+
+
+@dataclass
+class Step:
+    action: Action
+    name: str
+    desc: Optional[Desc] = None
+    installed_explicitly: bool = True
+
+
+@dataclass
+class Transaction:
+    steps: List[Step] = field(default_factory=list)
+
+    @property
+    def descs_to_download(self) -> List[Desc]:
+        return [step.desc for step in self.steps if step.action != Action.REMOVE]
+
+    @property
+    def names(self) -> List[str]:
+        return [step.name for step in self.steps]
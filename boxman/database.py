@@ -1,37 +1,44 @@
 import os
 import re
-import tarfile
 import time
-import urllib.request
-from typing import Callable, List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 
+from boxman.data.package import Package
+from boxman.database_index import DatabaseIndex
+from boxman.decompress import is_tar_archive
 from boxman.desc import Desc
+from boxman.download import download_if_modified
 from boxman.repository import Repository
-
-
-def refresh_if_needed(func: Callable):
-    def inner(self, *args, **kwargs):
-        self.refresh()
-        return func(self, *args, **kwargs)
-
-    return inner
+from boxman.search import compile_query, get_rank, get_trigrams
+from boxman.timings import span
 
 
 class Database:
+    __packages: Optional[Dict[str, Package]]
+    __refreshed: bool
+
     def __init__(self, repository: Repository, refresh_after):
         self.repository = repository
         self.refresh_after = refresh_after
+        self.index = DatabaseIndex(repository.path, repository.index_path)
+        self.__packages = None
+        self.__refreshed = False
 
     def refresh(self, force=False) -> None:
+        """
+        Download the database if it is missing or older than refresh_after seconds
+        A refresh is only attempted once per process unless it is done explicitly
+        :param force: check the server for a new database regardless of its age
+        """
+        self.__refreshed = True
         if not os.path.isdir(self.repository.dir):
             os.makedirs(self.repository.dir)
 
+        is_valid = os.path.isfile(self.repository.path) and is_tar_archive(
+            self.repository.path
+        )
         should_refresh = False
-        if (
-            not os.path.isfile(self.repository.path)
-            or not tarfile.is_tarfile(self.repository.path)
-            or force
-        ):
+        if not is_valid or force:
             should_refresh = True
         else:
             time_since_last_refresh = int(
@@ -41,37 +48,79 @@ class Database:
                 should_refresh = True
 
         if should_refresh:
-            print(f"Downloading database {self.repository.name}")
-            urllib.request.urlretrieve(self.repository.url, self.repository.path)
-
-    @refresh_if_needed
-    def get_package_list(self) -> List[str]:
-        packages = []
-        with tarfile.open(self.repository.path) as t:
-            for member in t.getmembers():
-                if member.isdir():
-                    package = self.__directory_to_package_list_entry(member.name)
-                    packages.append(package)
-        packages.sort()
-        return packages
+            print(f"Refreshing database {self.repository.name}")
+            with span("database download"):
+                modified = download_if_modified(
+                    self.repository.url,
+                    self.repository.path,
+                    conditional=is_valid,
+                )
+            if not modified:
+                print(f"Database {self.repository.name} is up to date")
+
+        with span("database index"):
+            self.index.update()
+        self.__packages = None
+
+    @property
+    def packages(self) -> Dict[str, Package]:
+        """
+        Catalog of the packages in this database, loaded once per process
+        """
+        if self.__packages is None:
+            if not self.__refreshed:
+                self.refresh()
+            self.__packages = self.__load_packages()
+        return self.__packages
 
-    @refresh_if_needed
-    def search_packages(self, search_string: str) -> List[str]:
-        packages = []
-        with tarfile.open(self.repository.path) as t:
-            for member in t.getmembers():
-                if member.isdir():
-                    package = self.__directory_to_package_list_entry(member.name)
-                    if search_string in package.split(" ")[0]:
-                        packages.append(package)
+    def __load_packages(self) -> Dict[str, Package]:
+        packages = {}
+        if not os.path.isfile(self.repository.path):
+            return packages
+
+        with span("database index"):
+            self.index.update()
+        with span("database load"):
+            for name, directory, content in self.index.get_packages():
+                packages[name] = Package(name, directory, content, self.repository.name)
         return packages
 
-    def show_package(self, package: str) -> Optional[str]:
-        result = ""
+    def get_package_list(self) -> Iterator[str]:
+        for name in sorted(self.packages):
+            yield self.__directory_to_package_list_entry(self.packages[name].directory)
+
+    def search_packages(
+        self, search_string: str, regex: bool = False, ignore_case: bool = False
+    ) -> List[Tuple[int, str, str]]:
+        """
+        Search the names, descriptions, provides and groups of the packages
+        :param search_string: string or regular expression to search for
+        :param regex: treat the search string as a regular expression
+        :param ignore_case: match regardless of case
+        :return: rank, name and list entry of each match, sorted by rank and name
+        """
+        pattern = compile_query(search_string, regex, ignore_case)
+        # Only literal searches can be narrowed down with the trigram index
+        trigrams = set() if regex else get_trigrams(search_string)
+        results = []
+        packages = self.packages
+        for name, fields in self.index.get_search_candidates(trigrams):
+            rank = get_rank(pattern, name, fields)
+            if rank is not None and name in packages:
+                entry = self.__directory_to_package_list_entry(packages[name].directory)
+                results.append((rank, name, entry))
+        results.sort()
+        return results
+
+    def show_package(self, package: str) -> Iterator[str]:
+        if package:
+            desc = self.get_desc(package)
+            if desc:
+                yield str(desc)
+            return
+
         for desc in self.get_desc_list():
-            if not package or desc.name == package:
-                result += str(desc)
-        return result
+            yield str(desc)
 
     def __directory_to_package_list_entry(self, name: str) -> str:
         if re.match(r"[\w\-_]+ [\d\-.]+]", name):
@@ -79,20 +128,27 @@ class Database:
         package_name, package_version, package_rel = name.rsplit("-", 2)
         return f"{self.repository.name} {package_name} {package_version}-{package_rel}"
 
-    @refresh_if_needed
-    def get_desc_list(self) -> List[Desc]:
-        result = []
-        with tarfile.open(self.repository.path) as t:
-            for member in t.getmembers():
-                if re.match(r"[\w\-._]*-\d[\w.]*-\d+/desc", member.path):
-                    content = t.extractfile(member).read().decode()
-                    result.append(Desc(content, self.repository.name))
-        return result
-
-    @refresh_if_needed
+    def get_desc_list(self) -> Iterator[Desc]:
+        for package in self.packages.values():
+            yield package.desc
+
     def get_desc(self, package: str) -> Optional[Desc]:
-        with tarfile.open(self.repository.path) as t:
-            for member in t.getmembers():
-                if re.match(rf"^{package}-[\w.]*-\d+/desc", member.path):
-                    content = t.extractfile(member).read().decode()
-                    return Desc(content, self.repository.name)
+        if self.__packages is None:
+            # Single lookups like show don't need the whole catalog
+            return self.__find_desc(package)
+        entry = self.__packages.get(package)
+        if entry:
+            with span("desc lookup"):
+                return entry.desc
+
+    def __find_desc(self, package: str) -> Optional[Desc]:
+        if not self.__refreshed:
+            self.refresh()
+        if not os.path.isfile(self.repository.path):
+            return None
+        with span("database index"):
+            self.index.update()
+        with span("desc lookup"):
+            content = self.index.get_desc(package)
+            if content is not None:
+                return Desc(content, self.repository.name)
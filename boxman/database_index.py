@@ -0,0 +1,255 @@
+import os
+import sqlite3
+import tarfile
+from array import array
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+from boxman.checksums import calculate_sha256
+from boxman.decompress import open_tar
+from boxman.search import get_search_fields, get_trigrams
+
+INDEX_VERSION = "3"
+# Row ids in the trigram posting lists are stored as 64-bit integers
+POSTING_TYPE = "q"
+# Stay below the lowest limit of variables per query of older sqlite versions
+QUERY_BATCH_SIZE = 500
+
+
+class DatabaseIndex:
+    __database_path: str
+    __index_path: str
+    __connection: Optional[sqlite3.Connection]
+
+    def __init__(self, database_path: str, index_path: str):
+        """
+        Persistent index of the packages in a sync database
+        The index is rebuilt when the size, modification time or hash of the database
+        file no longer match the values it was built from
+        :param database_path: path to the .db file of the repository
+        :param index_path: path to the index file which belongs to the database
+        """
+        self.__database_path = database_path
+        self.__index_path = index_path
+        self.__connection = None
+
+    def __connect(self) -> sqlite3.Connection:
+        if self.__connection is None:
+            self.__connection = sqlite3.connect(
+                self.__index_path, check_same_thread=False
+            )
+            self.__connection.executescript(
+                "CREATE TABLE IF NOT EXISTS metadata ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL);"
+                "CREATE TABLE IF NOT EXISTS packages ("
+                "name TEXT PRIMARY KEY, directory TEXT NOT NULL, stamp TEXT NOT NULL, "
+                "desc BLOB NOT NULL);"
+                "CREATE TABLE IF NOT EXISTS search ("
+                "name TEXT PRIMARY KEY, fields TEXT NOT NULL);"
+                "CREATE TABLE IF NOT EXISTS trigrams ("
+                "trigram TEXT PRIMARY KEY, ids BLOB NOT NULL);"
+            )
+        return self.__connection
+
+    def close(self) -> None:
+        if self.__connection is not None:
+            self.__connection.close()
+            self.__connection = None
+
+    def __get_metadata(self) -> Dict[str, str]:
+        rows = self.__connect().execute("SELECT key, value FROM metadata")
+        return dict(rows.fetchall())
+
+    def __set_metadata(self, values: Dict[str, str]) -> None:
+        self.__connect().executemany(
+            "INSERT OR REPLACE INTO metadata (key, value) VALUES (?, ?)",
+            values.items(),
+        )
+
+    def is_up_to_date(self) -> bool:
+        if not os.path.isfile(self.__database_path):
+            return False
+
+        stat = os.stat(self.__database_path)
+        metadata = self.__get_metadata()
+        if metadata.get("version") != INDEX_VERSION:
+            return False
+        if metadata.get("size") != str(stat.st_size):
+            return False
+        if metadata.get("mtime") == str(stat.st_mtime_ns):
+            return True
+
+        # The database file was touched, only rebuild if the content changed
+        if metadata.get("sha256") != calculate_sha256(self.__database_path):
+            return False
+        self.__set_metadata({"mtime": str(stat.st_mtime_ns)})
+        self.__connect().commit()
+        return True
+
+    def update(self) -> None:
+        if not self.is_up_to_date():
+            self.rebuild()
+
+    def rebuild(self) -> None:
+        """
+        Synchronize the index with the database file
+        Only packages which were added, changed or removed are written to the index
+        """
+        connection = self.__connect()
+        if self.__get_metadata().get("version") != INDEX_VERSION:
+            connection.executescript(
+                "DELETE FROM packages; DELETE FROM search; DELETE FROM trigrams;"
+            )
+        indexed = {
+            name: (directory, stamp)
+            for name, directory, stamp in connection.execute(
+                "SELECT name, directory, stamp FROM packages"
+            )
+        }
+        with open_tar(self.__database_path) as t:
+            found = self.__index_members(t, indexed)
+
+        for name in indexed:
+            if name not in found:
+                self.__remove_package(name)
+        self.__index_trigrams()
+
+        stat = os.stat(self.__database_path)
+        self.__set_metadata(
+            {
+                "version": INDEX_VERSION,
+                "size": str(stat.st_size),
+                "mtime": str(stat.st_mtime_ns),
+                "sha256": calculate_sha256(self.__database_path),
+            }
+        )
+        connection.commit()
+
+    def __index_members(
+        self, archive: tarfile.TarFile, indexed: Dict[str, Tuple[str, str]]
+    ) -> Set[str]:
+        """
+        Writes the packages which changed since they were indexed
+        :return: names of all packages in the database
+        """
+        found = set()
+        for member in archive:
+            directory = get_desc_directory(member)
+            if not directory:
+                continue
+            name = directory.rsplit("-", 2)[0]
+            found.add(name)
+            stamp = f"{member.size}:{member.mtime}"
+            if indexed.get(name) == (directory, stamp):
+                continue
+            content = archive.extractfile(member).read()
+            self.__connect().execute(
+                "INSERT OR REPLACE INTO packages (name, directory, stamp, desc) "
+                "VALUES (?, ?, ?, ?)",
+                (name, directory, stamp, content),
+            )
+            self.__index_search_fields(name, content)
+        return found
+
+    def __index_search_fields(self, name: str, content: bytes) -> None:
+        self.__connect().execute(
+            "INSERT OR REPLACE INTO search (name, fields) VALUES (?, ?)",
+            (name, get_search_fields(content)),
+        )
+
+    def __remove_package(self, name: str) -> None:
+        connection = self.__connect()
+        for table in ["packages", "search"]:
+            connection.execute(f"DELETE FROM {table} WHERE name = ?", (name,))
+
+    def __index_trigrams(self) -> None:
+        """
+        Recreates the posting list of search rows per trigram
+        One row per trigram is much faster to write than one row per trigram and
+        package, so the lists are recreated as a whole instead of updated
+        """
+        connection = self.__connect()
+        postings: Dict[str, List[int]] = defaultdict(list)
+        for row_id, name, fields in connection.execute(
+            "SELECT rowid, name, fields FROM search"
+        ):
+            for trigram in get_trigrams(f"{name}\n{fields}"):
+                postings[trigram].append(row_id)
+
+        connection.execute("DELETE FROM trigrams")
+        connection.executemany(
+            "INSERT INTO trigrams (trigram, ids) VALUES (?, ?)",
+            (
+                (trigram, array(POSTING_TYPE, ids).tobytes())
+                for trigram, ids in postings.items()
+            ),
+        )
+
+    def __get_posting(self, trigram: str) -> Set[int]:
+        row = (
+            self.__connect()
+            .execute("SELECT ids FROM trigrams WHERE trigram = ?", (trigram,))
+            .fetchone()
+        )
+        if not row:
+            return set()
+        posting = array(POSTING_TYPE)
+        posting.frombytes(row[0])
+        return set(posting)
+
+    def get_search_candidates(self, trigrams: Set[str]) -> List[Tuple[str, str]]:
+        """
+        Returns the name and search fields of the packages which contain all trigrams
+        :param trigrams: trigrams of the search string, all packages are returned if
+                         this is empty
+        """
+        if not trigrams:
+            return (
+                self.__connect().execute("SELECT name, fields FROM search").fetchall()
+            )
+
+        row_ids: Optional[Set[int]] = None
+        for trigram in trigrams:
+            posting = self.__get_posting(trigram)
+            row_ids = posting if row_ids is None else row_ids & posting
+            if not row_ids:
+                return []
+
+        result = []
+        row_id_list = sorted(row_ids)
+        for start in range(0, len(row_id_list), QUERY_BATCH_SIZE):
+            batch = row_id_list[start : start + QUERY_BATCH_SIZE]  # noqa: E203
+            placeholders = ", ".join("?" * len(batch))
+            rows = self.__connect().execute(
+                f"SELECT name, fields FROM search WHERE rowid IN ({placeholders})",
+                batch,
+            )
+            result.extend(rows)
+        return result
+
+    def get_packages(self) -> List[Tuple[str, str, bytes]]:
+        rows = self.__connect().execute("SELECT name, directory, desc FROM packages")
+        return rows.fetchall()
+
+    def get_desc(self, package: str) -> Optional[bytes]:
+        row = (
+            self.__connect()
+            .execute("SELECT desc FROM packages WHERE name = ?", (package,))
+            .fetchone()
+        )
+        if row:
+            return row[0]
+
+
+def get_desc_directory(member: tarfile.TarInfo) -> Optional[str]:
+    """
+    Returns the package directory of a desc file in a sync database
+    :param member: member of the database archive
+    :return: directory in the name-version-rel format or None if not a desc file
+    """
+    if not member.isfile():
+        return None
+    directory, _, file_name = member.name.rpartition("/")
+    if file_name != "desc" or directory.count("-") < 2 or "/" in directory:
+        return None
+    return directory
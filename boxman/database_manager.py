@@ -1,21 +1,32 @@
 import os.path
-import tarfile
-import urllib.request
-from typing import Optional, List
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import chain
+from typing import Dict, Iterable, Iterator, Optional, List, Tuple
 from urllib.parse import urljoin
 
-from boxman import Config
-from boxman.checksums import checksums_match
+from boxman.config import Config
+from boxman.archive import extract_archive, list_archive_files
+from boxman.cache_manager import ARCHIVE_PATTERN, CacheManager, format_size
+from boxman.data.transaction import Action, Step, Transaction
+from boxman.base_local_database import BaseLocalDatabase
+from boxman.checksums import Checksums
+from boxman.content_store import ContentStore
 from boxman.database import Database
 from boxman.desc import Desc
+from boxman.download import download_part, get_part_path
 from boxman.files import Files
-from boxman.local_database import LocalDatabase
 from boxman.repository import Repository
+from boxman.timings import span
+from boxman.transaction_planner import TransactionPlanner
+from boxman.version import Version, parse_version
 
 
 class DatabaseManager:
     def __init__(
-        self, local_database: LocalDatabase, config: Config, refresh_after: int = 1800
+        self,
+        local_database: BaseLocalDatabase,
+        config: Config,
+        refresh_after: int = 1800,
     ):
         """
 
@@ -26,168 +37,257 @@ class DatabaseManager:
         for repository in config.repositories:
             self.databases.append(Database(repository, refresh_after))
         self.download_directory = os.path.join(config.options.cache_dir, "pkg")
+        self.cache_manager = CacheManager(
+            self.download_directory,
+            config.options.cache_max_size,
+            config.options.cache_keep_versions,
+        )
+        self.content_store: Optional[ContentStore] = None
+        if config.options.content_store:
+            self.content_store = ContentStore(
+                os.path.join(config.options.cache_dir, "store")
+            )
         self.root_dir = config.options.root_dir
+        self.parallel_downloads = config.options.parallel_downloads
 
-    def get_package_list(self, repository: str):
-        packages = []
-        repository_exists = False
-        for database in self.databases:
-            if not repository or database.repository.name == repository:
-                repository_exists = True
-                for package in database.get_package_list():
-                    if package not in packages:
-                        packages.append(package)
+    def refresh_databases(self, force=False) -> bool:
+        """
+        Refresh all databases concurrently
+        :param force: check for new databases regardless of their age
+        :return: True if all databases were refreshed successfully
+        """
+        if not self.databases:
+            return True
 
-        if not repository_exists:
+        success = True
+        workers = min(self.parallel_downloads, len(self.databases))
+        with span("refresh"), ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(database.refresh, force): database
+                for database in self.databases
+            }
+            for future in as_completed(futures):
+                name = futures[future].repository.name
+                try:
+                    future.result()
+                except Exception as error:
+                    print(f"error: failed to refresh database {name}: {error}")
+                    success = False
+        return success
+
+    def get_package_list(self, repository: str) -> Iterator[str]:
+        databases = [
+            database
+            for database in self.databases
+            if not repository or database.repository.name == repository
+        ]
+        if not databases:
             print(f'error: repository "{repository}" was not found.')
             exit(1)
 
-        return packages
+        return unique(
+            chain.from_iterable(database.get_package_list() for database in databases)
+        )
 
-    def get_installed_list(self):
-        return self.local_database.get_package_directories()
+    def get_installed_list(self) -> Iterator[str]:
+        packages = self.local_database.packages
+        return (packages[name] for name in sorted(packages))
 
-    def search_packages(self, search_string: str):
-        packages = []
+    def search_packages(
+        self, search_string: str, regex: bool = False, ignore_case: bool = False
+    ) -> Iterator[str]:
+        """
+        Search all databases, exact name matches are returned first, followed by
+        names starting with the search string, other names and other fields
+        :raises re.error: if regex is set and the search string is invalid
+        """
+        results = []
         for database in self.databases:
-            for package in database.search_packages(search_string):
-                if package not in packages:
-                    packages.append(package)
-
-        packages.sort()
-
-        return packages
+            results.extend(database.search_packages(search_string, regex, ignore_case))
+        results.sort()
+        return unique(entry for _, _, entry in results)
 
-    def show_package(self, package: str):
-        result = ""
-        for database in self.databases:
-            result += database.show_package(package)
-        if result:
-            return result
+    def show_package(self, package: str) -> Iterator[str]:
+        return chain.from_iterable(
+            database.show_package(package) for database in self.databases
+        )
 
-    def show_files(self, package: str):
+    def show_files(self, package: str) -> Iterator[Files]:
         return self.local_database.get_installed_files(package)
 
-    def install_package(  # noqa: C901
-        self, package: str, installed_explicitly=True
-    ) -> bool:
-        package_description = self.get_package_desc(package)
-        if not package_description:
-            print(f"Failed to find package {package}")
-            return False
+    def get_file_owners(self, path: str) -> List[Tuple[str, Version]]:
+        owners = []
+        for package in self.local_database.get_file_owners(path):
+            version = self.local_database.get_package_version(package)
+            if version:
+                owners.append((package, version))
+        return owners
 
-        installed_version = self.local_database.get_package_version(package)
-        if installed_version:
-            if package_description.version > installed_version:
-                self.remove_package(package)
-            else:
-                print(f"Package {package} is already installed, skipping")
-                return True
-
-        for dependency in package_description.dependencies:
-            if not self.local_database.get_package_desc(dependency):
-                result = self.install_package(dependency, False)
-                if not result:
-                    print(f"Failed to install dependency {dependency}")
-                    return False
-
-        if not self.local_database.get_package_desc(package):
-            downloaded_archive = self.download_package(package_description)
-            if not downloaded_archive:
-                return False
-            installed_files = self.extract_archive(downloaded_archive)
-            self.local_database.install(
-                package_description,
-                Files(package, self.root_dir, file_list=installed_files),
-                installed_explicitly,
-            )
+    def install_package(self, package: str) -> bool:
+        return self.install_packages([package])
 
-        return True
+    def install_packages(self, packages: List[str]) -> bool:
+        """
+        Install packages and their dependencies
+        :param packages: names of the packages to install
+        :return: True if all packages were installed or already up to date
+        """
+        planner = TransactionPlanner(self.get_package_desc, self.local_database)
+        with span("dependency resolution"):
+            transaction = planner.plan_install(packages)
+        if not transaction:
+            return False
+        return self.run_transaction(transaction)
 
     def remove_package(self, package) -> bool:
         files = self.local_database.get_package_files(package)
         if files:
-            files.remove_files()
-            return self.local_database.remove_package(package)
+            with span("file removal"):
+                files.remove_files()
+            with span("local database write"):
+                return self.local_database.remove_package(package)
 
         print(f"The package {package} is not installed and could not be removed")
         return False
 
-    def update_package(self, package) -> bool:
+    def remove_packages(self, packages: List[str]) -> bool:
+        planner = TransactionPlanner(self.get_package_desc, self.local_database)
+        with span("dependency resolution"):
+            transaction = planner.plan_remove(packages)
+        if not transaction:
+            return False
+        return self.run_transaction(transaction)
+
+    def run_transaction(self, transaction: Transaction) -> bool:
         """
-        Update a package that is already installed
-        :param package: The name of the package
-        :return: True if the update was successful or not needed, False if failed
+        Run a planned transaction
+        All archives are downloaded and verified before anything is changed on disk
+        :param transaction: the transaction to run
+        :return: True if all steps succeeded
         """
-        package_description = self.get_package_desc(package)
-        if not package_description:
-            print(f"Failed to find package {package}")
+        with span("download"):
+            archives = self.download_packages(transaction.descs_to_download)
+        if archives is None:
             return False
 
-        installed_version = self.local_database.get_package_version(package)
-        if installed_version:
-            if package_description.version > installed_version:
-                if self.remove_package(package):
-                    return self.install_package(package)
-                else:
-                    return False
-            else:
-                print(f"No update required for package {package}")
-                return True
-        else:
-            print("package not installed")
+        with span("conflict check"):
+            conflicts = self.find_file_conflicts(transaction, archives)
+        if conflicts:
+            for conflict in conflicts:
+                print(f"error: {conflict}")
             return False
 
+        if not all(self.run_step(step, archives) for step in transaction.steps):
+            return False
+        self.prune_cache()
+        return True
+
+    def run_step(self, step: Step, archives: Dict[str, str]) -> bool:
+        if step.action in [Action.UPGRADE, Action.REMOVE]:
+            if not self.remove_package(step.name):
+                return False
+        if step.action in [Action.INSTALL, Action.UPGRADE]:
+            with span("extraction"):
+                installed_files = self.extract_archive(archives[step.name])
+            with span("local database write"):
+                self.local_database.install(
+                    step.desc,
+                    Files(step.name, self.root_dir, file_list=installed_files),
+                    step.installed_explicitly,
+                )
+        return True
+
+    def find_file_conflicts(
+        self, transaction: Transaction, archives: Dict[str, str]
+    ) -> List[str]:
+        """
+        Check whether the packages in a transaction would overwrite files owned by
+        other packages, before anything is extracted
+        :param transaction: the transaction to check
+        :param archives: archive path per package name
+        :return: description of each conflict found
+        """
+        replaced = {
+            step.name for step in transaction.steps if step.action != Action.INSTALL
+        }
+        file_index = self.local_database.file_index
+        new_owners: Dict[str, str] = {}
+        conflicts = []
+        for step in transaction.steps:
+            if step.action == Action.REMOVE:
+                continue
+            paths = self.list_archive_files(archives[step.name])
+            ignored_owners = replaced | {step.name}
+            owners = file_index.find_conflicts(paths, ignored_owners)
+            owners.update(get_transaction_conflicts(step.name, paths, new_owners))
+            for path, owner in sorted(owners.items()):
+                conflicts.append(f"{path} exists in both {step.name} and {owner}")
+        return conflicts
+
+    def get_sync_version(self, package: str) -> Optional[Version]:
+        """
+        Newest version of a package in the sync databases, taken from the catalog
+        entries, so no desc has to be parsed
+        """
+        newest = None
+        for database in self.databases:
+            entry = database.packages.get(package)
+            if entry:
+                version = parse_version(entry.version)
+                if newest is None or version > newest:
+                    newest = version
+        return newest
+
+    def get_updates(
+        self, packages: Optional[List[str]] = None
+    ) -> List[Tuple[str, Version, Version]]:
+        """
+        Join the installed packages with the merged sync catalogs in a single pass
+        :param packages: installed packages to check, all of them if empty
+        :return: name, installed version and newer version of each outdated package
+        """
+        updates = []
+        for package in sorted(packages or self.local_database.packages):
+            installed_version = self.local_database.get_package_version(package)
+            available_version = self.get_sync_version(package)
+            if not installed_version or not available_version:
+                continue
+            if available_version > installed_version:
+                updates.append((package, installed_version, available_version))
+        return updates
+
     def update_packages(self, packages: List[str]) -> bool:
-        if not packages:
-            packages = self.get_packages_with_updates_available()
+        """
+        Upgrade all or specific installed packages in a single transaction
+        :param packages: names of the packages to update, all packages if empty
+        :return: True if all packages are up to date afterwards
+        """
+        for package in packages:
+            if package not in self.local_database.packages:
+                print(f"Package {package} is not installed")
+                return False
 
-        if not packages:
+        updates = self.get_updates(packages)
+        if not updates:
             print("All packages are up to date")
             return True
 
-        print(f"Updating packages: {', '.join(packages)}")
-        for package in packages:
-            if not self.update_package(package):
-                print(f"Package {package} failed to update, aborting")
-                return False
-        return True
+        names = [name for name, _, _ in updates]
+        print(f"Updating packages: {', '.join(names)}")
+        return self.install_packages(names)
 
     def extract_archive(self, archive: str) -> List[str]:
-        files_to_extract = self.get_files_to_extract_from_archive(archive)
-        with tarfile.open(archive) as t:
-            for member in t.getmembers():
-                if member.path in files_to_extract:
-                    target = os.path.join(self.root_dir, member.path)
-                    if member.isdir():
-                        if not os.path.exists(target):
-                            os.makedirs(target)
-                    else:
-                        with open(target, "wb") as target_file:
-                            target_file.write(t.extractfile(member).read())
-
-        for file in files_to_extract:
-            assert os.path.exists(file)
-
-        return files_to_extract
-
-    def get_files_to_extract_from_archive(self, archive) -> List[str]:
-        files = []
-        with tarfile.open(archive) as t:
-            for member in t.getmembers():
-                if (
-                    member.name.startswith(".")
-                    or ".." in member.path
-                    or ":\\" in member.path
-                ):
-                    continue
-                extract_to = os.path.join(self.root_dir, member.path)
-                if len(extract_to) < (len(self.root_dir) + len(member.path) - 1):
-                    raise Exception(
-                        f"Failed to concatenate {self.root_dir} and {member.path}, result was {extract_to}"
-                    )
-                files.append(member.path)
-        return files
+        if self.content_store:
+            sha256 = self.cache_manager.get_sha256(archive)
+            return self.content_store.install(archive, sha256, self.root_dir)
+        return extract_archive(archive, self.root_dir)
+
+    def list_archive_files(self, archive: str) -> List[str]:
+        if self.content_store:
+            # Stores the archive right away, so it is only decompressed once
+            sha256 = self.cache_manager.get_sha256(archive)
+            return self.content_store.get_files(archive, sha256)
+        return list_archive_files(archive)
 
     def get_package_desc(self, package: str) -> Optional[Desc]:
         descs_found = []
@@ -196,30 +296,72 @@ class DatabaseManager:
             if desc:
                 descs_found.append(desc)
 
-        newest_desc = None
-        for desc in descs_found:
-            if newest_desc is None or desc > newest_desc:
-                newest_desc = desc
+        if not descs_found:
+            return None
+        return max(descs_found, key=lambda desc: desc.version.key)
 
-        return newest_desc
+    def download_packages(self, descs: List[Desc]) -> Optional[Dict[str, str]]:
+        """
+        Download and verify the archives of multiple packages concurrently
+        :param descs: descs of the packages to download
+        :return: archive path per package name or None if any download failed
+        """
+        if not descs:
+            return {}
+
+        archives = {}
+        workers = min(self.parallel_downloads, len(descs))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(self.download_package, desc): desc for desc in descs
+            }
+            for future in as_completed(futures):
+                name = futures[future].name
+                try:
+                    archives[name] = future.result()
+                except Exception as error:
+                    print(f"error: failed to download {name}: {error}")
+                    archives[name] = None
+
+        if None in archives.values():
+            return None
+        return archives
 
     def download_package(self, desc: Desc) -> Optional[str]:
         if not os.path.exists(self.download_directory):
-            os.makedirs(self.download_directory)
+            os.makedirs(self.download_directory, exist_ok=True)
         current_repository = self.get_repository(desc.source)
         if not current_repository:
             raise Exception("Failed to find repository")
         download_url = urljoin(current_repository.url, desc.file_name)
         download_path = os.path.join(self.download_directory, desc.file_name)
-        if not os.path.isfile(download_path):
-            print(f"Downloading {desc.file_name}")
-            urllib.request.urlretrieve(download_url, download_path)
-
-        if not checksums_match(download_path, desc.md5_checksum, desc.sha256_checksum):
-            os.remove(download_path)
+        with span("checksum"):
+            cached = self.cache_manager.is_cached(
+                download_path, desc.md5_checksum, desc.sha256_checksum
+            )
+        if cached:
+            self.cache_manager.mark_used(download_path)
+            return download_path
+
+        print(f"Downloading {desc.file_name}")
+        part_path = get_part_path(download_path)
+        checksums = Checksums()
+        with span("package download"):
+            resumed = download_part(download_url, part_path, checksums)
+        if resumed and not checksums.matches(desc.md5_checksum, desc.sha256_checksum):
+            # The part file may belong to an older build, download it again as a whole
+            os.remove(part_path)
+            checksums = Checksums()
+            download_part(download_url, part_path, checksums)
+
+        if not checksums.matches(desc.md5_checksum, desc.sha256_checksum):
+            os.remove(part_path)
             print(f"Downloaded {desc.name} package did not match checksums in db")
             return None
 
+        os.replace(part_path, download_path)
+        self.cache_manager.mark_used(download_path)
+        self.cache_manager.ledger.record(download_path, checksums)
         return download_path
 
     def get_repository(self, name: str) -> Optional[Repository]:
@@ -229,17 +371,100 @@ class DatabaseManager:
 
         print(f"Could not find repository with name {name}")
 
+    def clean_cache(
+        self, dry_run: bool = False, keep_versions: Optional[int] = None
+    ) -> bool:
+        """
+        Remove the cached archives which exceed the configured cache limits and the
+        parts of interrupted downloads
+        :param dry_run: only print the archives which would be removed
+        :param keep_versions: overrides the configured amount of versions to keep
+        :return: True if the cache could be cleaned
+        """
+        try:
+            removed = self.cache_manager.clean(
+                dry_run, keep_versions, remove_parts=True
+            )
+        except OSError as error:
+            print(f"error: failed to clean the package cache: {error}")
+            return False
+
+        action = "Would remove" if dry_run else "Removed"
+        for entry in removed:
+            print(f"{action} {entry.file_name}")
+        size = format_size(sum(entry.size for entry in removed))
+        print(f"{action} {len(removed)} packages from the cache, {size} in total")
+        if self.content_store and not dry_run:
+            pruned = self.content_store.prune()
+            print(f"Removed {pruned} files no root uses from the content store")
+        return True
+
+    def prune_cache(self) -> None:
+        """
+        Keep the package cache within its limits, done after each transaction
+        """
+        if not self.cache_manager.has_limits:
+            return
+        try:
+            removed = self.cache_manager.clean()
+        except OSError as error:
+            print(f"warning: failed to clean the package cache: {error}")
+            return
+        if removed:
+            size = format_size(sum(entry.size for entry in removed))
+            print(f"Removed {len(removed)} packages from the cache, {size} in total")
+
+    def verify_cache(self) -> bool:
+        """
+        Verify the cached archives against the checksums in the sync databases and
+        remove the corrupt ones
+        :return: True if no corrupt archives were found
+        """
+        verified, corrupt = self.cache_manager.verify(
+            self.find_archive_desc, self.parallel_downloads
+        )
+        for entry in corrupt:
+            print(f"error: {entry.file_name} is corrupt and was removed")
+        print(f"Verified {verified} packages, {len(corrupt)} were corrupt")
+        return not corrupt
+
+    def find_archive_desc(self, file_name: str) -> Optional[Desc]:
+        """
+        Find the sync desc which belongs to an archive file name
+        """
+        match = ARCHIVE_PATTERN.match(file_name)
+        if not match:
+            return None
+        for database in self.databases:
+            desc = database.get_desc(match.group(1))
+            if desc and desc.file_name == file_name:
+                return desc
+        return None
+
     def get_installed_package_desc(self, package: str) -> Optional[Desc]:
         return self.local_database.get_package_desc(package)
 
-    def get_packages_with_updates_available(self) -> List[str]:
-        packages = self.local_database.get_installed_packages()
-
-        packages_with_updates = []
-        for package in packages:
-            installed_version = self.local_database.get_package_version(package)
-            available_version = self.get_package_desc(package).version
-            if available_version > installed_version:
-                packages_with_updates.append(package)
 
-        return packages_with_updates
+def get_transaction_conflicts(
+    package: str, paths: List[str], new_owners: Dict[str, str]
+) -> Dict[str, str]:
+    """
+    Find files which another package in the same transaction also installs
+    :param package: package which installs the paths
+    :param paths: files installed by the package
+    :param new_owners: owner per file of the packages checked so far, gets updated
+    """
+    conflicts = {}
+    for path in paths:
+        owner = new_owners.setdefault(path, package)
+        if owner != package:
+            conflicts[path] = owner
+    return conflicts
+
+
+def unique(entries: Iterable[str]) -> Iterator[str]:
+    seen = set()
+    for entry in entries:
+        if entry not in seen:
+            seen.add(entry)
+            yield entry
@@ -0,0 +1,128 @@
+import bz2
+import gzip
+import lzma
+import os
+import shutil
+import subprocess
+import tarfile
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import BinaryIO, Dict, Iterator, List, Optional
+
+# Magic bytes at the start of a compressed file per compression
+MAGIC_BYTES = {
+    "zst": b"\x28\xb5\x2f\xfd",
+    "xz": b"\xfd7zXZ\x00",
+    "gz": b"\x1f\x8b",
+    "bz2": b"BZh",
+}
+# Commands which write the decompressed file to stdout, tried in order
+DECOMPRESSORS: Dict[str, List[List[str]]] = {
+    "zst": [["zstd", "-dcq", "-T0"]],
+    "xz": [["xz", "-dcq", "-T0"]],
+    "gz": [["pigz", "-dc"]],
+    "bz2": [["lbzip2", "-dc"], ["pbzip2", "-dc"]],
+}
+STDLIB_DECOMPRESSORS = {"xz": lzma.open, "gz": gzip.open, "bz2": bz2.open}
+# Starting a process costs more than decompressing small files like most databases
+SUBPROCESS_MIN_SIZE = 1024 * 1024
+
+
+class DecompressionError(Exception):
+    pass
+
+
+def detect_compression(path: str) -> Optional[str]:
+    """
+    Detects the compression of a file by its magic bytes
+    :return: zst, xz, gz, bz2 or None if the file is not compressed
+    """
+    with open(path, "rb") as file:
+        header = file.read(6)
+    for compression, magic in MAGIC_BYTES.items():
+        if header.startswith(magic):
+            return compression
+    return None
+
+
+@lru_cache(maxsize=None)
+def find_decompressor(compression: str) -> Optional[List[str]]:
+    for command in DECOMPRESSORS.get(compression, []):
+        if shutil.which(command[0]):
+            return command
+    return None
+
+
+@contextmanager
+def open_decompressed(path: str) -> Iterator[BinaryIO]:
+    """
+    Opens a possibly compressed file for streaming reads of the decompressed data
+    Large files are decompressed by a multithreaded tool like zstd, xz or pigz in a
+    separate process if it is installed, otherwise the standard library is used
+    :raises DecompressionError: if the compression is not supported
+    """
+    compression = detect_compression(path)
+    if compression is None:
+        with open(path, "rb") as file:
+            yield file
+        return
+
+    command = find_decompressor(compression)
+    stdlib_open = STDLIB_DECOMPRESSORS.get(compression)
+    if command and (not stdlib_open or os.path.getsize(path) >= SUBPROCESS_MIN_SIZE):
+        with run_decompressor(command, path) as stream:
+            yield stream
+    elif stdlib_open:
+        with stdlib_open(path, "rb") as stream:
+            yield stream
+    else:
+        raise DecompressionError(
+            f"{os.path.basename(path)} is {compression} compressed, which requires "
+            f"{DECOMPRESSORS[compression][0][0]} to be installed"
+        )
+
+
+@contextmanager
+def run_decompressor(command: List[str], path: str) -> Iterator[BinaryIO]:
+    process = subprocess.Popen(
+        command + [path], stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    stopped_early = False
+    try:
+        yield process.stdout
+        # Readers like is_tar_archive stop early, the rest isn't decompressed then
+        if process.poll() is None:
+            process.kill()
+            stopped_early = True
+    except BaseException:
+        process.kill()
+        raise
+    finally:
+        process.stdout.close()
+        error = process.stderr.read().decode(errors="replace").strip()
+        process.stderr.close()
+        process.wait()
+
+    if process.returncode != 0 and not stopped_early:
+        raise DecompressionError(
+            f"{command[0]} failed to decompress {os.path.basename(path)}: {error}"
+        )
+
+
+@contextmanager
+def open_tar(path: str) -> Iterator[tarfile.TarFile]:
+    """
+    Opens a possibly compressed tar archive for a single pass over its members
+    """
+    with open_decompressed(path) as stream:
+        with tarfile.open(fileobj=stream, mode="r|") as archive:
+            yield archive
+
+
+def is_tar_archive(path: str) -> bool:
+    try:
+        with open_tar(path) as archive:
+            archive.next()
+    except (tarfile.TarError, DecompressionError, OSError, EOFError):
+        return False
+    return True
@@ -1,67 +1,148 @@
 import re
 import time
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Tuple, Union
 
-from boxman.version import Version
+from boxman.version import Version, VersionKey, parse_version
+
+
+REQUIRED_KEYS = ["NAME", "VERSION", "ARCH"]
+# XDATA is skipped, because I don't know what it does
+LOCAL_OPTIONAL_KEYS = [
+    "DESC",
+    "GROUPS",
+    "URL",
+    "LICENSE",
+    "DEPENDS",
+    "OPTDEPENDS",
+    "MAKEDEPENDS",
+    "CHECKDEPENDS",
+    "CONFLICTS",
+    "PROVIDES",
+]
 
 
 class Desc:
-    __values: Dict
+    __slots__ = [
+        "__content",
+        "__source",
+        "__values",
+        "__name",
+        "__version",
+        "__architecture",
+        "__file_name",
+        "__md5_checksum",
+        "__sha256_checksum",
+        "__dependencies",
+    ]
+    __content: bytes
     __source: str
+    __values: Optional[Dict[str, List]]
 
-    def __init__(self, content, source):
-        self.__fill_values(content)
-        self.__validate_values()
-
+    def __init__(self, content: Union[str, bytes], source: str):
+        """
+        Represents a desc file from a sync or local database
+        The content is kept as bytes and only decoded when a field is requested.
+        Frequently used fields are decoded on their own, the others are parsed
+        together the first time one of them is requested.
+        :param content: content of the desc file
+        :param source: name of the repository the desc belongs to
+        """
+        if isinstance(content, str):
+            content = content.encode()
+        self.__content = content
         self.__source = source
-
-    def __fill_values(self, content: str):
-        self.__values = {}
+        self.__values = None
+        self.__clear_fields()
+
+    def __clear_fields(self) -> None:
+        self.__name = None
+        self.__version = None
+        self.__architecture = None
+        self.__file_name = None
+        self.__md5_checksum = None
+        self.__sha256_checksum = None
+        self.__dependencies = None
+
+    def __parse_values(self) -> Dict[str, List]:
+        values: Dict[str, List] = {}
         key = None
 
-        for line in content.split("\n"):
+        for line in self.__content.decode().split("\n"):
             if not line:
                 continue
 
-            if re.match(r"^%[A-Z\d]+%$", line):
-                key = line.strip("%")
-                self.__values[key] = []
+            if line[0] == "%" and line[-1] == "%" and line[1:-1].isupper():
+                key = line[1:-1]
+                values[key] = []
                 continue
 
             if not key:
                 continue
 
-            self.__values[key].append(line)
+            values[key].append(line)
 
-    def __validate_values(self):
-        required_keys = ["NAME", "VERSION", "ARCH"]
-        for key in required_keys:
-            assert key in self.__values
-            assert len(self.__values[key]) > 0
-        assert "SIZE" in self.__values or (
-            "ISIZE" in self.__values and "CSIZE" in self.__values
-        )
+        self.__validate_values(values)
+        return values
+
+    @staticmethod
+    def __validate_values(values: Dict[str, List]):
+        for key in REQUIRED_KEYS:
+            assert key in values
+            assert len(values[key]) > 0
+        assert "SIZE" in values or ("ISIZE" in values and "CSIZE" in values)
+
+    @property
+    def __parsed(self) -> Dict[str, List]:
+        if self.__values is None:
+            self.__values = self.__parse_values()
+            # The raw content is no longer needed once everything is parsed
+            self.__content = b""
+        return self.__values
+
+    def __find_values(self, key: str) -> List[str]:
+        """
+        Decodes the values of a single field without parsing the whole desc
+        """
+        if self.__values is not None:
+            return [str(value) for value in self.__values.get(key, [])]
+
+        marker = f"%{key}%\n".encode()
+        start = self.__content.find(marker)
+        while start > 0 and self.__content[start - 1] != ord("\n"):
+            start = self.__content.find(marker, start + 1)
+        if start == -1:
+            return []
+
+        start += len(marker)
+        end = self.__content.find(b"\n\n", start)
+        if end == -1:
+            end = len(self.__content)
+        return [line for line in self.__content[start:end].decode().split("\n") if line]
+
+    def get_values(self, key: str) -> List[str]:
+        """
+        Returns the values of a field without validating the rest of the desc
+        """
+        return self.__find_values(key)
+
+    def __find_value(self, key: str) -> str:
+        values = self.__find_values(key)
+        return values[0] if values else ""
 
     def __eq__(self, other):
-        return self.__values == other.__values and self.__source == other.__source
+        return self.__parsed == other.__parsed and self.__source == other.__source
 
     def __lt__(self, other):
-        if self.name != other.name:
-            return self.name < other.name
-
-        return self.version < other.version
+        return self.sort_key < other.sort_key
 
     def __gt__(self, other):
-        if self.name != other.name:
-            return self.name > other.name
-
-        return self.version > other.version
+        return self.sort_key > other.sort_key
 
     def __repr__(self):
         result = ""
-        for key in self.__values:
+        for key, values in self.__parsed.items():
             result += f"%{key}%\n"
-            for value in self.__values[key]:
+            for value in values:
                 result += f"{value}\n"
             result += "\n\n"
         return result
@@ -115,58 +196,39 @@ class Desc:
 
     def convert_to_local(self, installed_explicitly=True):
         self.set_validation()
+        values = self.__parsed
         new_values = {
-            "NAME": self.__values["NAME"],
-            "VERSION": self.__values["VERSION"],
-            "BASE": self.__values["BASE"],
-            "ARCH": self.__values["ARCH"],
-            "BUILDDATE": self.__values["BUILDDATE"],
+            "NAME": values["NAME"],
+            "VERSION": values["VERSION"],
+            "BASE": values.get("BASE", values["NAME"]),
+            "ARCH": values["ARCH"],
+            "BUILDDATE": values.get("BUILDDATE", [0]),
             "INSTALLDATE": [int(time.time())],
-            "SIZE": self.__values["ISIZE"],
-            "VALIDATION": self.__values["VALIDATION"],
+            "SIZE": values.get("ISIZE", values.get("SIZE")),
+            "VALIDATION": values["VALIDATION"],
         }
+        for key in LOCAL_OPTIONAL_KEYS:
+            if key in values:
+                new_values[key] = values[key]
 
         # Set reason this package is installed
         if not installed_explicitly:
             new_values["REASON"] = [1]
 
         self.__values = new_values
-
-    def __copy_optional_values_to_local_dict(  # noqa: C901
-        self, target_dict: Dict
-    ) -> None:
-        if "DESC" in self.__values:
-            target_dict["DESC"] = self.__values["DESC"]
-        if "GROUPS" in self.__values:
-            target_dict["GROUPS"] = self.__values["GROUPS"]
-        if "URL" in self.__values:
-            target_dict["URL"] = self.__values["URL"]
-        if "LICENSE" in self.__values:
-            target_dict["LICENSE"] = self.__values["LICENSE"]
-        if "DEPENDS" in self.__values:
-            target_dict["DEPENDS"] = self.__values["DEPENDS"]
-        if "OPTDEPENDS" in self.__values:
-            target_dict["OPTDEPENDS"] = self.__values["OPTDEPENDS"]
-        if "MAKEDEPENDS" in self.__values:
-            target_dict["MAKEDEPENDS"] = self.__values["MAKEDEPENDS"]
-        if "CHECKDEPENDS" in self.__values:
-            target_dict["CHECKDEPENDS"] = self.__values["CHECKDEPENDS"]
-        if "CONFLICTS" in self.__values:
-            target_dict["CONFLICTS"] = self.__values["CONFLICTS"]
-        if "PROVIDES" in self.__values:
-            target_dict["PROVIDES"] = self.__values["PROVIDES"]
-        # XDATA is skipped, because I don't know what it does
+        self.__clear_fields()
 
     def set_validation(self):
-        self.__values["VALIDATION"] = []
+        values = self.__parsed
+        values["VALIDATION"] = []
 
         # Pacman would also add pgp if PGPSIG is set, but boxman does no PGP validation
-        if "MD5SUM" in self.__values:
-            self.__values["VALIDATION"].append("md5")
-        if "SHA256SUM" in self.__values:
-            self.__values["VALIDATION"].append("sha256")
-        if len(self.__values["VALIDATION"]) == 0:
-            self.__values["VALIDATION"].append("none")
+        if "MD5SUM" in values:
+            values["VALIDATION"].append("md5")
+        if "SHA256SUM" in values:
+            values["VALIDATION"].append("sha256")
+        if len(values["VALIDATION"]) == 0:
+            values["VALIDATION"].append("none")
 
     @property
     def source(self) -> str:
@@ -180,36 +242,49 @@ class Desc:
         """
         Name of the package without version information
         """
-        return self.__values["NAME"][0]
+        if self.__name is None:
+            self.__name = self.__find_value("NAME")
+        return self.__name
 
     @property
     def base(self) -> str:
         """
         Name of the package without version information
         """
-        return self.__values["BASE"][0]
+        return self.__parsed["BASE"][0]
 
     @property
     def version(self) -> Version:
         """
         Package version in format "version-build", example: 1.0.1-4
         """
-        return Version(self.__values["VERSION"][0])
+        if self.__version is None:
+            self.__version = parse_version(self.__find_value("VERSION"))
+        return self.__version
+
+    @property
+    def sort_key(self) -> Tuple[str, VersionKey]:
+        """
+        Key to sort descs by name and version with
+        """
+        return self.name, self.version.key
 
     @property
     def architecture(self) -> str:
         """
         The CPU architecture the package was build for
         """
-        return self.__values["ARCH"][0]
+        if self.__architecture is None:
+            self.__architecture = self.__find_value("ARCH")
+        return self.__architecture
 
     @property
     def description(self) -> str:
         """
         Description of the package
         """
-        if "DESC" in self.__values and len(self.__values["DESC"]) > 0:
-            return "/n".join(self.__values["DESC"])
+        if "DESC" in self.__parsed and len(self.__parsed["DESC"]) > 0:
+            return "/n".join(self.__parsed["DESC"])
         return ""
 
     @property
@@ -217,8 +292,8 @@ class Desc:
         """
         Package groups to which the package was assigned
         """
-        if "GROUPS" in self.__values and len(self.__values["GROUPS"]) > 0:
-            return self.__values["GROUPS"]
+        if "GROUPS" in self.__parsed and len(self.__parsed["GROUPS"]) > 0:
+            return self.__parsed["GROUPS"]
         return []
 
     @property
@@ -226,16 +301,17 @@ class Desc:
         """
         File name of the package
         """
-        if "FILENAME" in self.__values and len(self.__values["FILENAME"]) > 0:
-            return self.__values["FILENAME"][0]
+        if self.__file_name is None:
+            self.__file_name = self.__find_value("FILENAME")
+        return self.__file_name or None
 
     @property
     def url(self) -> str:
         """
         URL to the homepage of the package
         """
-        if "URL" in self.__values and len(self.__values["URL"]) > 0:
-            return self.__values["URL"][0]
+        if "URL" in self.__parsed and len(self.__parsed["URL"]) > 0:
+            return self.__parsed["URL"][0]
         return ""
 
     @property
@@ -243,8 +319,8 @@ class Desc:
         """
         Name and possibly email of packager in "Firstname Lastname <email>" format
         """
-        if "PACKAGER" in self.__values and len(self.__values["PACKAGER"]) > 0:
-            return self.__values["PACKAGER"][0]
+        if "PACKAGER" in self.__parsed and len(self.__parsed["PACKAGER"]) > 0:
+            return self.__parsed["PACKAGER"][0]
         return "Unknown Packager"
 
     @property
@@ -253,8 +329,8 @@ class Desc:
         Binaries provided which could potentially conflict with other packages.
         Set manually by the packager.
         """
-        if "PROVIDES" in self.__values and len(self.__values["PROVIDES"]) > 0:
-            return self.__values["PROVIDES"]
+        if "PROVIDES" in self.__parsed and len(self.__parsed["PROVIDES"]) > 0:
+            return self.__parsed["PROVIDES"]
         return []
 
     @property
@@ -262,17 +338,17 @@ class Desc:
         """
         Packages which need to be installed for this package to be usable
         """
-        if "DEPENDS" in self.__values and len(self.__values["DEPENDS"]) > 0:
-            return self.__values["DEPENDS"]
-        return []
+        if self.__dependencies is None:
+            self.__dependencies = self.__find_values("DEPENDS")
+        return self.__dependencies
 
     @property
     def optional_dependencies(self) -> List[str]:
         """
         Packages which can be installed to enhance the functionality of this package
         """
-        if "OPTDEPENDS" in self.__values and len(self.__values["OPTDEPENDS"]) > 0:
-            return self.__values["OPTDEPENDS"]
+        if "OPTDEPENDS" in self.__parsed and len(self.__parsed["OPTDEPENDS"]) > 0:
+            return self.__parsed["OPTDEPENDS"]
         return []
 
     @property
@@ -280,14 +356,14 @@ class Desc:
         """
         Packages which need to be installed to be able to build this package
         """
-        if "MAKEDEPENDS" in self.__values and len(self.__values["MAKEDEPENDS"]) > 0:
-            return self.__values["MAKEDEPENDS"]
+        if "MAKEDEPENDS" in self.__parsed and len(self.__parsed["MAKEDEPENDS"]) > 0:
+            return self.__parsed["MAKEDEPENDS"]
         return []
 
     @property
     def licenses(self) -> List[str]:
-        if "LICENSE" in self.__values and len(self.__values["LICENSE"]) > 0:
-            return self.__values["LICENSE"]
+        if "LICENSE" in self.__parsed and len(self.__parsed["LICENSE"]) > 0:
+            return self.__parsed["LICENSE"]
         return []
 
     @property
@@ -295,8 +371,8 @@ class Desc:
         """
         Packages which cannot be installed on the same system as this package
         """
-        if "CONFLICTS" in self.__values and len(self.__values["CONFLICTS"]) > 0:
-            return self.__values["CONFLICTS"]
+        if "CONFLICTS" in self.__parsed and len(self.__parsed["CONFLICTS"]) > 0:
+            return self.__parsed["CONFLICTS"]
         return []
 
     @property
@@ -304,8 +380,8 @@ class Desc:
         """
         For which packages this package should be installed as a replacement
         """
-        if "REPLACES" in self.__values and len(self.__values["REPLACES"]) > 0:
-            return self.__values["REPLACES"]
+        if "REPLACES" in self.__parsed and len(self.__parsed["REPLACES"]) > 0:
+            return self.__parsed["REPLACES"]
         return []
 
     @property
@@ -314,13 +390,13 @@ class Desc:
         Which types of validators can be used to validate this package
         """
         result = []
-        if "VALIDATE" in self.__values and len(self.__values["VALIDATE"]) > 0:
-            result += self.__values["VALIDATE"]
-        if "MD5SUM" in self.__values and "MD5 Sum" not in result:
+        if "VALIDATE" in self.__parsed and len(self.__parsed["VALIDATE"]) > 0:
+            result += self.__parsed["VALIDATE"]
+        if "MD5SUM" in self.__parsed and "MD5 Sum" not in result:
             result.append("MD5 Sum")
-        if "SHA256SUM" in self.__values and "SHA-256 Sum" not in result:
+        if "SHA256SUM" in self.__parsed and "SHA-256 Sum" not in result:
             result.append("SHA-256 Sum")
-        if "PGPSIG" in self.__values and "Signature" not in result:
+        if "PGPSIG" in self.__parsed and "Signature" not in result:
             result.append("Signature")
 
         return result
@@ -330,8 +406,8 @@ class Desc:
         """
         Whether this package was installed automatically as a dependency or not
         """
-        if "REASON" in self.__values and len(self.__values["REASON"]) > 0:
-            return self.__values["REASON"][0] == 1
+        if "REASON" in self.__parsed and len(self.__parsed["REASON"]) > 0:
+            return str(self.__parsed["REASON"][0]) == "1"
         return False
 
     @property
@@ -339,42 +415,51 @@ class Desc:
         """
         Return size of package when installed
         """
-        if "ISIZE" in self.__values and len(self.__values["ISIZE"]) > 0:
-            return int(self.__values["ISIZE"][0])
-        if "SIZE" in self.__values and len(self.__values["SIZE"]) > 0:
-            return int(self.__values["SIZE"][0])
+        if "ISIZE" in self.__parsed and len(self.__parsed["ISIZE"]) > 0:
+            return int(self.__parsed["ISIZE"][0])
+        if "SIZE" in self.__parsed and len(self.__parsed["SIZE"]) > 0:
+            return int(self.__parsed["SIZE"][0])
 
     @property
     def compressed_size(self) -> Optional[int]:
         """
         Return size of package when installed
         """
-        if "CSIZE" in self.__values and len(self.__values["CSIZE"]) > 0:
-            return int(self.__values["CSIZE"][0])
+        if "CSIZE" in self.__parsed and len(self.__parsed["CSIZE"]) > 0:
+            return int(self.__parsed["CSIZE"][0])
 
     @property
     def build_date(self) -> int:
-        if "BUILDDATE" in self.__values and len(self.__values["BUILDDATE"]) > 0:
-            return int(self.__values["BUILDDATE"][0])
+        if "BUILDDATE" in self.__parsed and len(self.__parsed["BUILDDATE"]) > 0:
+            return int(self.__parsed["BUILDDATE"][0])
         return 0
 
     @property
     def install_date(self) -> Optional[int]:
-        if "INSTALLDATE" in self.__values and len(self.__values["INSTALLDATE"]) > 0:
-            return int(self.__values["INSTALLDATE"][0])
+        if "INSTALLDATE" in self.__parsed and len(self.__parsed["INSTALLDATE"]) > 0:
+            return int(self.__parsed["INSTALLDATE"][0])
 
     @property
     def md5_checksum(self) -> Optional[str]:
         """
         MD5 checksum of the package
         """
-        if "MD5SUM" in self.__values and len(self.__values["MD5SUM"]) > 0:
-            return self.__values["MD5SUM"][0]
+        if self.__md5_checksum is None:
+            self.__md5_checksum = self.__find_value("MD5SUM")
+        return self.__md5_checksum or None
 
     @property
     def sha256_checksum(self) -> Optional[str]:
         """
         SHA 256 checksum of the package
         """
-        if "SHA256SUM" in self.__values and len(self.__values["SHA256SUM"]) > 0:
-            return self.__values["SHA256SUM"][0]
+        if self.__sha256_checksum is None:
+            self.__sha256_checksum = self.__find_value("SHA256SUM")
+        return self.__sha256_checksum or None
+
+
+def get_dependency_name(dependency: str) -> str:
+    """
+    Strips the version requirement from a dependency, sdl2>=2.0 becomes sdl2
+    """
+    return re.split(r"[<>=]", dependency, maxsplit=1)[0]
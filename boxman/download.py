@@ -1,6 +1,13 @@
+import json
 import os
-import urllib.request
-from typing import Optional
+import tempfile
+from typing import BinaryIO, Callable, Dict, Optional
+
+from boxman.checksums import Checksums, read_chunks
+from boxman.constants import CHUNK_SIZE
+from boxman.http_client import HttpError, open_url
+
+CACHE_HEADERS = ["ETag", "Last-Modified"]
 
 
 def calculate_progress(
@@ -27,13 +34,196 @@ def print_download_progress(
     print(f"{percentage}% done")
 
 
-def download(url: str, target_path: str, report_progress=False) -> None:
+def copy_stream(
+    source: BinaryIO,
+    target: BinaryIO,
+    checksums: Optional[Checksums] = None,
+    reporthook: Optional[Callable[[int, int, Optional[int]], None]] = None,
+    download_size: Optional[int] = None,
+) -> None:
+    chunk_number = 0
+    for chunk in read_chunks(source):
+        target.write(chunk)
+        if checksums:
+            checksums.update(chunk)
+        chunk_number += 1
+        if reporthook:
+            reporthook(chunk_number, CHUNK_SIZE, download_size)
+
+
+def get_download_size(response) -> Optional[int]:
+    content_length = response.headers.get("Content-Length")
+    if content_length and content_length.isdecimal():
+        return int(content_length)
+    return None
+
+
+def download(
+    url: str,
+    target_path: str,
+    report_progress=False,
+    checksums: Optional[Checksums] = None,
+) -> None:
+    """
+    Download a file in chunks
+    :param url: url to download from
+    :param target_path: path to download the file to
+    :param report_progress: print the progress of the download
+    :param checksums: updated with the downloaded data, so it does not need to be read again
+    """
+    download_directory = os.path.dirname(target_path)
+    if not os.path.isdir(download_directory):
+        os.makedirs(download_directory, exist_ok=True)
+
+    with open_url(url) as response:
+        with open(target_path, "wb") as target_file:
+            copy_stream(
+                response,
+                target_file,
+                checksums,
+                print_download_progress if report_progress else None,
+                get_download_size(response),
+            )
+
+
+def get_part_path(target_path: str) -> str:
+    return f"{target_path}.part"
+
+
+def open_range(url: str, offset: int):
+    """
+    Requests a file starting at an offset
+    :return: the response and whether it starts at the offset instead of the beginning
+    """
+    if not offset:
+        return open_url(url), False
+
+    try:
+        response = open_url(url, {"Range": f"bytes={offset}-"})
+    except HttpError as error:
+        if error.status != 416:
+            raise
+        # Nothing left past the offset, the caller verifies the part is complete
+        return None, True
+
+    content_range = response.headers.get("Content-Range") or ""
+    # Responses for file:// urls only have a status since Python 3.9
+    status = getattr(response, "status", None)
+    resumed = status == 206 and content_range.startswith(f"bytes {offset}-")
+    return response, resumed
+
+
+def download_part(
+    url: str,
+    part_path: str,
+    checksums: Checksums,
+    report_progress=False,
+) -> bool:
+    """
+    Download a file to a .part file, resuming an earlier interrupted download
+    The part file is kept when the download fails, so the next attempt can continue
+    where it stopped. If the server does not support range requests the download
+    starts from the beginning.
+    :param url: url to download from
+    :param part_path: path of the partial file
+    :param checksums: updated with the complete content of the part file
+    :param report_progress: print the progress of the download
+    :return: True if data from an earlier download was reused
+    """
+    download_directory = os.path.dirname(part_path)
+    if not os.path.isdir(download_directory):
+        os.makedirs(download_directory, exist_ok=True)
+
+    offset = os.path.getsize(part_path) if os.path.isfile(part_path) else 0
+    response, resumed = open_range(url, offset)
+    if resumed:
+        with open(part_path, "rb") as part_file:
+            for chunk in read_chunks(part_file):
+                checksums.update(chunk)
+    if not response:
+        return resumed
+
+    with response:
+        with open(part_path, "ab" if resumed else "wb") as part_file:
+            copy_stream(
+                response,
+                part_file,
+                checksums,
+                print_download_progress if report_progress else None,
+                get_download_size(response),
+            )
+    return resumed
+
+
+def get_headers_path(target_path: str) -> str:
+    return f"{target_path}.headers"
+
+
+def get_conditional_headers(target_path: str) -> Dict[str, str]:
+    """
+    Creates the headers for a conditional request based on the stored response headers
+    :param target_path: path to which the file was downloaded before
+    :return: If-None-Match and If-Modified-Since headers if they are known
+    """
+    headers_path = get_headers_path(target_path)
+    if not os.path.isfile(target_path) or not os.path.isfile(headers_path):
+        return {}
+
+    try:
+        with open(headers_path, "r") as headers_file:
+            stored_headers = json.load(headers_file)
+    except (OSError, ValueError):
+        return {}
+
+    headers = {}
+    if stored_headers.get("ETag"):
+        headers["If-None-Match"] = stored_headers["ETag"]
+    if stored_headers.get("Last-Modified"):
+        headers["If-Modified-Since"] = stored_headers["Last-Modified"]
+    return headers
+
+
+def download_if_modified(url: str, target_path: str, conditional=True) -> bool:
+    """
+    Downloads a file only if it was changed on the server since the last download
+    The file is downloaded to a temporary file which replaces the target when done
+    :param url: url to download from
+    :param target_path: path to download the file to
+    :param conditional: set to False to download the file unconditionally
+    :return: True if the file was downloaded, False if it was not modified
+    """
+    headers = get_conditional_headers(target_path) if conditional else {}
+    try:
+        response = open_url(url, headers)
+    except HttpError as error:
+        if error.status != 304:
+            raise
+        os.utime(target_path)
+        return False
+
+    with response:
+        write_atomically(response, target_path)
+        stored_headers = {}
+        for header in CACHE_HEADERS:
+            if response.headers.get(header):
+                stored_headers[header] = response.headers.get(header)
+    with open(get_headers_path(target_path), "w") as headers_file:
+        json.dump(stored_headers, headers_file)
+    return True
+
+
+def write_atomically(source, target_path: str) -> None:
     download_directory = os.path.dirname(target_path)
     if not os.path.isdir(download_directory):
         os.makedirs(download_directory)
 
-    urllib.request.urlretrieve(
-        url,
-        target_path,
-        reporthook=print_download_progress if report_progress else None,
+    file_descriptor, temporary_path = tempfile.mkstemp(
+        dir=download_directory, prefix=f".{os.path.basename(target_path)}."
     )
+    try:
+        with os.fdopen(file_descriptor, "wb") as temporary_file:
+            copy_stream(source, temporary_file)
+        os.replace(temporary_path, target_path)
+    except BaseException:
+        os.remove(temporary_path)
+        raise
@@ -0,0 +1,104 @@
+import os
+import sqlite3
+from typing import Dict, Iterable, List, Optional, Set
+
+from boxman.files import Files
+
+
+class FileIndex:
+    __index_path: str
+    __shared: bool
+    __connection: Optional[sqlite3.Connection]
+
+    def __init__(self, index_path: str, shared: bool = False):
+        """
+        Persistent index of which installed package owns which file
+        :param index_path: path to the index file
+        :param shared: the file also holds other tables, so it can't be rebuilt
+        """
+        self.__index_path = index_path
+        self.__shared = shared
+        self.__connection = None
+
+    def exists(self) -> bool:
+        return os.path.isfile(self.__index_path)
+
+    def __connect(self) -> sqlite3.Connection:
+        if self.__connection is None:
+            self.__connection = open_index(self.__index_path)
+        return self.__connection
+
+    def close(self) -> None:
+        if self.__connection is not None:
+            self.__connection.close()
+            self.__connection = None
+
+    def add_package(self, package: str, paths: Iterable[str]) -> None:
+        connection = self.__connect()
+        add_paths(connection, package, paths)
+        connection.commit()
+
+    def remove_package(self, package: str) -> None:
+        connection = self.__connect()
+        connection.execute("DELETE FROM files WHERE package = ?", (package,))
+        connection.commit()
+
+    def get_owners(self, path: str) -> List[str]:
+        rows = self.__connect().execute(
+            "SELECT package FROM files WHERE path = ? ORDER BY package", (path,)
+        )
+        return [row[0] for row in rows]
+
+    def find_conflicts(
+        self, paths: Iterable[str], ignored_owners: Set[str]
+    ) -> Dict[str, str]:
+        """
+        Finds files which are already owned by another package
+        :param paths: files which are about to be installed
+        :param ignored_owners: packages which are allowed to own the files
+        :return: the current owner per conflicting file
+        """
+        conflicts = {}
+        for path in paths:
+            for owner in self.get_owners(path):
+                if owner not in ignored_owners:
+                    conflicts[path] = owner
+        return conflicts
+
+    def rebuild(self, files_list: Iterable[Files]) -> None:
+        """
+        Recreates the index from the files lists in the local database
+        The index is written to a temporary file first, so it is never left incomplete
+        """
+        if self.__shared:
+            raise ValueError(
+                f"{self.__index_path} is shared with other data and can't be rebuilt"
+            )
+        self.close()
+        temporary_path = f"{self.__index_path}.tmp"
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+
+        connection = open_index(temporary_path)
+        for files in files_list:
+            add_paths(connection, files.package, files.get_paths())
+        connection.commit()
+        connection.close()
+        os.replace(temporary_path, self.__index_path)
+
+
+def open_index(index_path: str) -> sqlite3.Connection:
+    connection = sqlite3.connect(index_path)
+    connection.executescript(
+        "CREATE TABLE IF NOT EXISTS files ("
+        "path TEXT NOT NULL, package TEXT NOT NULL, PRIMARY KEY (path, package));"
+        "CREATE INDEX IF NOT EXISTS files_package ON files (package);"
+    )
+    return connection
+
+
+def add_paths(connection: sqlite3.Connection, package: str, paths: Iterable[str]):
+    connection.executemany(
+        "INSERT OR IGNORE INTO files (path, package) VALUES (?, ?)",
+        ((path.rstrip("/"), package) for path in paths),
+    )
@@ -40,6 +40,9 @@ class Files:
         lines = ["%FILES%"] + self.__files + [""]
         return "\n".join(lines)
 
+    def get_paths(self) -> List[str]:
+        return list(self.__files)
+
     def get_files(self):
         result = []
         for file in self.__files:
@@ -51,15 +54,11 @@ class Files:
         files = self.get_files()
         files.reverse()
         for file in files:
-            if os.path.isfile(file):
-                os.remove(file)
-            elif os.path.isdir(file):
-                try:
-                    os.rmdir(file)
-                except OSError:
-                    continue  # If there is still content there, directories can stay
+            # A symlinked directory could lead outside of the root directory
+            if is_inside_root(self.__root_directory, os.path.dirname(file)):
+                remove_file(file)
             else:
-                print(f"Could not delete not existing file: {file}")
+                print(f"Not deleting {file}, it is outside of the root directory")
 
     def get_full_path(self, path: str):
         if ".." in path:
@@ -77,3 +76,24 @@ class Files:
 
     def __gt__(self, other):
         return self.package > other.package
+
+
+def remove_file(file: str) -> None:
+    if os.path.islink(file) or os.path.isfile(file):
+        os.remove(file)
+    elif os.path.isdir(file):
+        try:
+            os.rmdir(file)
+        except OSError:
+            pass  # If there is still content there, directories can stay
+    else:
+        print(f"Could not delete not existing file: {file}")
+
+
+def is_inside_root(root_dir: str, path: str) -> bool:
+    """
+    Checks whether a path is inside of the root directory once symlinks are resolved
+    """
+    root = os.path.realpath(root_dir)
+    real_path = os.path.realpath(path)
+    return real_path == root or real_path.startswith(os.path.join(root, ""))
@@ -0,0 +1,249 @@
+import http.client
+import ssl
+import threading
+import urllib.error
+import urllib.request
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+TIMEOUT = 60
+MAX_REDIRECTS = 5
+# Idle connections kept open per host, matches the default amount of parallel downloads
+MAX_IDLE_CONNECTIONS = 5
+REDIRECT_STATUSES = [301, 302, 303, 307, 308]
+# Statuses of a stored redirect target which mean it expired, like signed CDN urls
+EXPIRED_STATUSES = [403, 404, 410]
+
+ConnectionKey = Tuple[str, str]
+
+
+class HttpError(Exception):
+    def __init__(self, url: str, status: int, reason: str):
+        super().__init__(f"HTTP Error {status}: {reason}")
+        self.url = url
+        self.status = status
+        self.reason = reason
+
+
+class Response:
+    def __init__(
+        self,
+        client: "HttpClient",
+        key: ConnectionKey,
+        connection: http.client.HTTPConnection,
+        response: http.client.HTTPResponse,
+    ):
+        """
+        Response which hands its connection back to the client once it is closed
+        The connection is only reused if the whole body was read
+        """
+        self.__client = client
+        self.__key = key
+        self.__connection: Optional[http.client.HTTPConnection] = connection
+        self.__response = response
+
+    @property
+    def status(self) -> int:
+        return self.__response.status
+
+    @property
+    def reason(self) -> str:
+        return self.__response.reason
+
+    @property
+    def headers(self):
+        return self.__response.headers
+
+    def read(self, size: Optional[int] = None) -> bytes:
+        return self.__response.read(size)
+
+    def close(self) -> None:
+        if self.__connection is None:
+            return
+        if self.__response.isclosed() and not self.__response.will_close:
+            self.__client.release(self.__key, self.__connection)
+        else:
+            self.__response.close()
+            self.__connection.close()
+        self.__connection = None
+
+    def __enter__(self) -> "Response":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+class HttpClient:
+    __idle: Dict[ConnectionKey, List[http.client.HTTPConnection]]
+    __redirects: Dict[str, str]
+
+    def __init__(self, timeout: float = TIMEOUT):
+        """
+        Minimal HTTP client which keeps connections open per host and remembers where
+        urls redirected to, so repeated downloads from a server skip the handshakes
+        :param timeout: timeout in seconds for connecting and for each read
+        """
+        self.timeout = timeout
+        self.__idle = {}
+        self.__redirects = {}
+        self.__lock = threading.Lock()
+        self.__ssl_context: Optional[ssl.SSLContext] = None
+
+    def open(self, url: str, headers: Optional[Dict[str, str]] = None):
+        """
+        Sends a GET request and follows redirects, through the proxy set with
+        http_proxy or https_proxy unless no_proxy excludes the host
+        :param url: url to request
+        :param headers: extra request headers
+        :return: the response, which should be closed after reading it
+        :raises HttpError: if the final response is not successful
+        """
+        if urlsplit(url).scheme not in ["http", "https"]:
+            # Local repositories using file:// urls don't need connections
+            return urllib.request.urlopen(url, timeout=self.timeout)
+        proxy = get_proxy(url)
+        if proxy:
+            return self.__open_with_proxy(url, proxy, headers or {})
+        return self.__open_direct(url, headers or {})
+
+    def __open_direct(self, url: str, headers: Dict[str, str]) -> Response:
+        redirect = self.__redirects.get(url)
+        if redirect:
+            try:
+                return self.__follow(redirect, headers)
+            except HttpError as error:
+                # Other statuses like 304 and 416 are answers to the request itself
+                if error.status not in EXPIRED_STATUSES:
+                    raise
+                # The stored target expired, start from the original url
+                self.__redirects.pop(url, None)
+        return self.__follow(url, headers)
+
+    def __open_with_proxy(self, url: str, proxy: str, headers: Dict[str, str]):
+        """
+        Requests through a proxy are left to urllib, their connections aren't pooled
+        """
+        scheme = urlsplit(url).scheme
+        opener = urllib.request.build_opener(
+            urllib.request.ProxyHandler({scheme: proxy})
+        )
+        request = urllib.request.Request(url, headers=headers)
+        try:
+            return opener.open(request, timeout=self.timeout)
+        except urllib.error.HTTPError as error:
+            error.close()
+            raise HttpError(url, error.code, str(error.reason))
+
+    def __follow(self, url: str, headers: Dict[str, str]) -> Response:
+        target = url
+        for _ in range(MAX_REDIRECTS + 1):
+            response = self.__request(target, headers)
+            if response.status not in REDIRECT_STATUSES:
+                break
+            location = response.headers.get("Location")
+            if not location:
+                break
+            response.read()
+            response.close()
+            target = urljoin(target, location)
+        else:
+            raise HttpError(url, response.status, "Too many redirects")
+
+        if target != url:
+            self.__redirects[url] = target
+        if response.status >= 300:
+            response.close()
+            raise HttpError(target, response.status, response.reason)
+        return response
+
+    def __request(self, url: str, headers: Dict[str, str]) -> Response:
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.netloc)
+        path = parts.path or "/"
+        if parts.query:
+            path = f"{path}?{parts.query}"
+
+        while True:
+            connection, reused = self.__acquire(key)
+            response = send_request(connection, reused, path, headers)
+            if response:
+                return Response(self, key, connection, response)
+
+    def __acquire(self, key: ConnectionKey) -> Tuple[http.client.HTTPConnection, bool]:
+        with self.__lock:
+            idle = self.__idle.get(key)
+            if idle:
+                return idle.pop(), True
+
+        scheme, host = key
+        if scheme == "https":
+            if self.__ssl_context is None:
+                # Loading the certificates is slow, only do it when https is used
+                self.__ssl_context = ssl.create_default_context()
+            connection = http.client.HTTPSConnection(
+                host, timeout=self.timeout, context=self.__ssl_context
+            )
+        else:
+            connection = http.client.HTTPConnection(host, timeout=self.timeout)
+        return connection, False
+
+    def release(self, key: ConnectionKey, connection: http.client.HTTPConnection):
+        with self.__lock:
+            idle = self.__idle.setdefault(key, [])
+            if len(idle) < MAX_IDLE_CONNECTIONS:
+                idle.append(connection)
+                return
+        connection.close()
+
+    def close(self) -> None:
+        with self.__lock:
+            for idle in self.__idle.values():
+                for connection in idle:
+                    connection.close()
+            self.__idle = {}
+
+
+def get_proxy(url: str) -> Optional[str]:
+    """
+    Returns the proxy set for a url with http_proxy, https_proxy and no_proxy
+    """
+    parts = urlsplit(url)
+    proxy = urllib.request.getproxies().get(parts.scheme)
+    if not proxy or urllib.request.proxy_bypass(parts.hostname or ""):
+        return None
+    return proxy
+
+
+def send_request(
+    connection: http.client.HTTPConnection,
+    reused: bool,
+    path: str,
+    headers: Dict[str, str],
+) -> Optional[http.client.HTTPResponse]:
+    """
+    Sends a GET request over a connection
+    :return: the response or None if a reused connection was closed by the server
+    """
+    try:
+        connection.request("GET", path, headers=headers)
+        return connection.getresponse()
+    except (http.client.RemoteDisconnected, ConnectionError):
+        connection.close()
+        # The server may have closed an idle connection, the caller retries
+        if not reused:
+            raise
+        return None
+    except BaseException:
+        connection.close()
+        raise
+
+
+default_client = HttpClient()
+
+
+def open_url(url: str, headers: Optional[Dict[str, str]] = None):
+    """
+    Opens a url with the shared client, which is used for all requests of boxman
+    """
+    return default_client.open(url, headers)
@@ -1,21 +1,31 @@
 import os
 import re
 import shutil
-from typing import List, Optional
+from typing import Dict, Iterator, Optional
 
-from boxman import Config
+from boxman.base_local_database import BaseLocalDatabase
+from boxman.config import Config
 from boxman.constants import ALPM_DB_VERSION
 from boxman.desc import Desc
+from boxman.file_index import FileIndex
 from boxman.files import Files
-from boxman.version import Version
+from boxman.timings import span
 
 
-class LocalDatabase:
+PACKAGE_DIRECTORY_PATTERN = re.compile(r"[\w\-._]+-[\w.]+-\d+")
+
+
+class LocalDatabase(BaseLocalDatabase):
     __local_directory: str
-    config: Config
+    __packages: Optional[Dict[str, str]]
+    __file_index: FileIndex
+    __file_index_checked: bool
 
     def __init__(self, config: Config):
-        self.config = config
+        """
+        Local database in the ALPM layout, which pacman can read as well
+        """
+        super().__init__(config)
         self.__local_directory = os.path.join(config.options.db_path, "local")
         if not os.path.isdir(self.__local_directory):
             os.makedirs(self.__local_directory)
@@ -23,56 +33,46 @@ class LocalDatabase:
                 os.path.join(self.__local_directory, "ALPM_DB_VERSION"), "w"
             ) as db_version_file:
                 db_version_file.write(ALPM_DB_VERSION)
-
-    def get_installed_packages(self) -> List[str]:
-        packages = []
-        for package_directory in self.get_package_directories():
-            packages.append(package_directory.rsplit("-", 2)[0])
+        self.__packages = None
+        self.__file_index = FileIndex(os.path.join(config.options.db_path, "files.idx"))
+        self.__file_index_checked = False
+
+    @property
+    def packages(self) -> Dict[str, str]:
+        """
+        Directory in the local database per installed package, loaded once per process
+        """
+        if self.__packages is None:
+            with span("local database read"):
+                self.__packages = self.__scan_packages()
+        return self.__packages
+
+    def __scan_packages(self) -> Dict[str, str]:
+        packages = {}
+        with os.scandir(self.__local_directory) as entries:
+            for entry in entries:
+                if entry.is_dir() and PACKAGE_DIRECTORY_PATTERN.match(entry.name):
+                    packages[entry.name.rsplit("-", 2)[0]] = entry.name
         return packages
 
-    def get_installed_files(
-        self, package: Optional[str] = None
-    ) -> Optional[List[Files]]:
-        if package:
-            return [self.get_package_files(package)]
-
-        files = []
-        for package in self.get_installed_packages():
-            files.append(self.get_package_files(package))
-
-        return files
-
-    def get_desc_list(self) -> List[Desc]:
-        result = []
+    @property
+    def file_index(self) -> FileIndex:
+        """
+        Index of the owner of each installed file, rebuilt from the local database if
+        it is missing
+        """
+        if not self.__file_index_checked:
+            if not self.__file_index.exists():
+                with span("file index rebuild"):
+                    self.__file_index.rebuild(self.get_installed_files())
+            self.__file_index_checked = True
+        return self.__file_index
+
+    def get_desc_list(self) -> Iterator[Desc]:
         for member in self.get_package_directories():
             full_path = os.path.join(self.__local_directory, member, "desc")
             with open(full_path, "r") as desc_file:
-                result.append(Desc(desc_file.read(), "local"))
-        return result
-
-    def get_package_directories(self) -> List[str]:
-        package_directories = []
-        for member in os.listdir(self.__local_directory):
-            if os.path.isdir(os.path.join(self.__local_directory, member)) and re.match(
-                r"[\w\-._]+-[\w.]+-\d+", member
-            ):
-                package_directories.append(member)
-
-        return package_directories
-
-    def get_package_directory(self, package: str) -> Optional[str]:
-        for member in self.get_package_directories():
-            if re.match(rf"^{package}-[\w.]+-\d+$", member):
-                return member
-        return None
-
-    def get_package_version(self, package: str) -> Optional[Version]:
-        package_directory = self.get_package_directory(package)
-        if package_directory:
-            name, version, rel = package_directory.rsplit("-", 2)
-            if name == package:
-                return Version(f"{version}-{rel}")
-        return None
+                yield Desc(desc_file.read(), "local")
 
     def get_package_desc(self, package: str) -> Optional[Desc]:
         package_directory = self.get_package_directory(package)
@@ -96,20 +96,25 @@ class LocalDatabase:
     def remove_package(self, package: str) -> bool:
         package_directory = self.get_package_directory(package)
         if package_directory:
-            shutil.rmtree(package_directory)
+            shutil.rmtree(os.path.join(self.__local_directory, package_directory))
+            del self.__packages[package]
+            if self.__file_index.exists():
+                self.__file_index.remove_package(package)
             return True
         return False
 
-    def install(
-        self, desc: Desc, files: Files, installed_explicitly: bool = True
+    def write_package(
+        self, package: str, directory_name: str, desc: str, files: Files
     ) -> None:
-        package_directory = os.path.join(
-            self.__local_directory, f"{desc.name}-{desc.version}"
-        )
+        package_directory = os.path.join(self.__local_directory, directory_name)
         if not os.path.isdir(package_directory):
             os.makedirs(package_directory)
-        desc.convert_to_local(installed_explicitly)
         with open(os.path.join(package_directory, "desc"), "w") as desc_file:
-            desc_file.write(repr(desc))
+            desc_file.write(desc)
         with open(os.path.join(package_directory, "files"), "w") as files_file:
             files_file.write(repr(files))
+        if self.__packages is not None:
+            self.__packages[package] = directory_name
+        # A missing index is rebuilt from the local database when it is needed
+        if self.__file_index.exists():
+            self.__file_index.add_package(package, files.get_paths())
@@ -0,0 +1,14 @@
+from boxman.base_local_database import BaseLocalDatabase
+from boxman.config import Config
+from boxman.data.local_db_backend import LocalDBBackend
+from boxman.local_database import LocalDatabase
+from boxman.sqlite_local_database import SqliteLocalDatabase
+
+
+def create_local_database(config: Config) -> BaseLocalDatabase:
+    """
+    Creates the local database for the backend set with LocalDBBackend
+    """
+    if config.options.local_db_backend == LocalDBBackend.SQLITE:
+        return SqliteLocalDatabase(config)
+    return LocalDatabase(config)
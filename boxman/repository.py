@@ -6,6 +6,7 @@ class Repository:
     __name: str
     __url: str
     __path: str
+    __index_path: str
     __dir: str
 
     def __init__(self, name: str, server: str, db_path: str):
@@ -17,6 +18,7 @@ class Repository:
 
         self.__url = urljoin(server, f"{name}.db")
         self.__path = os.path.join(self.__dir, f"{name}.db")
+        self.__index_path = os.path.join(self.__dir, f"{name}.idx")
 
     @property
     def name(self) -> str:
@@ -30,6 +32,10 @@ class Repository:
     def path(self) -> str:
         return self.__path
 
+    @property
+    def index_path(self) -> str:
+        return self.__index_path
+
     @property
     def dir(self) -> str:
         return self.__dir
@@ -0,0 +1,63 @@
+import re
+from typing import List, Optional, Pattern, Set
+
+from boxman.desc import Desc, get_dependency_name
+
+# Rank of a search result, lower ranks are shown first
+EXACT = 0
+PREFIX = 1
+SUBSTRING = 2
+DESCRIPTION = 3
+
+
+def get_trigrams(text: str) -> Set[str]:
+    """
+    Returns every sequence of three characters in the lower case text
+    """
+    text = text.lower()
+    return {text[i : i + 3] for i in range(len(text) - 2)}  # noqa: E203
+
+
+def get_search_fields(content: bytes) -> str:
+    """
+    Returns the searchable fields of a desc other than the name, one per line
+    :param content: content of the desc file
+    """
+    desc = Desc(content, "")
+    fields: List[str] = []
+    fields.extend(get_dependency_name(value) for value in desc.get_values("PROVIDES"))
+    fields.extend(desc.get_values("GROUPS"))
+    fields.extend(desc.get_values("DESC"))
+    return "\n".join(fields)
+
+
+def compile_query(query: str, regex: bool = False, ignore_case: bool = False):
+    """
+    Compiles a search query to a pattern
+    :param query: the search string
+    :param regex: treat the query as a regular expression instead of a literal string
+    :param ignore_case: match regardless of case
+    :raises re.error: if the regular expression is invalid
+    """
+    if not regex:
+        query = re.escape(query)
+    return re.compile(query, re.IGNORECASE if ignore_case else 0)
+
+
+def get_rank(pattern: Pattern, name: str, fields: str) -> Optional[int]:
+    """
+    Ranks how well a package matches a search pattern
+    :param pattern: compiled search query
+    :param name: name of the package
+    :param fields: other searchable fields of the package
+    :return: rank of the match or None if the package does not match
+    """
+    if pattern.fullmatch(name):
+        return EXACT
+    if pattern.match(name):
+        return PREFIX
+    if pattern.search(name):
+        return SUBSTRING
+    if pattern.search(fields):
+        return DESCRIPTION
+    return None
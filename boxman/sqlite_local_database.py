@@ -0,0 +1,161 @@
+import copy
+import os
+import sqlite3
+from typing import Dict, Iterator, List, Optional
+
+from boxman.base_local_database import BaseLocalDatabase
+from boxman.config import Config
+from boxman.desc import Desc
+from boxman.file_index import FileIndex
+from boxman.files import Files
+from boxman.local_database import LocalDatabase
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS packages ("
+    "name TEXT PRIMARY KEY, directory TEXT NOT NULL, desc TEXT NOT NULL);"
+    # Paths are stored without a trailing slash, so they can be used as file index
+    "CREATE TABLE IF NOT EXISTS files ("
+    "path TEXT NOT NULL, package TEXT NOT NULL, suffix TEXT NOT NULL DEFAULT '', "
+    "PRIMARY KEY (path, package));"
+    "CREATE INDEX IF NOT EXISTS files_package ON files (package);"
+)
+
+
+class SqliteLocalDatabase(BaseLocalDatabase):
+    __database_path: str
+    __connection: sqlite3.Connection
+    __packages: Optional[Dict[str, str]]
+    __file_index: Optional[FileIndex]
+
+    def __init__(self, config: Config):
+        """
+        Local database which stores the installed packages in a single SQLite file
+        The packages of the ALPM local directory are imported when the file is created
+        """
+        super().__init__(config)
+        self.__database_path = os.path.join(config.options.db_path, "local.sqlite")
+        is_new = not os.path.isfile(self.__database_path)
+        if not os.path.isdir(config.options.db_path):
+            os.makedirs(config.options.db_path)
+        self.__connection = sqlite3.connect(self.__database_path)
+        self.__connection.executescript(SCHEMA)
+        self.__packages = None
+        self.__file_index = None
+        if is_new and os.path.isdir(os.path.join(config.options.db_path, "local")):
+            self.import_alpm()
+
+    def close(self) -> None:
+        if self.__file_index:
+            self.__file_index.close()
+        self.__connection.close()
+
+    @property
+    def packages(self) -> Dict[str, str]:
+        if self.__packages is None:
+            self.__packages = dict(
+                self.__connection.execute("SELECT name, directory FROM packages")
+            )
+        return self.__packages
+
+    @property
+    def file_index(self) -> FileIndex:
+        """
+        The files table has the layout of a file index and is always up to date
+        """
+        if self.__file_index is None:
+            self.__file_index = FileIndex(self.__database_path, shared=True)
+        return self.__file_index
+
+    def get_desc_list(self) -> Iterator[Desc]:
+        rows = self.__connection.execute("SELECT desc FROM packages ORDER BY name")
+        for (desc,) in rows:
+            yield Desc(desc, "local")
+
+    def get_package_desc(self, package: str) -> Optional[Desc]:
+        row = self.__connection.execute(
+            "SELECT desc FROM packages WHERE name = ?", (package,)
+        ).fetchone()
+        if row:
+            return Desc(row[0], "local")
+        return None
+
+    def get_package_files(self, package: str) -> Optional[Files]:
+        if package not in self.packages:
+            return None
+        rows = self.__connection.execute(
+            "SELECT path || suffix FROM files WHERE package = ? ORDER BY rowid",
+            (package,),
+        )
+        paths = [path for (path,) in rows]
+        return Files(
+            package,
+            self.config.options.root_dir,
+            content="\n".join(["%FILES%"] + paths),
+        )
+
+    def remove_package(self, package: str) -> bool:
+        if package not in self.packages:
+            return False
+        with self.__connection:
+            self.__delete(package)
+        del self.__packages[package]
+        return True
+
+    def write_package(
+        self, package: str, directory_name: str, desc: str, files: Files
+    ) -> None:
+        with self.__connection:
+            self.__store(package, directory_name, desc, files.get_paths())
+        if self.__packages is not None:
+            self.__packages[package] = directory_name
+
+    def __store(
+        self, package: str, directory_name: str, desc: str, paths: List[str]
+    ) -> None:
+        self.__delete(package)
+        self.__connection.execute(
+            "INSERT INTO packages (name, directory, desc) VALUES (?, ?, ?)",
+            (package, directory_name, desc),
+        )
+        self.__connection.executemany(
+            "INSERT OR IGNORE INTO files (path, package, suffix) VALUES (?, ?, ?)",
+            (
+                (path.rstrip("/"), package, "/" if path.endswith("/") else "")
+                for path in paths
+            ),
+        )
+
+    def __delete(self, package: str) -> None:
+        self.__connection.execute("DELETE FROM packages WHERE name = ?", (package,))
+        self.__connection.execute("DELETE FROM files WHERE package = ?", (package,))
+
+    def import_alpm(self) -> None:
+        """
+        Replaces the content of the database with the packages in the ALPM layout
+        """
+        alpm = LocalDatabase(self.config)
+        with self.__connection:
+            self.__connection.execute("DELETE FROM packages")
+            self.__connection.execute("DELETE FROM files")
+            for package, directory in alpm.packages.items():
+                desc = alpm.get_package_desc(package)
+                files = alpm.get_package_files(package)
+                self.__store(package, directory, repr(desc), files.get_paths())
+        self.__packages = None
+
+    def export_alpm(self) -> None:
+        """
+        Writes the installed packages to the ALPM layout, so pacman can read them
+        """
+        alpm = LocalDatabase(self.config)
+        for package, directory in copy.copy(alpm.packages).items():
+            if self.packages.get(package) != directory:
+                alpm.remove_package(package)
+
+        rows = self.__connection.execute(
+            "SELECT name, directory, desc FROM packages"
+        ).fetchall()
+        for package, directory, desc in rows:
+            alpm.write_package(
+                package, directory, desc, self.get_package_files(package)
+            )
@@ -0,0 +1,105 @@
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Iterator
+
+# Returned while timings are disabled, so a span costs a single attribute check
+DISABLED_SPAN = nullcontext()
+
+
+class Span:
+    def __init__(self, timings: "Timings", name: str):
+        self.__timings = timings
+        self.__name = name
+        self.__start = 0.0
+
+    def __enter__(self) -> "Span":
+        self.__start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.__timings.add(self.__name, time.perf_counter() - self.__start)
+
+
+class Timings:
+    __totals: Dict[str, Dict[str, float]]
+
+    def __init__(self):
+        """
+        Collects the time spent per phase, spans with the same name are added up
+        Spans can be nested and downloads run in parallel, so the phases can add up
+        to more than the total
+        """
+        self.enabled = False
+        self.__totals = {}
+        self.__lock = threading.Lock()
+        self.__started = 0.0
+
+    def enable(self) -> None:
+        self.enabled = True
+        self.__started = time.perf_counter()
+
+    def span(self, name: str):
+        if not self.enabled:
+            return DISABLED_SPAN
+        return Span(self, name)
+
+    def add(self, name: str, duration: float) -> None:
+        with self.__lock:
+            total = self.__totals.setdefault(name, {"calls": 0, "seconds": 0.0})
+            total["calls"] += 1
+            total["seconds"] += duration
+
+    def get_results(self) -> Dict:
+        with self.__lock:
+            phases = {name: dict(total) for name, total in self.__totals.items()}
+        return {"total": time.perf_counter() - self.__started, "phases": phases}
+
+    def format(self) -> str:
+        results = self.get_results()
+        total = results["total"]
+        lines = ["Timings:"]
+        phases = sorted(results["phases"].items(), key=lambda item: -item[1]["seconds"])
+        for name, phase in phases:
+            share = phase["seconds"] / total * 100 if total else 0.0
+            lines.append(
+                f"  {name:<24} {phase['calls']:>6} calls "
+                f"{phase['seconds']:>9.3f}s {share:>6.1f}%"
+            )
+        lines.append(f"  {'total':<24} {'':>12} {total:>9.3f}s")
+        return "\n".join(lines)
+
+    def write_json(self, path: str) -> None:
+        import json
+
+        with open(path, "w") as timings_file:
+            json.dump(self.get_results(), timings_file, indent=2)
+
+
+timings = Timings()
+
+
+def span(name: str):
+    """
+    Times a block of code as part of a phase when timings are enabled
+    :param name: name of the phase, reported once with the times of all its spans
+    """
+    return timings.span(name)
+
+
+@contextmanager
+def profile(path: str) -> Iterator[None]:
+    """
+    Runs a block of code with cProfile and writes the stats to a file
+    The stats can be read with python -m pstats or tools like snakeviz
+    """
+    # Only imported when profiling, as every command imports this module
+    import cProfile
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
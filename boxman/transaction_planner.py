@@ -0,0 +1,136 @@
+from typing import Callable, Dict, List, Optional, Set
+
+from boxman.data.transaction import Action, Step, Transaction
+from boxman.desc import Desc, get_dependency_name
+from boxman.base_local_database import BaseLocalDatabase
+
+
+class TransactionPlanner:
+    __visited: Set[str]
+    __sync_descs: Dict[str, Optional[Desc]]
+    __local_descs: Dict[str, Optional[Desc]]
+
+    def __init__(
+        self,
+        get_sync_desc: Callable[[str], Optional[Desc]],
+        local_database: BaseLocalDatabase,
+    ):
+        """
+        Resolves the full set of packages a transaction touches before anything is
+        changed on disk. Package lookups are memoized for the lifetime of the planner,
+        so a planner should be used for a single transaction.
+        :param get_sync_desc: function which finds the newest desc of a package
+        :param local_database: database of the installed packages
+        """
+        self.__get_sync_desc = get_sync_desc
+        self.local_database = local_database
+        self.__visited = set()
+        self.__sync_descs = {}
+        self.__local_descs = {}
+
+    def get_sync_desc(self, package: str) -> Optional[Desc]:
+        if package not in self.__sync_descs:
+            self.__sync_descs[package] = self.__get_sync_desc(package)
+        return self.__sync_descs[package]
+
+    def get_local_desc(self, package: str) -> Optional[Desc]:
+        if package not in self.__local_descs:
+            self.__local_descs[package] = self.local_database.get_package_desc(package)
+        return self.__local_descs[package]
+
+    def plan_install(self, packages: List[str]) -> Optional[Transaction]:
+        """
+        Plans the installation or upgrade of packages and their missing dependencies
+        :param packages: names of the packages to install
+        :return: transaction with dependencies ordered before their dependents,
+                 None if a package could not be found
+        """
+        transaction = Transaction()
+        for package in packages:
+            if not self.__add_install(package, True, transaction, []):
+                return None
+        return transaction
+
+    def __add_install(
+        self,
+        package: str,
+        installed_explicitly: bool,
+        transaction: Transaction,
+        path: List[str],
+    ) -> bool:
+        if package in path:
+            cycle = " -> ".join(path[path.index(package) :] + [package])  # noqa: E203
+            print(f"warning: dependency cycle detected: {cycle}")
+            return True
+        if package in self.__visited:
+            return True
+        self.__visited.add(package)
+
+        desc = self.get_sync_desc(package)
+        if not desc:
+            print(f"Failed to find package {package}")
+            return False
+
+        step = self.__create_install_step(package, desc, installed_explicitly)
+        if not step:
+            return True
+        if not self.__add_dependencies(desc, transaction, path + [package]):
+            return False
+        transaction.steps.append(step)
+        return True
+
+    def __create_install_step(
+        self, package: str, desc: Desc, installed_explicitly: bool
+    ) -> Optional[Step]:
+        local_desc = self.get_local_desc(package)
+        if not local_desc:
+            return Step(Action.INSTALL, package, desc, installed_explicitly)
+
+        if not desc.version > local_desc.version:
+            print(f"Package {package} is already installed, skipping")
+            return None
+        return Step(
+            Action.UPGRADE, package, desc, not local_desc.installed_as_dependency
+        )
+
+    def __add_dependencies(
+        self, desc: Desc, transaction: Transaction, path: List[str]
+    ) -> bool:
+        for dependency in desc.dependencies:
+            name = get_dependency_name(dependency)
+            if self.get_local_desc(name):
+                continue
+            if not self.__add_install(name, False, transaction, path):
+                print(f"Failed to install dependency {name}")
+                return False
+        return True
+
+    def plan_remove(self, packages: List[str]) -> Optional[Transaction]:
+        """
+        Plans the removal of installed packages
+        :param packages: names of the packages to remove
+        :return: transaction with dependents ordered before their dependencies,
+                 None if a package is not installed
+        """
+        for package in packages:
+            if not self.get_local_desc(package):
+                print(
+                    f"The package {package} is not installed and could not be removed"
+                )
+                return None
+
+        ordered: List[str] = []
+        for package in packages:
+            self.__add_remove(package, set(packages), ordered)
+        ordered.reverse()
+        return Transaction([Step(Action.REMOVE, package) for package in ordered])
+
+    def __add_remove(self, package: str, packages: Set[str], ordered: List[str]):
+        if package in self.__visited:
+            return
+        self.__visited.add(package)
+        for dependency in self.get_local_desc(package).dependencies:
+            name = get_dependency_name(dependency)
+            if name in packages:
+                self.__add_remove(name, packages, ordered)
+        ordered.append(package)
@@ -0,0 +1,115 @@
+import os
+import sqlite3
+import threading
+from typing import Optional, Tuple
+
+from boxman.checksums import Checksums
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS verified ("
+    "path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, "
+    "inode INTEGER NOT NULL, md5 TEXT NOT NULL, sha256 TEXT NOT NULL)"
+)
+
+FileStat = Tuple[int, int, int]
+
+
+class VerificationLedger:
+    __connection: Optional[sqlite3.Connection]
+
+    def __init__(self, ledger_path: str):
+        """
+        Remembers the checksums of archives which were already hashed, together with
+        their size, modification time and inode. An archive whose stat still matches
+        doesn't have to be hashed again.
+        :param ledger_path: path to the ledger file
+        """
+        self.__ledger_path = ledger_path
+        self.__connection = None
+        # Archives are downloaded and verified from multiple threads
+        self.__lock = threading.Lock()
+
+    def __connect(self) -> sqlite3.Connection:
+        if self.__connection is None:
+            self.__connection = sqlite3.connect(
+                self.__ledger_path, check_same_thread=False
+            )
+            self.__connection.execute(SCHEMA)
+        return self.__connection
+
+    def close(self) -> None:
+        with self.__lock:
+            if self.__connection is not None:
+                self.__connection.close()
+                self.__connection = None
+
+    def is_verified(
+        self, path: str, md5_checksum: Optional[str], sha256_checksum: Optional[str]
+    ) -> bool:
+        """
+        Checks whether an unchanged archive was verified with the given checksums
+        :return: False if the archive was never verified or changed since then
+        """
+        checksums = self.get_checksums(path)
+        if checksums is None:
+            return False
+        md5, sha256 = checksums
+        if md5_checksum and md5 != md5_checksum:
+            return False
+        if sha256_checksum and sha256 != sha256_checksum:
+            return False
+        return True
+
+    def get_checksums(self, path: str) -> Optional[Tuple[str, str]]:
+        """
+        :return: MD5 and SHA-256 checksums of an archive if it didn't change since
+        they were recorded
+        """
+        stat = get_stat(path)
+        if stat is None or not os.path.isfile(self.__ledger_path):
+            return None
+        with self.__lock:
+            row = (
+                self.__connect()
+                .execute(
+                    "SELECT size, mtime_ns, inode, md5, sha256 FROM verified "
+                    "WHERE path = ?",
+                    (path,),
+                )
+                .fetchone()
+            )
+        if not row or tuple(row[:3]) != stat:
+            return None
+        return row[3], row[4]
+
+    def record(self, path: str, checksums: Checksums) -> None:
+        """
+        Stores the checksums of an archive which was just hashed
+        """
+        stat = get_stat(path)
+        if stat is None:
+            return
+        with self.__lock:
+            connection = self.__connect()
+            connection.execute(
+                "INSERT OR REPLACE INTO verified "
+                "(path, size, mtime_ns, inode, md5, sha256) VALUES (?, ?, ?, ?, ?, ?)",
+                (path,) + stat + (checksums.md5, checksums.sha256),
+            )
+            connection.commit()
+
+    def forget(self, path: str) -> None:
+        if not os.path.isfile(self.__ledger_path):
+            return
+        with self.__lock:
+            connection = self.__connect()
+            connection.execute("DELETE FROM verified WHERE path = ?", (path,))
+            connection.commit()
+
+
+def get_stat(path: str) -> Optional[FileStat]:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_size, stat.st_mtime_ns, stat.st_ino
@@ -1,66 +1,107 @@
 import re
-from typing import List
+from functools import lru_cache, total_ordering
+from typing import Tuple
 
+SEGMENT_PATTERN = re.compile(r"([^a-zA-Z\d]*)(?:(\d+)|([a-zA-Z]+))")
 
+# Rank of each kind of segment, compared before the segment values. The end of a
+# version is newer than a trailing alpha segment ("1.0" > "1.0a") unless that
+# segment is preceded by a separator ("1.0" < "1.0.a"), as in alpm's vercmp.
+ALPHA = 0
+END = 1
+SEPARATED_ALPHA = 2
+NUMERIC = 3
+
+SegmentKey = Tuple[Tuple[int, int, str], ...]
+VersionKey = Tuple[int, SegmentKey, SegmentKey]
+# Release key of a version without release, like alpm's vercmp a release is only
+# compared when both versions have one
+NO_RELEASE: SegmentKey = ()
+
+
+@lru_cache(maxsize=None)
+def get_segment_key(version: str) -> SegmentKey:
+    key = []
+    for separator, numeric, alpha in SEGMENT_PATTERN.findall(version):
+        if numeric:
+            key.append((NUMERIC, int(numeric), ""))
+        elif separator:
+            key.append((SEPARATED_ALPHA, 0, alpha))
+        else:
+            key.append((ALPHA, 0, alpha))
+    key.append((END, 0, ""))
+    return tuple(key)
+
+
+@lru_cache(maxsize=None)
+def get_version_key(version: str) -> VersionKey:
+    """
+    Returns a key which sorts versions in the same order as alpm's vercmp
+    :param version: version in the "epoch:version-release" format, where only the
+                    version is required
+    :return: tuple of the epoch, version segments and release segments
+    The key sorts a version without release before the same version with one, while
+    Version compares them as equal. Sorting by the key only matches vercmp for
+    versions which either all have a release or all don't.
+    """
+    epoch = 0
+    if ":" in version:
+        epoch_string, version = version.split(":", 1)
+        if epoch_string.isdecimal():
+            epoch = int(epoch_string)
+
+    if "-" not in version:
+        return epoch, get_segment_key(version), NO_RELEASE
+    version, release = version.rsplit("-", 1)
+    return epoch, get_segment_key(version), get_segment_key(release)
+
+
+@total_ordering
 class Version:
+    __slots__ = ["version", "key"]
     version: str
-    version_parts: List[int]
+    key: VersionKey
 
     def __init__(self, version_string: str):
         self.version = version_string
+        self.key = get_version_key(version_string)
 
-        self.__generate_version_parts()
+    def __get_keys(self, other: "Version") -> Tuple[tuple, tuple]:
+        """
+        Returns the keys to compare, without the releases unless both have one
+        """
+        if self.key[2] == NO_RELEASE or other.key[2] == NO_RELEASE:
+            return self.key[:2], other.key[:2]
+        return self.key, other.key
 
-    def __generate_version_parts(self):
-        sanitized_version_string = ""
-        for letter in self.version.replace("-", "."):
-            if letter.isdecimal() or letter == ".":
-                sanitized_version_string += letter
-        if len(sanitized_version_string) == 0 or not re.match(
-            r"(\d+\.?)+", sanitized_version_string
-        ):
-            raise Exception("Cannot parse string")
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Version):
+            return NotImplemented
+        key, other_key = self.__get_keys(other)
+        return key == other_key
 
-        self.version_parts = []
-        for part in sanitized_version_string.split("."):
-            if len(part) > 0:
-                self.version_parts.append(int(part))
+    def __hash__(self) -> int:
+        # Versions which only differ in their release can be equal
+        return hash(self.key[:2])
 
     def __lt__(self, other) -> bool:
-        iterations = max(len(self.version_parts), len(other.version_parts))
-        for i in range(iterations):
-            if i == len(self.version_parts):
-                return True
-            elif i == len(other.version_parts):
-                return False
-            elif self.version_parts[i] == other.version_parts[i]:
-                continue
-            elif self.version_parts[i] < other.version_parts[i]:
-                return True
-            else:
-                return False
-        return False
-
-    def __gt__(self, other):
-        iterations = max(len(self.version_parts), len(other.version_parts))
-        for i in range(iterations):
-            if i == len(self.version_parts):
-                return False
-            elif i == len(other.version_parts):
-                return True
-            elif self.version_parts[i] == other.version_parts[i]:
-                continue
-            elif self.version_parts[i] > other.version_parts[i]:
-                return True
-            else:
-                return False
-        return False
+        key, other_key = self.__get_keys(other)
+        return key < other_key
+
+    def __gt__(self, other) -> bool:
+        key, other_key = self.__get_keys(other)
+        return key > other_key
 
     def __str__(self):
         return self.version
 
     def __repr__(self):
-        version_part_strings = []
-        for part in self.version_parts:
-            version_part_strings.append(str(part))
-        return ".".join(version_part_strings)
+        return f"Version({self.version!r})"
+
+
+@lru_cache(maxsize=None)
+def parse_version(version_string: str) -> Version:
+    """
+    Returns a shared Version instance for a version string
+    """
+    return Version(version_string)
@@ -0,0 +1,18 @@
+from unittest import TestCase
+from unittest.mock import patch, MagicMock
+
+from boxman.data.package import Package
+
+
+class TestPackage(TestCase):
+    def test_version(self):
+        package = Package("sdl2", "sdl2-2.25.0-3", "", "pspdev")
+        self.assertEqual("2.25.0-3", package.version)
+
+    @patch("boxman.data.package.Desc")
+    def test_desc_is_parsed_once(self, mock_desc: MagicMock):
+        package = Package("sdl2", "sdl2-2.25.0-3", "%NAME%\nsdl2\n", "pspdev")
+        mock_desc.assert_not_called()
+
+        self.assertEqual(package.desc, package.desc)
+        mock_desc.assert_called_once_with("%NAME%\nsdl2\n", "pspdev")
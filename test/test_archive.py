@@ -0,0 +1,140 @@
+import io
+import os
+import tarfile
+import tempfile
+from unittest import TestCase
+from typing import List
+from unittest.mock import MagicMock, patch
+
+from boxman.archive import extract_archive, get_target_path, list_archive_files
+from boxman.decompress import open_tar
+
+
+def add_file(archive: tarfile.TarFile, name: str, content: bytes, mode=0o644):
+    info = tarfile.TarInfo(name)
+    info.size = len(content)
+    info.mode = mode
+    archive.addfile(info, io.BytesIO(content))
+
+
+def add_entry(archive: tarfile.TarFile, name: str, entry_type, linkname=""):
+    info = tarfile.TarInfo(name)
+    info.type = entry_type
+    info.linkname = linkname
+    info.mode = 0o755
+    archive.addfile(info)
+
+
+def create_escaping_archive(directory: str) -> str:
+    """
+    Creates an archive which tries to write and link files outside of the root
+    directory through a symlink and hardlinks
+    """
+    outside = os.path.join(directory, "outside")
+    os.makedirs(outside)
+    with open(os.path.join(outside, "secret"), "wb") as secret:
+        secret.write(b"secret")
+    archive = os.path.join(directory, "evil-1.0-1-mips.pkg.tar.gz")
+    with tarfile.open(archive, "w:gz") as t:
+        add_entry(t, "usr", tarfile.DIRTYPE)
+        add_entry(t, "usr/lib", tarfile.SYMTYPE, outside)
+        add_file(t, "usr/lib/evil", b"evil")
+        add_entry(t, "usr/secret", tarfile.LNKTYPE, "../outside/secret")
+        add_entry(t, "usr/link", tarfile.LNKTYPE, "usr/lib/secret")
+    return archive
+
+
+def assert_not_escaped(
+    test: TestCase, directory: str, root_dir: str, files: List[str]
+) -> None:
+    test.assertEqual(["usr", "usr/lib"], files)
+    test.assertEqual(["secret"], os.listdir(os.path.join(directory, "outside")))
+    test.assertEqual(["lib"], os.listdir(os.path.join(root_dir, "usr")))
+
+
+class TestArchive(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root_dir = os.path.join(self.directory.name, "root")
+        self.archive = os.path.join(self.directory.name, "test-1.0-1-mips.pkg.tar.gz")
+        with tarfile.open(self.archive, "w:gz") as t:
+            add_file(t, ".PKGINFO", b"pkgname = test")
+            add_entry(t, "psp", tarfile.DIRTYPE)
+            add_entry(t, "psp/bin", tarfile.DIRTYPE)
+            add_file(t, "psp/bin/tool", b"#!/bin/sh", 0o755)
+            add_file(t, "psp/lib/libtest.a", b"library")
+            add_entry(t, "psp/lib/libalias.a", tarfile.SYMTYPE, "libtest.a")
+            add_entry(t, "psp/lib/libcopy.a", tarfile.LNKTYPE, "psp/lib/libtest.a")
+            add_file(t, "../escape", b"escape")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_extract_archive(self):
+        files = extract_archive(self.archive, self.root_dir)
+
+        self.assertEqual(
+            [
+                "psp",
+                "psp/bin",
+                "psp/bin/tool",
+                "psp/lib/libtest.a",
+                "psp/lib/libalias.a",
+                "psp/lib/libcopy.a",
+            ],
+            files,
+        )
+        self.assertFalse(os.path.exists(os.path.join(self.root_dir, ".PKGINFO")))
+        self.assertFalse(os.path.exists(os.path.join(self.directory.name, "escape")))
+
+        tool = os.path.join(self.root_dir, "psp", "bin", "tool")
+        self.assertTrue(os.access(tool, os.X_OK))
+        alias = os.path.join(self.root_dir, "psp", "lib", "libalias.a")
+        self.assertEqual("libtest.a", os.readlink(alias))
+        with open(os.path.join(self.root_dir, "psp", "lib", "libcopy.a"), "rb") as f:
+            self.assertEqual(b"library", f.read())
+
+    def test_extract_archive_stays_inside_root(self):
+        archive = create_escaping_archive(self.directory.name)
+        with patch("builtins.print"):
+            files = extract_archive(archive, self.root_dir)
+        assert_not_escaped(self, self.directory.name, self.root_dir, files)
+
+    def test_extract_archive_overwrites_files(self):
+        extract_archive(self.archive, self.root_dir)
+        files = extract_archive(self.archive, self.root_dir)
+
+        self.assertEqual(6, len(files))
+        with open(os.path.join(self.root_dir, "psp", "lib", "libalias.a"), "rb") as f:
+            self.assertEqual(b"library", f.read())
+
+    def test_extract_archive_opens_archive_once(self):
+        with patch("boxman.archive.open_tar", wraps=open_tar) as mock_open:
+            extract_archive(self.archive, self.root_dir)
+        mock_open.assert_called_once_with(self.archive)
+
+    def test_list_archive_files(self):
+        self.assertEqual(
+            [
+                "psp/bin/tool",
+                "psp/lib/libtest.a",
+                "psp/lib/libalias.a",
+                "psp/lib/libcopy.a",
+            ],
+            list_archive_files(self.archive),
+        )
+        self.assertFalse(os.path.exists(self.root_dir))
+
+    def test_get_target_path(self):
+        member = MagicMock()
+        member.name = member.path = "psp/lib/libtest.a"
+        self.assertEqual("/root/psp/lib/libtest.a", get_target_path("/root", member))
+
+        member.name = member.path = ".MTREE"
+        self.assertIsNone(get_target_path("/root", member))
+
+        member.name = member.path = "psp/../../etc/passwd"
+        self.assertIsNone(get_target_path("/root", member))
+
+        member.name = member.path = "/etc/passwd"
+        self.assertRaises(Exception, get_target_path, "/root", member)
@@ -36,6 +36,16 @@ class TestArgparser(TestCase):
         self.assertEqual(["test"], actual.arguments)
         self.assertEqual(Mode.SEARCH, actual.mode)
 
+    def test_search_options(self):
+        actual = parse_args(["search", "-i", "--regex", "^sdl"])
+        self.assertEqual(["^sdl"], actual.arguments)
+        self.assertTrue(actual.regex)
+        self.assertTrue(actual.ignore_case)
+
+        actual = parse_args(["search", "sdl"])
+        self.assertFalse(actual.regex)
+        self.assertFalse(actual.ignore_case)
+
     @patch("sys.exit")
     def test_search_multiple(self, mock_exit: MagicMock):
         parse_args(["search", "test1", "test2"])
@@ -96,6 +106,55 @@ class TestArgparser(TestCase):
         self.assertEqual(["test1", "test2"], actual.arguments)
         self.assertEqual(Mode.UPDATE, actual.mode)
 
+    def test_update_check(self):
+        actual = parse_args(["update", "--check", "test"])
+        self.assertEqual(["test"], actual.arguments)
+        self.assertTrue(actual.check)
+        self.assertFalse(parse_args(["update"]).check)
+
+    def test_sync(self):
+        actual = parse_args(["sync"])
+        self.assertEqual(None, actual.arguments)
+        self.assertEqual(Mode.SYNC, actual.mode)
+
+    def test_owns(self):
+        actual = parse_args(["owns", "psp/bin/tool"])
+        self.assertEqual(["psp/bin/tool"], actual.arguments)
+        self.assertEqual(Mode.OWNS, actual.mode)
+
+    def test_localdb(self):
+        actual = parse_args(["localdb", "export"])
+        self.assertEqual(["export"], actual.arguments)
+        self.assertEqual(Mode.LOCALDB, actual.mode)
+
+    def test_timings_and_profile(self):
+        actual = parse_args(["--timings", "--profile", "out.prof", "install", "sdl2"])
+        self.assertTrue(actual.timings)
+        self.assertIsNone(actual.timings_file)
+        self.assertEqual("out.prof", actual.profile)
+        self.assertEqual(["sdl2"], actual.arguments)
+
+        actual = parse_args(["--timings-file", "timings.json", "sync"])
+        self.assertTrue(actual.timings)
+        self.assertEqual("timings.json", actual.timings_file)
+
+        actual = parse_args(["sync"])
+        self.assertFalse(actual.timings)
+        self.assertIsNone(actual.profile)
+
+    def test_clean(self):
+        actual = parse_args(["clean"])
+        self.assertEqual(Mode.CLEAN, actual.mode)
+        self.assertFalse(actual.dry_run)
+        self.assertIsNone(actual.keep)
+
+        actual = parse_args(["clean", "--dry-run", "--keep", "2"])
+        self.assertTrue(actual.dry_run)
+        self.assertEqual(2, actual.keep)
+
+    def test_verify_cache(self):
+        self.assertEqual(Mode.VERIFY_CACHE, parse_args(["verify-cache"]).mode)
+
     @patch("sys.exit")
     def test_no_mode_set(self, mock_exit: MagicMock):
         parse_args([])
@@ -0,0 +1,166 @@
+import os
+import tempfile
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from boxman.cache_manager import CacheManager
+from boxman.checksums import calculate_checksums
+
+
+class TestCacheManager(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def add_archive(self, file_name: str, size: int, last_used: int) -> str:
+        path = os.path.join(self.directory.name, file_name)
+        with open(path, "wb") as archive:
+            archive.write(b"x" * size)
+        os.utime(path, (last_used, last_used))
+        return path
+
+    def get_file_names(self, entries) -> list:
+        return [entry.file_name for entry in entries]
+
+    def test_get_entries(self):
+        self.add_archive("sdl2-image-2.0.5-1-mips.pkg.tar.gz", 10, 100)
+        self.add_archive("sdl2-image-2.0.5-1-mips.pkg.tar.gz.part", 10, 100)
+        self.add_archive("notes.txt", 10, 100)
+
+        entries = CacheManager(self.directory.name).get_entries()
+        self.assertEqual(1, len(entries))
+        self.assertEqual("sdl2-image", entries[0].name)
+        self.assertEqual("2.0.5-1", str(entries[0].version))
+        self.assertEqual(10, entries[0].size)
+
+    def test_missing_directory(self):
+        cache_manager = CacheManager(os.path.join(self.directory.name, "missing"), 1)
+        self.assertEqual([], cache_manager.clean())
+
+    def test_keep_versions(self):
+        self.add_archive("sdl2-2.0.9-1-mips.pkg.tar.gz", 10, 300)
+        self.add_archive("sdl2-2.0.10-1-mips.pkg.tar.gz", 10, 100)
+        self.add_archive("sdl2-2.0.10-2-mips.pkg.tar.gz", 10, 200)
+        self.add_archive("pspgl-2020.1-1-mips.pkg.tar.gz", 10, 100)
+
+        cache_manager = CacheManager(self.directory.name, keep_versions=2)
+        self.assertEqual(
+            ["sdl2-2.0.9-1-mips.pkg.tar.gz"],
+            self.get_file_names(cache_manager.get_evictions()),
+        )
+        self.assertEqual(
+            ["sdl2-2.0.10-1-mips.pkg.tar.gz", "sdl2-2.0.9-1-mips.pkg.tar.gz"],
+            sorted(self.get_file_names(cache_manager.get_evictions(keep_versions=1))),
+        )
+
+    def test_max_size_evicts_least_recently_used(self):
+        self.add_archive("a-1.0-1-mips.pkg.tar.gz", 100, 300)
+        self.add_archive("b-1.0-1-mips.pkg.tar.gz", 100, 100)
+        self.add_archive("c-1.0-1-mips.pkg.tar.gz", 100, 200)
+
+        cache_manager = CacheManager(self.directory.name, max_size=150)
+        self.assertEqual(
+            ["b-1.0-1-mips.pkg.tar.gz", "c-1.0-1-mips.pkg.tar.gz"],
+            self.get_file_names(cache_manager.get_evictions()),
+        )
+
+    def test_stale_parts(self):
+        self.add_archive("a-1.0-1-mips.pkg.tar.gz", 100, 300)
+        self.add_archive("b-1.0-1-mips.pkg.tar.gz.part", 100, 100)
+        cache_manager = CacheManager(self.directory.name, max_size=150)
+        # Parts of downloads of the current transaction are kept for resuming
+        current = self.add_archive("c-1.0-1-mips.pkg.tar.gz.part", 100, 100)
+        os.utime(current, (cache_manager.started + 1, cache_manager.started + 1))
+
+        self.assertEqual(
+            ["b-1.0-1-mips.pkg.tar.gz.part"],
+            self.get_file_names(cache_manager.get_stale_parts()),
+        )
+        self.assertEqual(
+            ["b-1.0-1-mips.pkg.tar.gz.part"],
+            self.get_file_names(cache_manager.get_evictions()),
+        )
+        cache_manager.max_size = 0
+        self.assertEqual([], cache_manager.get_evictions())
+        self.assertEqual(
+            ["b-1.0-1-mips.pkg.tar.gz.part"],
+            self.get_file_names(cache_manager.clean(remove_parts=True)),
+        )
+        self.assertTrue(os.path.exists(current))
+
+    def test_mark_used(self):
+        path = self.add_archive("a-1.0-1-mips.pkg.tar.gz", 100, 100)
+        self.add_archive("b-1.0-1-mips.pkg.tar.gz", 100, 200)
+        cache_manager = CacheManager(self.directory.name, max_size=100)
+        cache_manager.mark_used(path)
+
+        self.assertEqual(100, os.stat(path).st_mtime)
+        self.assertEqual(
+            ["b-1.0-1-mips.pkg.tar.gz"],
+            self.get_file_names(cache_manager.get_evictions()),
+        )
+
+    def test_clean_dry_run(self):
+        path = self.add_archive("a-1.0-1-mips.pkg.tar.gz", 100, 100)
+        cache_manager = CacheManager(self.directory.name, max_size=50)
+
+        self.assertEqual(1, len(cache_manager.clean(dry_run=True)))
+        self.assertTrue(os.path.exists(path))
+        self.assertEqual(1, len(cache_manager.clean()))
+        self.assertFalse(os.path.exists(path))
+
+    def test_is_cached_only_hashes_once(self):
+        path = self.add_archive("a-1.0-1-mips.pkg.tar.gz", 100, 100)
+        checksums = calculate_checksums(path)
+        cache_manager = CacheManager(self.directory.name)
+
+        with patch(
+            "boxman.cache_manager.calculate_checksums", wraps=calculate_checksums
+        ) as mock_calculate:
+            for _ in range(3):
+                self.assertTrue(
+                    cache_manager.is_cached(path, checksums.md5, checksums.sha256)
+                )
+            mock_calculate.assert_called_once_with(path)
+            # Other checksums than the recorded ones are checked against the file
+            self.assertFalse(cache_manager.is_cached(path, checksums.md5, "0" * 64))
+            self.assertEqual(2, mock_calculate.call_count)
+
+    def test_get_sha256(self):
+        path = self.add_archive("a-1.0-1-mips.pkg.tar.gz", 100, 100)
+        cache_manager = CacheManager(self.directory.name)
+
+        with patch(
+            "boxman.cache_manager.calculate_checksums", wraps=calculate_checksums
+        ) as mock_calculate:
+            for _ in range(2):
+                self.assertEqual(
+                    calculate_checksums(path).sha256, cache_manager.get_sha256(path)
+                )
+            mock_calculate.assert_called_once_with(path)
+
+    def test_verify(self):
+        valid = self.add_archive("a-1.0-1-mips.pkg.tar.gz", 100, 100)
+        corrupt = self.add_archive("b-1.0-1-mips.pkg.tar.gz", 100, 100)
+        unknown = self.add_archive("c-1.0-1-mips.pkg.tar.gz", 100, 100)
+        checksums = calculate_checksums(valid)
+        descs = {}
+        for path in [valid, corrupt]:
+            descs[os.path.basename(path)] = MagicMock(
+                md5_checksum=checksums.md5, sha256_checksum=checksums.sha256
+            )
+        with open(corrupt, "ab") as archive:
+            archive.write(b"corrupt")
+
+        verified, corrupt_entries = CacheManager(self.directory.name).verify(
+            descs.get, workers=2
+        )
+        self.assertEqual(2, verified)
+        self.assertEqual(
+            ["b-1.0-1-mips.pkg.tar.gz"], self.get_file_names(corrupt_entries)
+        )
+        self.assertTrue(os.path.exists(valid))
+        self.assertFalse(os.path.exists(corrupt))
+        self.assertTrue(os.path.exists(unknown))
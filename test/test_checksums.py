@@ -0,0 +1,53 @@
+import os
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+from boxman.checksums import (
+    Checksums,
+    calculate_checksums,
+    calculate_sha256,
+    checksums_match,
+)
+
+CONTENT = b"boxman" * 100000
+
+
+class TestChecksums(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.directory.name, "test.pkg.tar.gz")
+        with open(self.file_path, "wb") as file:
+            file.write(CONTENT)
+        checksums = Checksums()
+        checksums.update(CONTENT)
+        self.md5 = checksums.md5
+        self.sha256 = checksums.sha256
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_update_in_chunks(self):
+        checksums = Checksums()
+        for start in range(0, len(CONTENT), 1000):
+            checksums.update(CONTENT[start : start + 1000])  # noqa: E203
+        self.assertEqual(self.md5, checksums.md5)
+        self.assertEqual(self.sha256, checksums.sha256)
+
+    def test_matches(self):
+        checksums = calculate_checksums(self.file_path)
+        self.assertTrue(checksums.matches(self.md5, self.sha256))
+        self.assertTrue(checksums.matches(None, self.sha256))
+        self.assertTrue(checksums.matches(self.md5, None))
+        self.assertFalse(checksums.matches("wrong", self.sha256))
+        self.assertFalse(checksums.matches(self.md5, "wrong"))
+
+    @patch("boxman.checksums.CHUNK_SIZE", new=4096)
+    def test_checksums_match_reads_in_chunks(self):
+        self.assertTrue(checksums_match(self.file_path, self.md5, self.sha256))
+
+    def test_checksums_match_missing_file(self):
+        self.assertFalse(checksums_match(self.file_path + ".missing", None, None))
+
+    def test_calculate_sha256(self):
+        self.assertEqual(self.sha256, calculate_sha256(self.file_path))
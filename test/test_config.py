@@ -2,7 +2,8 @@ import os
 from unittest import TestCase
 from unittest.mock import mock_open, patch, MagicMock
 
-from boxman.config import Config
+from boxman.config import Config, parse_size
+from boxman.data.local_db_backend import LocalDBBackend
 
 
 class TestConfig(TestCase):
@@ -128,8 +129,83 @@ class TestConfig(TestCase):
         self.assertEqual("/base/dir/var/cache/boxman", config.options.cache_dir)
         self.assertEqual("/base/dir/var/lib/boxman", config.options.db_path)
         self.assertEqual("/base/dir", config.options.root_dir)
+        self.assertEqual(5, config.options.parallel_downloads)
         self.assertEqual(0, len(config.repositories))
 
+    @patch("os.path.isfile")
+    @patch("__main__.__file__", new="/base/dir/boxman")
+    def test_init_parallel_downloads(self, mock_isfile: MagicMock):
+        mock_isfile.return_value = True
+        with patch(
+            "builtins.open", mock_open(read_data="[options]\nParallelDownloads = 8\n")
+        ):
+            config = Config()
+        self.assertEqual(8, config.options.parallel_downloads)
+
+        with patch(
+            "builtins.open", mock_open(read_data="[options]\nParallelDownloads = 0\n")
+        ):
+            config = Config()
+        self.assertEqual(5, config.options.parallel_downloads)
+
+    @patch("os.path.isfile")
+    @patch("__main__.__file__", new="/base/dir/boxman")
+    def test_init_local_db_backend(self, mock_isfile: MagicMock):
+        mock_isfile.return_value = True
+        with patch("builtins.open", mock_open(read_data="[options]\n")):
+            config = Config()
+        self.assertEqual(LocalDBBackend.ALPM, config.options.local_db_backend)
+
+        with patch(
+            "builtins.open", mock_open(read_data="[options]\nLocalDBBackend = SQLite\n")
+        ):
+            config = Config()
+        self.assertEqual(LocalDBBackend.SQLITE, config.options.local_db_backend)
+
+        with patch(
+            "builtins.open", mock_open(read_data="[options]\nLocalDBBackend = mysql\n")
+        ):
+            config = Config()
+        self.assertEqual(LocalDBBackend.ALPM, config.options.local_db_backend)
+
+    @patch("os.path.isfile")
+    @patch("__main__.__file__", new="/base/dir/boxman")
+    def test_init_cache_limits(self, mock_isfile: MagicMock):
+        mock_isfile.return_value = True
+        data = "[options]\nCacheMaxSize = 2G\nCacheKeepVersions = 3\n"
+        with patch("builtins.open", mock_open(read_data=data)):
+            config = Config()
+        self.assertEqual(2 * 1024**3, config.options.cache_max_size)
+        self.assertEqual(3, config.options.cache_keep_versions)
+
+        data = "[options]\nCacheMaxSize = 1.5G\nCacheKeepVersions = -1\n"
+        with patch("builtins.open", mock_open(read_data=data)):
+            config = Config()
+        self.assertEqual(0, config.options.cache_max_size)
+        self.assertEqual(0, config.options.cache_keep_versions)
+
+    @patch("os.path.isfile")
+    @patch("__main__.__file__", new="/base/dir/boxman")
+    def test_init_content_store(self, mock_isfile: MagicMock):
+        mock_isfile.return_value = True
+        with patch(
+            "builtins.open", mock_open(read_data="[options]\nContentStore = yes\n")
+        ):
+            config = Config()
+        self.assertTrue(config.options.content_store)
+
+        with patch(
+            "builtins.open", mock_open(read_data="[options]\nContentStore = 2\n")
+        ):
+            config = Config()
+        self.assertFalse(config.options.content_store)
+
+    def test_parse_size(self):
+        self.assertEqual(100, parse_size("100"))
+        self.assertEqual(500 * 1024**2, parse_size("500M"))
+        self.assertEqual(10 * 1024, parse_size("10KiB"))
+        self.assertIsNone(parse_size("large"))
+
     @patch("os.path.isfile")
     @patch("__main__.__file__", new="/base/dir/boxman")
     def test_get_relative_path(self, mock_isfile: MagicMock):
@@ -0,0 +1,142 @@
+import errno
+import os
+import tarfile
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+from boxman.archive import extract_archive, list_archive_files
+from boxman.checksums import calculate_sha256
+from boxman.content_store import ContentStore
+from boxman.decompress import open_tar
+from test.test_archive import (
+    add_entry,
+    add_file,
+    assert_not_escaped,
+    create_escaping_archive,
+)
+
+
+class TestContentStore(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = ContentStore(os.path.join(self.directory.name, "store"))
+        self.archive = os.path.join(self.directory.name, "test-1.0-1-mips.pkg.tar.gz")
+        with tarfile.open(self.archive, "w:gz") as t:
+            add_file(t, ".PKGINFO", b"pkgname = test")
+            add_entry(t, "psp", tarfile.DIRTYPE)
+            add_entry(t, "psp/bin", tarfile.DIRTYPE)
+            add_file(t, "psp/bin/tool", b"#!/bin/sh", 0o755)
+            add_file(t, "psp/lib/libtest.a", b"library")
+            add_file(t, "psp/lib/libsame.a", b"library")
+            add_entry(t, "psp/lib/libalias.a", tarfile.SYMTYPE, "libtest.a")
+            add_entry(t, "psp/lib/libcopy.a", tarfile.LNKTYPE, "psp/lib/libtest.a")
+            add_file(t, "../escape", b"escape")
+        self.sha256 = calculate_sha256(self.archive)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def get_root(self, name: str) -> str:
+        return os.path.join(self.directory.name, name)
+
+    def read(self, root: str, path: str) -> bytes:
+        with open(os.path.join(root, path), "rb") as installed_file:
+            return installed_file.read()
+
+    def test_install_matches_extract(self):
+        expected = extract_archive(self.archive, self.get_root("extracted"))
+        self.assertEqual(
+            expected, self.store.install(self.archive, self.sha256, self.get_root("a"))
+        )
+        self.assertEqual(
+            list_archive_files(self.archive),
+            self.store.get_files(self.archive, self.sha256),
+        )
+
+        root = self.get_root("a")
+        self.assertEqual(b"library", self.read(root, "psp/lib/libcopy.a"))
+        self.assertEqual("libtest.a", os.readlink(f"{root}/psp/lib/libalias.a"))
+        self.assertTrue(os.access(f"{root}/psp/bin/tool", os.X_OK))
+        self.assertFalse(os.path.exists(f"{root}/.PKGINFO"))
+
+    def test_install_stays_inside_root(self):
+        archive = create_escaping_archive(self.directory.name)
+        sha256 = calculate_sha256(archive)
+        with patch("builtins.print"):
+            files = self.store.install(archive, sha256, self.get_root("a"))
+        assert_not_escaped(self, self.directory.name, self.get_root("a"), files)
+
+    def test_roots_share_files(self):
+        self.store.install(self.archive, self.sha256, self.get_root("a"))
+        self.store.install(self.archive, self.sha256, self.get_root("b"))
+
+        inodes = {
+            os.stat(os.path.join(self.get_root(root), path)).st_ino
+            for root in ["a", "b"]
+            for path in ["psp/lib/libtest.a", "psp/lib/libsame.a"]
+        }
+        self.assertEqual(1, len(inodes))
+
+    def test_stored_archive_is_not_decompressed_again(self):
+        self.store.get_files(self.archive, self.sha256)
+        with patch("boxman.content_store.open_tar", wraps=open_tar) as mock_open:
+            self.store.install(self.archive, self.sha256, self.get_root("a"))
+            self.store.install(self.archive, self.sha256, self.get_root("b"))
+        mock_open.assert_not_called()
+
+    def test_missing_object_stores_archive_again(self):
+        self.store.install(self.archive, self.sha256, self.get_root("a"))
+        for directory, _, names in os.walk(self.store.objects_directory):
+            for name in names:
+                os.remove(os.path.join(directory, name))
+
+        self.assertIsNone(self.store.get_manifest(self.archive, self.sha256))
+        self.store.install(self.archive, self.sha256, self.get_root("b"))
+        self.assertEqual(b"library", self.read(self.get_root("b"), "psp/lib/libtest.a"))
+
+    def test_copy_across_filesystems(self):
+        original_link = os.link
+
+        def link(source, target):
+            if source.startswith(self.store.objects_directory):
+                raise OSError(errno.EXDEV, "Invalid cross-device link")
+            original_link(source, target)
+
+        with patch("os.link", side_effect=link):
+            self.store.install(self.archive, self.sha256, self.get_root("a"))
+
+        root = self.get_root("a")
+        self.assertEqual(b"library", self.read(root, "psp/lib/libtest.a"))
+        self.assertTrue(os.access(f"{root}/psp/bin/tool", os.X_OK))
+        self.assertEqual(1, os.stat(f"{root}/psp/lib/libsame.a").st_nlink)
+
+    def test_prune(self):
+        self.store.install(self.archive, self.sha256, self.get_root("a"))
+        self.assertEqual(0, self.store.prune())
+
+        for path in self.store.get_files(self.archive, self.sha256):
+            os.remove(os.path.join(self.get_root("a"), path))
+        self.assertEqual(2, self.store.prune())
+
+    def test_rebuilt_archive_is_stored_again(self):
+        for content in [b"library", b"LIBRARY"]:
+            with tarfile.open(self.archive, "w") as t:
+                add_file(t, "psp/lib/libtest.a", content)
+            sha256 = calculate_sha256(self.archive)
+            self.store.install(self.archive, sha256, self.get_root("a"))
+            self.assertEqual(
+                content, self.read(self.get_root("a"), "psp/lib/libtest.a")
+            )
+
+    def test_prune_skips_store_in_use(self):
+        def add_object(archive, member):
+            # Another process cleans the cache while this one stores a file
+            self.assertEqual(0, self.store.prune())
+            self.assertEqual(1, len(os.listdir(self.store.temporary_directory)))
+            return original_extractfile(archive, member)
+
+        original_extractfile = tarfile.TarFile.extractfile
+        with patch("tarfile.TarFile.extractfile", add_object):
+            self.store.install(self.archive, self.sha256, self.get_root("a"))
+        self.assertEqual(b"library", self.read(self.get_root("a"), "psp/lib/libtest.a"))
@@ -0,0 +1,140 @@
+import os
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch, MagicMock
+
+from boxman.database import Database
+from boxman.repository import Repository
+from test.test_database_index import create_database
+
+DESC = """%NAME%
+{name}
+
+%VERSION%
+{version}
+
+%ARCH%
+mips
+
+%SIZE%
+1
+
+"""
+
+
+class TestDatabase(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.repository = Repository(
+            "pspdev", "https://example.com/repo", self.directory.name
+        )
+        os.makedirs(self.repository.dir)
+        create_database(
+            self.repository.path,
+            {
+                "sdl2-2.25.0-3": DESC.format(name="sdl2", version="2.25.0-3"),
+                "pspgl-r12-1": DESC.format(name="pspgl", version="r12-1"),
+            },
+        )
+        self.database = Database(self.repository, 1800)
+
+    def tearDown(self):
+        self.database.index.close()
+        self.directory.cleanup()
+
+    def test_get_desc(self):
+        desc = self.database.get_desc("sdl2")
+        self.assertEqual("sdl2", desc.name)
+        self.assertEqual("2.25.0-3", str(desc.version))
+        self.assertIsNone(self.database.get_desc("sdl"))
+
+    def test_get_desc_without_catalog(self):
+        with patch.object(self.database.index, "get_packages") as mock_get_packages:
+            self.assertEqual("pspgl", self.database.get_desc("pspgl").name)
+            self.assertEqual("pspdev", self.database.get_desc("pspgl").source)
+            self.assertIsNone(self.database.get_desc("sdl"))
+            mock_get_packages.assert_not_called()
+
+    def test_catalog_is_loaded_once(self):
+        self.database.get_desc("sdl2")
+        with patch("tarfile.open") as mock_open:
+            self.database.get_desc("pspgl")
+            list(self.database.get_package_list())
+            self.database.search_packages("sdl")
+            mock_open.assert_not_called()
+
+    @patch("boxman.database.download_if_modified")
+    def test_refresh_is_attempted_once(self, mock_download: MagicMock):
+        mock_download.side_effect = OSError("timed out")
+        self.assertRaises(OSError, self.database.refresh, True)
+
+        # The existing database is used after a failed refresh
+        self.assertEqual("sdl2", self.database.get_desc("sdl2").name)
+        mock_download.assert_called_once()
+
+    def test_get_package_list(self):
+        self.assertEqual(
+            ["pspdev pspgl r12-1", "pspdev sdl2 2.25.0-3"],
+            list(self.database.get_package_list()),
+        )
+
+    def test_search_packages(self):
+        self.assertEqual(
+            [(2, "sdl2", "pspdev sdl2 2.25.0-3")], self.database.search_packages("dl")
+        )
+        self.assertEqual([], self.database.search_packages("pspdev"))
+
+    def test_search_packages_ranking(self):
+        create_database(
+            self.repository.path,
+            {
+                "sdl2-2.26.0-1": DESC.format(name="sdl2", version="2.26.0-1"),
+                "sdl2-image-2.6.2-1": DESC.format(name="sdl2-image", version="2.6.2-1")
+                + "%DESC%\nImage loading library for SDL2\n\n",
+                "libsdl2-compat-1.0-1": DESC.format(
+                    name="libsdl2-compat", version="1.0-1"
+                ),
+                "pspgl-r12-1": DESC.format(name="pspgl", version="r12-1")
+                + "%PROVIDES%\nopengl=1.1\n\n%GROUPS%\npsp-graphics\n\n",
+            },
+        )
+        self.assertEqual(
+            ["sdl2", "sdl2-image", "libsdl2-compat"],
+            [name for _, name, _ in self.database.search_packages("sdl2")],
+        )
+        self.assertEqual(
+            ["sdl2-image"],
+            [name for _, name, _ in self.database.search_packages("SDL2")],
+        )
+        self.assertEqual(
+            ["sdl2", "sdl2-image", "libsdl2-compat"],
+            [
+                name
+                for _, name, _ in self.database.search_packages(
+                    "SDL2", ignore_case=True
+                )
+            ],
+        )
+        self.assertEqual(
+            ["pspgl"], [name for _, name, _ in self.database.search_packages("opengl")]
+        )
+        self.assertEqual(
+            ["pspgl"],
+            [name for _, name, _ in self.database.search_packages("graph")],
+        )
+        self.assertEqual(
+            ["pspgl", "sdl2"],
+            [
+                name
+                for _, name, _ in self.database.search_packages(
+                    "^(sdl2|psp.*)$", regex=True
+                )
+            ],
+        )
+
+    def test_show_package(self):
+        result = list(self.database.show_package("sdl2"))
+        self.assertEqual(1, len(result))
+        self.assertIn("Repository      : pspdev\n", result[0])
+        self.assertEqual([], list(self.database.show_package("sdl")))
+        self.assertEqual(2, len(list(self.database.show_package(""))))
@@ -0,0 +1,139 @@
+import io
+import os
+import tarfile
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch, MagicMock
+
+from boxman.database_index import DatabaseIndex, get_desc_directory
+from boxman.search import get_trigrams
+
+
+def create_database(path: str, packages: dict) -> None:
+    with tarfile.open(path, "w:gz") as t:
+        for directory, content in packages.items():
+            info = tarfile.TarInfo(directory)
+            info.type = tarfile.DIRTYPE
+            t.addfile(info)
+            data = content.encode()
+            info = tarfile.TarInfo(f"{directory}/desc")
+            info.size = len(data)
+            t.addfile(info, io.BytesIO(data))
+
+
+class TestDatabaseIndex(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.database_path = os.path.join(self.directory.name, "test.db")
+        self.index_path = os.path.join(self.directory.name, "test.idx")
+        create_database(
+            self.database_path,
+            {
+                "sdl2-2.25.0-3": "%NAME%\nsdl2\n",
+                "libpspvram-r11.885fd3f-1": "%NAME%\nlibpspvram\n",
+            },
+        )
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_update(self):
+        index = DatabaseIndex(self.database_path, self.index_path)
+        self.assertFalse(index.is_up_to_date())
+        index.update()
+        self.assertTrue(index.is_up_to_date())
+
+        self.assertEqual(b"%NAME%\nsdl2\n", index.get_desc("sdl2"))
+        self.assertEqual(b"%NAME%\nlibpspvram\n", index.get_desc("libpspvram"))
+        self.assertIsNone(index.get_desc("sdl"))
+        self.assertEqual(
+            ["libpspvram-r11.885fd3f-1", "sdl2-2.25.0-3"],
+            sorted(row[1] for row in index.get_packages()),
+        )
+        index.close()
+
+    def test_index_persists(self):
+        index = DatabaseIndex(self.database_path, self.index_path)
+        index.update()
+        index.close()
+
+        index = DatabaseIndex(self.database_path, self.index_path)
+        with patch("tarfile.open") as mock_open:
+            index.update()
+            mock_open.assert_not_called()
+        self.assertEqual(b"%NAME%\nsdl2\n", index.get_desc("sdl2"))
+        index.close()
+
+    def test_touched_database_is_not_reindexed(self):
+        index = DatabaseIndex(self.database_path, self.index_path)
+        index.update()
+        os.utime(self.database_path, ns=(0, 0))
+
+        with patch("tarfile.open") as mock_open:
+            self.assertTrue(index.is_up_to_date())
+            mock_open.assert_not_called()
+        index.close()
+
+    def test_incremental_rebuild(self):
+        index = DatabaseIndex(self.database_path, self.index_path)
+        index.update()
+
+        create_database(
+            self.database_path,
+            {
+                "sdl2-2.26.0-1": "%NAME%\nsdl2\n%VERSION%\n2.26.0-1\n",
+                "pspgl-r12-1": "%NAME%\npspgl\n",
+            },
+        )
+        self.assertFalse(index.is_up_to_date())
+        index.update()
+
+        self.assertEqual(
+            ["pspgl-r12-1", "sdl2-2.26.0-1"],
+            sorted(row[1] for row in index.get_packages()),
+        )
+        self.assertEqual(b"%NAME%\nsdl2\n%VERSION%\n2.26.0-1\n", index.get_desc("sdl2"))
+        self.assertIsNone(index.get_desc("libpspvram"))
+        index.close()
+
+    def test_get_desc_directory(self):
+        member = MagicMock()
+        member.isfile.return_value = True
+
+        member.name = "sdl2-2.25.0-3/desc"
+        self.assertEqual("sdl2-2.25.0-3", get_desc_directory(member))
+        member.name = "sdl2-2.25.0-3/files"
+        self.assertIsNone(get_desc_directory(member))
+        member.name = "does-not/desc"
+        self.assertIsNone(get_desc_directory(member))
+
+        member.isfile.return_value = False
+        member.name = "sdl2-2.25.0-3/desc"
+        self.assertIsNone(get_desc_directory(member))
+
+    def test_get_search_candidates(self):
+        index = DatabaseIndex(self.database_path, self.index_path)
+        create_database(
+            self.database_path,
+            {
+                "sdl2-2.26.0-1": "%NAME%\nsdl2\n\n%DESC%\nSimple DirectMedia Layer\n",
+                "pspgl-r12-1": "%NAME%\npspgl\n\n%PROVIDES%\nopengl=1.1\n",
+            },
+        )
+        index.update()
+
+        self.assertEqual(
+            [("sdl2", "Simple DirectMedia Layer")],
+            index.get_search_candidates(get_trigrams("media")),
+        )
+        self.assertEqual(
+            [("pspgl", "opengl")], index.get_search_candidates(get_trigrams("OpenGL"))
+        )
+        self.assertEqual([], index.get_search_candidates(get_trigrams("vulkan")))
+        self.assertEqual(2, len(index.get_search_candidates(set())))
+
+        create_database(self.database_path, {"sdl2-2.26.0-1": "%NAME%\nsdl2\n"})
+        index.update()
+        self.assertEqual([], index.get_search_candidates(get_trigrams("opengl")))
+        self.assertEqual([], index.get_search_candidates(get_trigrams("media")))
+        index.close()
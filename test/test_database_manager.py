@@ -0,0 +1,354 @@
+import os
+import tempfile
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from boxman.data.transaction import Action, Step, Transaction
+from boxman.cache_manager import LEDGER_NAME, CacheManager
+from boxman.checksums import Checksums
+from boxman.data.package import Package
+from boxman.database_manager import DatabaseManager
+from boxman.version import Version, parse_version
+
+
+def create_database_manager(database_count: int = 0) -> DatabaseManager:
+    config = MagicMock()
+    config.repositories = []
+    config.options.cache_dir = "/test/var/cache/boxman"
+    config.options.root_dir = "/test"
+    config.options.parallel_downloads = 2
+    config.options.cache_max_size = 0
+    config.options.cache_keep_versions = 0
+    config.options.content_store = False
+    database_manager = DatabaseManager(MagicMock(), config)
+    for number in range(database_count):
+        database = MagicMock()
+        database.repository.name = f"repo{number}"
+        database_manager.databases.append(database)
+    return database_manager
+
+
+class TestDatabaseManager(TestCase):
+    def test_refresh_databases(self):
+        database_manager = create_database_manager(3)
+
+        self.assertTrue(database_manager.refresh_databases(force=True))
+        for database in database_manager.databases:
+            database.refresh.assert_called_once_with(True)
+
+    def test_refresh_databases_reports_failures(self):
+        database_manager = create_database_manager(3)
+        database_manager.databases[1].refresh.side_effect = OSError("timed out")
+
+        self.assertFalse(database_manager.refresh_databases())
+        for database in database_manager.databases:
+            database.refresh.assert_called_once_with(False)
+
+    def test_refresh_databases_without_databases(self):
+        self.assertTrue(create_database_manager().refresh_databases())
+
+    def test_download_packages(self):
+        database_manager = create_database_manager()
+        descs = [MagicMock(), MagicMock()]
+        descs[0].name = "sdl2"
+        descs[1].name = "pspgl"
+        with patch.object(database_manager, "download_package") as mock_download:
+            mock_download.side_effect = lambda desc: f"/cache/{desc.name}.pkg.tar.gz"
+            self.assertEqual(
+                {"sdl2": "/cache/sdl2.pkg.tar.gz", "pspgl": "/cache/pspgl.pkg.tar.gz"},
+                database_manager.download_packages(descs),
+            )
+
+    def test_download_packages_failure(self):
+        database_manager = create_database_manager()
+        descs = [MagicMock(), MagicMock()]
+        with patch.object(database_manager, "download_package") as mock_download:
+            mock_download.side_effect = [None, "/cache/pspgl.pkg.tar.gz"]
+            self.assertIsNone(database_manager.download_packages(descs))
+
+    def test_install_packages_downloads_before_extracting(self):
+        database_manager = create_database_manager()
+        database_manager.local_database.get_package_desc.return_value = None
+        database_manager.local_database.get_package_version.return_value = None
+        descs = {"sdl2": MagicMock(), "pspgl": MagicMock()}
+        for name, desc in descs.items():
+            desc.name = name
+        descs["sdl2"].dependencies = ["pspgl"]
+        descs["pspgl"].dependencies = []
+
+        calls = []
+        with patch.object(
+            database_manager, "get_package_desc", side_effect=descs.get
+        ), patch.object(
+            database_manager,
+            "download_packages",
+            side_effect=lambda d: calls.append("download")
+            or {desc.name: desc.name for desc in d},
+        ), patch.object(
+            database_manager, "find_file_conflicts", return_value=[]
+        ), patch.object(
+            database_manager,
+            "extract_archive",
+            side_effect=lambda archive: calls.append(archive) or [archive],
+        ):
+            self.assertTrue(database_manager.install_packages(["sdl2"]))
+
+        self.assertEqual(["download", "pspgl", "sdl2"], calls)
+        installed = database_manager.local_database.install.call_args_list
+        self.assertEqual(False, installed[0][0][2])
+        self.assertEqual(True, installed[1][0][2])
+
+    def test_install_packages_missing_package(self):
+        database_manager = create_database_manager()
+        with patch.object(
+            database_manager, "get_package_desc", return_value=None
+        ), patch.object(database_manager, "download_packages") as mock_download:
+            self.assertFalse(database_manager.install_packages(["missing"]))
+            mock_download.assert_not_called()
+
+    def create_update_database_manager(self) -> DatabaseManager:
+        database_manager = create_database_manager(2)
+        installed = {
+            "sdl2": "sdl2-2.0.20-1",
+            "pspgl": "pspgl-2020.1-1",
+            "libpng": "libpng-1.6.37-2",
+            "local-only": "local-only-1.0-1",
+        }
+        local_database = database_manager.local_database
+        local_database.packages = installed
+        local_database.get_package_version.side_effect = lambda name: (
+            parse_version("-".join(installed[name].rsplit("-", 2)[1:]))
+            if name in installed
+            else None
+        )
+        database_manager.databases[0].packages = {
+            "sdl2": Package("sdl2", "sdl2-2.0.22-1", b"", "repo0"),
+            "pspgl": Package("pspgl", "pspgl-2020.1-1", b"", "repo0"),
+        }
+        database_manager.databases[1].packages = {
+            "pspgl": Package("pspgl", "pspgl-2021.1-1", b"", "repo1"),
+            "libpng": Package("libpng", "libpng-1.6.37-1", b"", "repo1"),
+        }
+        return database_manager
+
+    def test_get_updates(self):
+        database_manager = self.create_update_database_manager()
+
+        self.assertEqual(
+            [
+                ("pspgl", Version("2020.1-1"), Version("2021.1-1")),
+                ("sdl2", Version("2.0.20-1"), Version("2.0.22-1")),
+            ],
+            database_manager.get_updates(),
+        )
+        self.assertEqual(
+            ["sdl2"], [name for name, _, _ in database_manager.get_updates(["sdl2"])]
+        )
+        self.assertEqual([], database_manager.get_updates(["libpng"]))
+
+    def test_update_packages_runs_one_transaction(self):
+        database_manager = self.create_update_database_manager()
+        with patch.object(database_manager, "install_packages") as mock_install:
+            mock_install.return_value = True
+            self.assertTrue(database_manager.update_packages([]))
+        mock_install.assert_called_once_with(["pspgl", "sdl2"])
+
+    def test_update_packages_not_installed(self):
+        database_manager = self.create_update_database_manager()
+        with patch.object(database_manager, "install_packages") as mock_install:
+            self.assertFalse(database_manager.update_packages(["missing"]))
+            self.assertTrue(database_manager.update_packages(["libpng"]))
+        mock_install.assert_not_called()
+
+    def test_find_archive_desc(self):
+        database_manager = create_database_manager(2)
+        database_manager.databases[0].get_desc.return_value = MagicMock(
+            file_name="sdl2-2.0.22-1-mips.pkg.tar.gz"
+        )
+        desc = MagicMock(file_name="sdl2-2.0.20-1-mips.pkg.tar.gz")
+        database_manager.databases[1].get_desc.return_value = desc
+
+        self.assertIs(
+            desc, database_manager.find_archive_desc("sdl2-2.0.20-1-mips.pkg.tar.gz")
+        )
+        database_manager.databases[1].get_desc.assert_called_with("sdl2")
+        self.assertIsNone(database_manager.find_archive_desc("sdl2-2.0.1-1.tar.gz"))
+
+    def test_content_store(self):
+        database_manager = create_database_manager()
+        self.assertIsNone(database_manager.content_store)
+        database_manager.content_store = MagicMock()
+        database_manager.cache_manager = MagicMock()
+        database_manager.cache_manager.get_sha256.return_value = "0" * 64
+        database_manager.content_store.install.return_value = ["psp/lib/libpng.a"]
+        archive = "/test/var/cache/boxman/libpng-1.6.37-1-mips.pkg.tar.gz"
+
+        self.assertEqual(
+            ["psp/lib/libpng.a"], database_manager.extract_archive(archive)
+        )
+        database_manager.content_store.install.assert_called_once_with(
+            archive, "0" * 64, "/test"
+        )
+        database_manager.list_archive_files(archive)
+        database_manager.content_store.get_files.assert_called_once_with(
+            archive, "0" * 64
+        )
+
+    def test_find_file_conflicts(self):
+        database_manager = create_database_manager()
+        file_index = database_manager.local_database.file_index
+        file_index.find_conflicts.side_effect = lambda paths, ignored: {
+            path: "sdl2" for path in paths if path == "psp/lib/libSDL2.a"
+        }
+        transaction = Transaction(
+            [
+                Step(Action.INSTALL, "sdl2-fork"),
+                Step(Action.UPGRADE, "pspgl"),
+                Step(Action.INSTALL, "pspgl-extra"),
+            ]
+        )
+        files = {
+            "sdl2-fork": ["psp/lib/libSDL2.a"],
+            "pspgl": ["psp/lib/libGL.a"],
+            "pspgl-extra": ["psp/lib/libGL.a", "psp/lib/libGLU.a"],
+        }
+        with patch("boxman.database_manager.list_archive_files", side_effect=files.get):
+            conflicts = database_manager.find_file_conflicts(
+                transaction, {name: name for name in files}
+            )
+
+        self.assertEqual(
+            [
+                "psp/lib/libSDL2.a exists in both sdl2-fork and sdl2",
+                "psp/lib/libGL.a exists in both pspgl-extra and pspgl",
+            ],
+            conflicts,
+        )
+        ignored = file_index.find_conflicts.call_args_list[0][0][1]
+        self.assertEqual({"pspgl", "sdl2-fork"}, ignored)
+
+    def test_run_transaction_stops_on_conflicts(self):
+        database_manager = create_database_manager()
+        transaction = Transaction([Step(Action.INSTALL, "sdl2")])
+        with patch.object(
+            database_manager, "download_packages", return_value={"sdl2": "sdl2"}
+        ), patch.object(
+            database_manager, "find_file_conflicts", return_value=["conflict"]
+        ), patch.object(
+            database_manager, "extract_archive"
+        ) as mock_extract:
+            self.assertFalse(database_manager.run_transaction(transaction))
+            mock_extract.assert_not_called()
+
+    def test_get_package_list(self):
+        database_manager = create_database_manager(2)
+        database_manager.databases[0].get_package_list.return_value = iter(
+            ["repo0 sdl2 2.26.0-1"]
+        )
+        database_manager.databases[1].get_package_list.return_value = iter(
+            ["repo1 pspgl r12-1"]
+        )
+        self.assertEqual(
+            ["repo1 pspgl r12-1"], list(database_manager.get_package_list("repo1"))
+        )
+        database_manager.databases[0].get_package_list.assert_not_called()
+
+    @patch("boxman.database_manager.exit", create=True)
+    def test_get_package_list_unknown_repository(self, mock_exit: MagicMock):
+        mock_exit.side_effect = SystemExit(1)
+        database_manager = create_database_manager(1)
+        self.assertRaises(SystemExit, database_manager.get_package_list, "missing")
+
+    def test_search_packages(self):
+        database_manager = create_database_manager(2)
+        database_manager.databases[0].repository.name = "pspdev"
+        database_manager.databases[0].search_packages.return_value = [
+            (0, "sdl2", "pspdev sdl2 2.26.0-1"),
+            (1, "sdl2-image", "pspdev sdl2-image 2.6.2-1"),
+        ]
+        database_manager.databases[1].repository.name = "extra"
+        database_manager.databases[1].search_packages.return_value = [
+            (0, "sdl2", "extra sdl2 2.24.0-1"),
+            (3, "sdl2-compat", "extra sdl2-compat 1.0-1"),
+        ]
+        self.assertEqual(
+            [
+                "extra sdl2 2.24.0-1",
+                "pspdev sdl2 2.26.0-1",
+                "pspdev sdl2-image 2.6.2-1",
+                "extra sdl2-compat 1.0-1",
+            ],
+            list(database_manager.search_packages("sdl2")),
+        )
+
+    def test_show_package_is_lazy(self):
+        database_manager = create_database_manager(2)
+        database_manager.databases[0].show_package.return_value = iter(["desc"])
+        result = database_manager.show_package("sdl2")
+        self.assertEqual("desc", next(result))
+        database_manager.databases[1].show_package.assert_not_called()
+
+    def create_download(self, content: bytes):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        database_manager = create_database_manager(1)
+        database_manager.download_directory = directory.name
+        database_manager.cache_manager = CacheManager(directory.name)
+        database_manager.databases[0].repository.url = "http://example.com/repo.db"
+        checksums = Checksums()
+        checksums.update(content)
+        desc = MagicMock()
+        desc.source = "repo0"
+        desc.file_name = "sdl2-2.26.0-1-mips.pkg.tar.gz"
+        desc.md5_checksum = checksums.md5
+        desc.sha256_checksum = checksums.sha256
+        return database_manager, desc, os.path.join(directory.name, desc.file_name)
+
+    def test_download_package_renames_part_after_verification(self):
+        database_manager, desc, path = self.create_download(b"content")
+
+        def download_part(url, part_path, checksums):
+            with open(part_path, "wb") as part_file:
+                part_file.write(b"content")
+            checksums.update(b"content")
+            return False
+
+        with patch(
+            "boxman.database_manager.download_part", side_effect=download_part
+        ) as mock_download:
+            self.assertEqual(path, database_manager.download_package(desc))
+        mock_download.assert_called_once()
+        directory = os.path.dirname(path)
+        self.assertEqual(
+            sorted([desc.file_name, LEDGER_NAME]), sorted(os.listdir(directory))
+        )
+
+    def test_download_package_restarts_stale_part(self):
+        database_manager, desc, path = self.create_download(b"content")
+        downloads = [(b"stale", True), (b"content", False)]
+
+        def download_part(url, part_path, checksums):
+            content, resumed = downloads.pop(0)
+            mode = "ab" if os.path.exists(part_path) else "wb"
+            with open(part_path, mode) as part_file:
+                part_file.write(content)
+            checksums.update(content)
+            return resumed
+
+        with patch("boxman.database_manager.download_part", side_effect=download_part):
+            self.assertEqual(path, database_manager.download_package(desc))
+        with open(path, "rb") as package_file:
+            self.assertEqual(b"content", package_file.read())
+
+    def test_download_package_checksum_mismatch(self):
+        database_manager, desc, path = self.create_download(b"content")
+
+        def download_part(url, part_path, checksums):
+            with open(part_path, "wb") as part_file:
+                part_file.write(b"corrupt")
+            checksums.update(b"corrupt")
+            return False
+
+        with patch("boxman.database_manager.download_part", side_effect=download_part):
+            self.assertIsNone(database_manager.download_package(desc))
+        self.assertEqual([], os.listdir(os.path.dirname(path)))
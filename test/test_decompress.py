@@ -0,0 +1,116 @@
+import io
+import os
+import shutil
+import subprocess
+import tarfile
+import tempfile
+from unittest import TestCase, skipUnless
+from unittest.mock import patch
+
+from boxman.decompress import (
+    DecompressionError,
+    detect_compression,
+    is_tar_archive,
+    open_decompressed,
+    open_tar,
+)
+
+CONTENT = b"library" * 1000
+
+
+class TestDecompress(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def create_archive(self, compression: str) -> str:
+        extension = f".{compression}" if compression else ""
+        path = os.path.join(self.directory.name, f"test.tar{extension}")
+        with tarfile.open(path, f"w:{compression}") as archive:
+            for name in ["psp/lib/libtest.a", "psp/lib/libother.a"]:
+                info = tarfile.TarInfo(name)
+                info.size = len(CONTENT)
+                archive.addfile(info, io.BytesIO(CONTENT))
+        return path
+
+    def read_archive(self, path: str) -> dict:
+        with open_tar(path) as archive:
+            return {
+                member.name: archive.extractfile(member).read() for member in archive
+            }
+
+    def assert_archive(self, path: str) -> None:
+        self.assertEqual(
+            {"psp/lib/libtest.a": CONTENT, "psp/lib/libother.a": CONTENT},
+            self.read_archive(path),
+        )
+
+    def test_detect_compression(self):
+        for compression in ["gz", "bz2", "xz"]:
+            path = self.create_archive(compression)
+            self.assertEqual(compression, detect_compression(path))
+        self.assertIsNone(detect_compression(self.create_archive("")))
+
+    def test_open_tar_with_stdlib(self):
+        for compression in ["gz", "bz2", "xz", ""]:
+            path = self.create_archive(compression)
+            with patch("boxman.decompress.find_decompressor", return_value=None):
+                self.assert_archive(path)
+
+    @skipUnless(shutil.which("xz"), "xz is not installed")
+    def test_open_tar_with_subprocess(self):
+        path = self.create_archive("xz")
+        with patch("boxman.decompress.SUBPROCESS_MIN_SIZE", 0), patch(
+            "subprocess.Popen", wraps=subprocess.Popen
+        ) as mock_popen:
+            self.assert_archive(path)
+        mock_popen.assert_called_once()
+
+    @skipUnless(shutil.which("zstd"), "zstd is not installed")
+    def test_open_tar_zstd(self):
+        path = self.create_archive("")
+        subprocess.run(["zstd", "-q", "--rm", path, "-o", f"{path}.zst"], check=True)
+        self.assertEqual("zst", detect_compression(f"{path}.zst"))
+        self.assert_archive(f"{path}.zst")
+
+    def test_zstd_without_decompressor(self):
+        path = os.path.join(self.directory.name, "test.tar.zst")
+        with open(path, "wb") as archive:
+            archive.write(b"\x28\xb5\x2f\xfd" + b"\x00" * 100)
+        with patch("boxman.decompress.find_decompressor", return_value=None):
+            self.assertRaises(DecompressionError, self.read_archive, path)
+            self.assertFalse(is_tar_archive(path))
+
+    @skipUnless(shutil.which("xz"), "xz is not installed")
+    def test_corrupt_archive_with_subprocess(self):
+        path = self.create_archive("xz")
+        with open(path, "r+b") as archive:
+            archive.seek(100)
+            archive.write(b"\x00" * 100)
+        with patch("boxman.decompress.SUBPROCESS_MIN_SIZE", 0):
+            with self.assertRaises((DecompressionError, tarfile.TarError)):
+                self.read_archive(path)
+
+    def test_stop_reading_early(self):
+        path = self.create_archive("gz")
+        with patch("boxman.decompress.SUBPROCESS_MIN_SIZE", 0):
+            self.assertTrue(is_tar_archive(path))
+
+    @skipUnless(shutil.which("yes"), "yes is not installed")
+    def test_stop_reading_early_ends_process(self):
+        path = self.create_archive("xz")
+        # yes never stops writing, so this only returns if the process is ended
+        with patch("boxman.decompress.SUBPROCESS_MIN_SIZE", 0), patch(
+            "boxman.decompress.find_decompressor", return_value=["yes"]
+        ):
+            with open_decompressed(path) as stream:
+                self.assertEqual(path.encode(), stream.read(len(path)))
+
+    def test_is_tar_archive(self):
+        path = os.path.join(self.directory.name, "test.db")
+        with open(path, "wb") as database:
+            database.write(b"not an archive" * 100)
+        self.assertFalse(is_tar_archive(path))
+        self.assertTrue(is_tar_archive(self.create_archive("gz")))
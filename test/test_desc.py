@@ -2,7 +2,7 @@ import os
 import time
 from unittest import TestCase
 
-from boxman.desc import Desc
+from boxman.desc import Desc, get_dependency_name
 
 
 class TestDesc(TestCase):
@@ -257,3 +257,91 @@ Unknown Packager
         # Comparison of packages with different names is based on the name string
         self.assertEqual(desc1 < desc3, "pspirkeyb" < "psparkeyb")
         self.assertEqual(desc1 > desc3, "pspirkeyb" > "psparkeyb")
+
+    def test_fields_are_decoded_lazily(self):
+        data = b"""%FILENAME%
+sdl2-2.26.0-1-mips.pkg.tar.gz
+
+%NAME%
+sdl2
+
+%VERSION%
+2.26.0-1
+
+%DESC%
+A library for portable low-level access
+
+%ISIZE%
+4052133
+
+%CSIZE%
+1000
+
+%SHA256SUM%
+bd5d0538e945a456dc3b5001377b3ff5079065ce6f4ab686fbbb14e1d1ec9c12
+
+%DEPENDS%
+pspgl
+pspsdk>=1.0
+
+%ARCH%
+mips
+
+"""
+        desc = Desc(data, "pspdev")
+
+        self.assertEqual("sdl2", desc.name)
+        self.assertEqual("2.26.0-1", str(desc.version))
+        self.assertEqual("mips", desc.architecture)
+        self.assertEqual("sdl2-2.26.0-1-mips.pkg.tar.gz", desc.file_name)
+        self.assertEqual(["pspgl", "pspsdk>=1.0"], desc.dependencies)
+        self.assertIsNone(desc.md5_checksum)
+        self.assertIsNone(desc._Desc__values)
+
+        self.assertEqual("A library for portable low-level access", desc.description)
+        self.assertIsNotNone(desc._Desc__values)
+
+    def test_convert_to_local_keeps_optional_values(self):
+        data = """%NAME%
+sdl2
+
+%VERSION%
+2.26.0-1
+
+%BASE%
+sdl2
+
+%ARCH%
+mips
+
+%BUILDDATE%
+1666723000
+
+%ISIZE%
+4052133
+
+%CSIZE%
+1000
+
+%FILENAME%
+sdl2-2.26.0-1-mips.pkg.tar.gz
+
+%DEPENDS%
+pspgl
+
+"""
+        desc = Desc(data, "pspdev")
+        self.assertEqual("sdl2-2.26.0-1-mips.pkg.tar.gz", desc.file_name)
+        desc.convert_to_local(installed_explicitly=False)
+
+        self.assertIsNone(desc.file_name)
+        self.assertEqual(["pspgl"], desc.dependencies)
+        self.assertEqual(4052133, desc.size)
+        self.assertTrue(desc.installed_as_dependency)
+        self.assertIn("%VALIDATION%\nnone\n", repr(desc))
+
+    def test_get_dependency_name(self):
+        self.assertEqual("sdl2", get_dependency_name("sdl2"))
+        self.assertEqual("sdl2", get_dependency_name("sdl2>=2.0"))
+        self.assertEqual("sdl2", get_dependency_name("sdl2=2.0-1"))
+        self.assertEqual("sdl2", get_dependency_name("sdl2<3"))
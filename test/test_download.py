@@ -1,56 +1,74 @@
+import io
+import json
+import os
+import pathlib
+import tempfile
 from unittest import TestCase
 from unittest.mock import patch, MagicMock
 
-from boxman.download import download, calculate_progress, print_download_progress
+from boxman.checksums import Checksums, calculate_checksums
+from boxman.constants import CHUNK_SIZE
+from boxman.http_client import HttpError
+from boxman.download import (
+    download,
+    calculate_progress,
+    download_if_modified,
+    download_part,
+    get_conditional_headers,
+)
+
+
+def create_response(content: bytes, headers: dict) -> MagicMock:
+    response = MagicMock()
+    response.read = io.BytesIO(content).read
+    response.headers = headers
+    response.__enter__.return_value = response
+    return response
 
 
 class TestDownload(TestCase):
-    @patch("os.path.isdir")
-    @patch("urllib.request.urlretrieve")
-    def test_download(
-        self,
-        mock_urlretrieve: MagicMock,
-        mock_isdir: MagicMock,
-    ):
-        mock_isdir.return_value = True
-        download("http://example.com/", "/some/directory/test.tar.gz")
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.target_path = os.path.join(self.directory.name, "test.tar.gz")
 
-        mock_urlretrieve.assert_called_once_with(
-            "http://example.com/", "/some/directory/test.tar.gz", reporthook=None
-        )
+    def tearDown(self):
+        self.directory.cleanup()
 
-    @patch("os.makedirs")
-    @patch("os.path.isdir")
-    @patch("urllib.request.urlretrieve")
-    def test_download_makes_directory(
-        self,
-        mock_urlretrieve: MagicMock,
-        mock_isdir: MagicMock,
-        mock_makedirs: MagicMock,
-    ):
-        mock_isdir.return_value = False
-        download("http://example.com/", "/some/directory/test.tar.gz")
+    @patch("boxman.download.open_url")
+    def test_download(self, mock_urlopen: MagicMock):
+        mock_urlopen.return_value = create_response(b"content", {})
+        download("http://example.com/", self.target_path)
 
-        mock_makedirs.assert_called_once_with("/some/directory")
-        mock_urlretrieve.assert_called_once_with(
-            "http://example.com/", "/some/directory/test.tar.gz", reporthook=None
-        )
+        mock_urlopen.assert_called_once_with("http://example.com/")
+        with open(self.target_path, "rb") as target_file:
+            self.assertEqual(b"content", target_file.read())
+
+    @patch("boxman.download.open_url")
+    def test_download_makes_directory(self, mock_urlopen: MagicMock):
+        mock_urlopen.return_value = create_response(b"content", {})
+        target_path = os.path.join(self.directory.name, "some", "test.tar.gz")
+        download("http://example.com/", target_path)
 
-    @patch("os.path.isdir")
-    @patch("urllib.request.urlretrieve")
+        self.assertTrue(os.path.isfile(target_path))
+
+    @patch("boxman.download.print_download_progress")
+    @patch("boxman.download.open_url")
     def test_download_set_report_progress(
-        self,
-        mock_urlretrieve: MagicMock,
-        mock_isdir: MagicMock,
+        self, mock_urlopen: MagicMock, mock_print_download_progress: MagicMock
     ):
-        mock_isdir.return_value = True
-        download("http://example.com/", "/some/directory/test.tar.gz", True)
+        mock_urlopen.return_value = create_response(b"content", {"Content-Length": "7"})
+        download("http://example.com/", self.target_path, True)
 
-        mock_urlretrieve.assert_called_once_with(
-            "http://example.com/",
-            "/some/directory/test.tar.gz",
-            reporthook=print_download_progress,
-        )
+        mock_print_download_progress.assert_called_once_with(1, CHUNK_SIZE, 7)
+
+    @patch("boxman.download.open_url")
+    def test_download_calculates_checksums(self, mock_urlopen: MagicMock):
+        mock_urlopen.return_value = create_response(b"content", {})
+        checksums = Checksums()
+        download("http://example.com/", self.target_path, checksums=checksums)
+
+        self.assertEqual(calculate_checksums(self.target_path).md5, checksums.md5)
+        self.assertEqual(calculate_checksums(self.target_path).sha256, checksums.sha256)
 
     def test_calculate_progress(self):
         self.assertEqual(0, calculate_progress(0, 1000, 10))
@@ -64,3 +82,172 @@ class TestDownload(TestCase):
         self.assertEqual(0, calculate_progress(0, 1000, 10))
         self.assertEqual(0, calculate_progress(0, 1000, 10))
         self.assertEqual(0, calculate_progress(51, 1000, None))
+
+
+class TestDownloadIfModified(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.target_path = os.path.join(self.directory.name, "pspdev.db")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    @patch("boxman.download.open_url")
+    def test_download(self, mock_urlopen: MagicMock):
+        mock_urlopen.return_value = create_response(
+            b"content", {"ETag": '"abc"', "Last-Modified": "Sat, 01 Oct 2022"}
+        )
+
+        self.assertTrue(download_if_modified("http://example.com/", self.target_path))
+        self.assertEqual({}, mock_urlopen.call_args[0][1])
+        with open(self.target_path, "rb") as target_file:
+            self.assertEqual(b"content", target_file.read())
+        self.assertEqual(
+            {"If-None-Match": '"abc"', "If-Modified-Since": "Sat, 01 Oct 2022"},
+            get_conditional_headers(self.target_path),
+        )
+        self.assertEqual(
+            ["pspdev.db", "pspdev.db.headers"], sorted(os.listdir(self.directory.name))
+        )
+
+    @patch("boxman.download.open_url")
+    def test_not_modified(self, mock_urlopen: MagicMock):
+        with open(self.target_path, "wb") as target_file:
+            target_file.write(b"old")
+        with open(f"{self.target_path}.headers", "w") as headers_file:
+            json.dump({"ETag": '"abc"'}, headers_file)
+        os.utime(self.target_path, (0, 0))
+        mock_urlopen.side_effect = HttpError("http://example.com/", 304, "Not Modified")
+
+        self.assertFalse(download_if_modified("http://example.com/", self.target_path))
+        self.assertEqual('"abc"', mock_urlopen.call_args[0][1]["If-None-Match"])
+        self.assertNotEqual(0, os.path.getmtime(self.target_path))
+        with open(self.target_path, "rb") as target_file:
+            self.assertEqual(b"old", target_file.read())
+
+    @patch("boxman.download.open_url")
+    def test_failed_download_keeps_old_file(self, mock_urlopen: MagicMock):
+        with open(self.target_path, "wb") as target_file:
+            target_file.write(b"old")
+        response = create_response(b"", {})
+        response.read = MagicMock(side_effect=OSError("connection reset"))
+        mock_urlopen.return_value = response
+
+        self.assertRaises(
+            OSError, download_if_modified, "http://example.com/", self.target_path
+        )
+        self.assertEqual(["pspdev.db"], os.listdir(self.directory.name))
+        with open(self.target_path, "rb") as target_file:
+            self.assertEqual(b"old", target_file.read())
+
+    def test_get_conditional_headers_without_file(self):
+        self.assertEqual({}, get_conditional_headers(self.target_path))
+
+
+class TestDownloadPart(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.part_path = os.path.join(self.directory.name, "test.tar.gz.part")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write_part(self, content: bytes) -> None:
+        with open(self.part_path, "wb") as part_file:
+            part_file.write(content)
+
+    def read_part(self) -> bytes:
+        with open(self.part_path, "rb") as part_file:
+            return part_file.read()
+
+    def assert_checksums(self, content: bytes, checksums: Checksums) -> None:
+        expected = Checksums()
+        expected.update(content)
+        self.assertEqual(expected.sha256, checksums.sha256)
+
+    @patch("boxman.download.open_url")
+    def test_download(self, mock_urlopen: MagicMock):
+        mock_urlopen.return_value = create_response(b"content", {})
+        checksums = Checksums()
+
+        self.assertFalse(
+            download_part("http://example.com/", self.part_path, checksums)
+        )
+        mock_urlopen.assert_called_once_with("http://example.com/")
+        self.assertEqual(b"content", self.read_part())
+        self.assert_checksums(b"content", checksums)
+
+    @patch("boxman.download.open_url")
+    def test_resume(self, mock_urlopen: MagicMock):
+        self.write_part(b"con")
+        response = create_response(b"tent", {"Content-Range": "bytes 3-6/7"})
+        response.status = 206
+        mock_urlopen.return_value = response
+        checksums = Checksums()
+
+        self.assertTrue(download_part("http://example.com/", self.part_path, checksums))
+        self.assertEqual("bytes=3-", mock_urlopen.call_args[0][1]["Range"])
+        self.assertEqual(b"content", self.read_part())
+        self.assert_checksums(b"content", checksums)
+
+    @patch("boxman.download.open_url")
+    def test_resume_not_supported(self, mock_urlopen: MagicMock):
+        self.write_part(b"con")
+        response = create_response(b"content", {})
+        response.status = 200
+        mock_urlopen.return_value = response
+        checksums = Checksums()
+
+        self.assertFalse(
+            download_part("http://example.com/", self.part_path, checksums)
+        )
+        self.assertEqual(b"content", self.read_part())
+        self.assert_checksums(b"content", checksums)
+
+    @patch("boxman.download.open_url")
+    def test_resume_complete_part(self, mock_urlopen: MagicMock):
+        self.write_part(b"content")
+        mock_urlopen.side_effect = HttpError(
+            "http://example.com/", 416, "Range Not Satisfiable"
+        )
+        checksums = Checksums()
+
+        self.assertTrue(download_part("http://example.com/", self.part_path, checksums))
+        self.assertEqual(b"content", self.read_part())
+        self.assert_checksums(b"content", checksums)
+
+    @patch("boxman.download.open_url")
+    def test_failed_download_keeps_part(self, mock_urlopen: MagicMock):
+        response = create_response(b"", {})
+        response.read = MagicMock(side_effect=[b"con", OSError("connection reset")])
+        mock_urlopen.return_value = response
+
+        self.assertRaises(
+            OSError, download_part, "http://example.com/", self.part_path, Checksums()
+        )
+        self.assertEqual(b"con", self.read_part())
+
+    def test_resume_file_url(self):
+        source = os.path.join(self.directory.name, "source.pkg.tar.gz")
+        with open(source, "wb") as source_file:
+            source_file.write(b"content")
+        self.write_part(b"con")
+        checksums = Checksums()
+
+        url = pathlib.Path(source).as_uri()
+        self.assertFalse(download_part(url, self.part_path, checksums))
+        self.assertEqual(b"content", self.read_part())
+        self.assert_checksums(b"content", checksums)
+
+    @patch("boxman.download.open_url")
+    def test_resume_without_status(self, mock_urlopen: MagicMock):
+        self.write_part(b"con")
+        response = create_response(b"content", {})
+        # Like file:// responses before Python 3.9
+        del response.status
+        mock_urlopen.return_value = response
+
+        self.assertFalse(
+            download_part("file:///test.pkg.tar.gz", self.part_path, Checksums())
+        )
+        self.assertEqual(b"content", self.read_part())
@@ -0,0 +1,69 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from boxman.file_index import FileIndex
+from boxman.files import Files
+
+
+class TestFileIndex(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.index_path = os.path.join(self.directory.name, "files.idx")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_add_and_remove_package(self):
+        index = FileIndex(self.index_path)
+        self.assertFalse(index.exists())
+        index.add_package("sdl2", ["psp/", "psp/lib/libSDL2.a"])
+        index.add_package("pspgl", ["psp/", "psp/lib/libGL.a"])
+        self.assertTrue(index.exists())
+
+        self.assertEqual(["sdl2"], index.get_owners("psp/lib/libSDL2.a"))
+        self.assertEqual(["pspgl", "sdl2"], index.get_owners("psp"))
+        self.assertEqual([], index.get_owners("psp/lib/libpng.a"))
+
+        index.remove_package("sdl2")
+        self.assertEqual([], index.get_owners("psp/lib/libSDL2.a"))
+        self.assertEqual(["pspgl"], index.get_owners("psp"))
+        index.close()
+
+    def test_find_conflicts(self):
+        index = FileIndex(self.index_path)
+        index.add_package("sdl2", ["psp/lib/libSDL2.a", "psp/lib/libSDL2main.a"])
+
+        self.assertEqual(
+            {"psp/lib/libSDL2.a": "sdl2"},
+            index.find_conflicts(["psp/lib/libSDL2.a", "psp/lib/libGL.a"], {"pspgl"}),
+        )
+        self.assertEqual(
+            {}, index.find_conflicts(["psp/lib/libSDL2.a"], {"sdl2", "pspgl"})
+        )
+        index.close()
+
+    def test_rebuild(self):
+        index = FileIndex(self.index_path)
+        index.add_package("stale", ["psp/lib/libstale.a"])
+        index.rebuild(
+            [
+                Files("sdl2", "/test", file_list=["psp/lib/libSDL2.a"]),
+                Files("pspgl", "/test", file_list=["psp/lib/libGL.a"]),
+            ]
+        )
+
+        self.assertEqual(["sdl2"], index.get_owners("psp/lib/libSDL2.a"))
+        self.assertEqual(["pspgl"], index.get_owners("psp/lib/libGL.a"))
+        self.assertEqual([], index.get_owners("psp/lib/libstale.a"))
+        self.assertEqual(["files.idx"], os.listdir(self.directory.name))
+        index.close()
+
+    def test_rebuild_shared(self):
+        index = FileIndex(self.index_path, shared=True)
+        index.add_package("sdl2", ["psp/lib/libSDL2.a"])
+
+        with self.assertRaises(ValueError):
+            index.rebuild([])
+        self.assertEqual(["sdl2"], index.get_owners("psp/lib/libSDL2.a"))
+        index.close()
@@ -1,3 +1,5 @@
+import os
+import tempfile
 from unittest import TestCase
 from unittest.mock import patch, MagicMock, call
 
@@ -55,6 +57,20 @@ class TestFiles(TestCase):
 
         mock_rmdir.assert_called_once_with("/home/test/root/test")
 
+    def test_remove_files_stays_inside_root(self):
+        with tempfile.TemporaryDirectory() as directory:
+            root = os.path.join(directory, "root")
+            outside = os.path.join(directory, "outside")
+            os.makedirs(os.path.join(root, "usr"))
+            os.makedirs(outside)
+            open(os.path.join(outside, "evil"), "w").close()
+            os.symlink(outside, os.path.join(root, "usr", "lib"))
+
+            files = Files("evil", root, file_list=["usr/lib/evil"])
+            with patch("builtins.print"):
+                files.remove_files()
+            self.assertTrue(os.path.exists(os.path.join(outside, "evil")))
+
     def test_get_files(self):
         file_list = [
             "test",
@@ -0,0 +1,150 @@
+import os
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import TestCase
+from unittest.mock import patch
+
+from boxman.http_client import HttpClient, HttpError
+
+CONTENT = b"package content"
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    connections = 0
+    requests = []
+    redirects = {}
+    missing = set()
+
+    def setup(self):
+        super().setup()
+        Handler.connections += 1
+
+    def do_GET(self):
+        Handler.requests.append(self.path)
+        if self.path in Handler.missing:
+            self.send_error(404)
+        elif self.path in Handler.redirects:
+            self.send_response(302)
+            self.send_header("Location", Handler.redirects[self.path])
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        # Requests through a proxy have the whole url as path
+        elif self.path in ["/file", "/drop", "http://boxman.invalid/file"]:
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(CONTENT)))
+            self.end_headers()
+            self.wfile.write(CONTENT)
+            # Close the connection without telling the client, like an idle timeout
+            self.close_connection = self.path == "/drop"
+        elif self.path == "/unchanged":
+            self.send_response(304)
+            self.end_headers()
+        elif self.path == "/slow":
+            time.sleep(0.5)
+        else:
+            self.send_error(404)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestHttpClient(TestCase):
+    def setUp(self):
+        Handler.connections = 0
+        Handler.requests = []
+        Handler.redirects = {
+            "/redirect": "/file",
+            "/loop": "/loop",
+            "/mirror": "/unchanged",
+        }
+        Handler.missing = set()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(
+            target=self.server.serve_forever, args=(0.01,), daemon=True
+        ).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.client = HttpClient(timeout=5)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def get(self, path: str) -> bytes:
+        with self.client.open(f"{self.url}{path}") as response:
+            return response.read()
+
+    def test_connection_is_reused(self):
+        self.assertEqual(CONTENT, self.get("/file"))
+        self.assertEqual(CONTENT, self.get("/file"))
+        self.assertEqual(1, Handler.connections)
+
+    def test_partially_read_connection_is_not_reused(self):
+        with self.client.open(f"{self.url}/file") as response:
+            response.read(1)
+        self.assertEqual(CONTENT, self.get("/file"))
+        self.assertEqual(2, Handler.connections)
+
+    def test_redirect_is_cached(self):
+        self.assertEqual(CONTENT, self.get("/redirect"))
+        self.assertEqual(CONTENT, self.get("/redirect"))
+        self.assertEqual(["/redirect", "/file", "/file"], Handler.requests)
+        self.assertEqual(1, Handler.connections)
+
+    def test_expired_redirect_is_followed_again(self):
+        self.get("/redirect")
+        Handler.missing = {"/file"}
+        Handler.redirects["/redirect"] = "/drop"
+
+        self.assertEqual(CONTENT, self.get("/redirect"))
+        self.assertEqual(
+            ["/redirect", "/file", "/file", "/redirect", "/drop"], Handler.requests
+        )
+
+    def test_not_modified_keeps_redirect(self):
+        for _ in range(2):
+            with self.assertRaises(HttpError) as context:
+                self.get("/mirror")
+            self.assertEqual(304, context.exception.status)
+        self.assertEqual(["/mirror", "/unchanged", "/unchanged"], Handler.requests)
+
+    def test_proxy(self):
+        with patch.dict(os.environ, {"http_proxy": self.url, "no_proxy": ""}):
+            with self.client.open("http://boxman.invalid/file") as response:
+                self.assertEqual(CONTENT, response.read())
+            with self.assertRaises(HttpError) as context:
+                self.client.open("http://boxman.invalid/missing")
+            self.assertEqual(404, context.exception.status)
+        self.assertEqual(
+            ["http://boxman.invalid/file", "http://boxman.invalid/missing"],
+            Handler.requests,
+        )
+
+    def test_no_proxy(self):
+        environment = {"http_proxy": "http://127.0.0.1:9", "no_proxy": "127.0.0.1"}
+        with patch.dict(os.environ, environment):
+            self.assertEqual(CONTENT, self.get("/file"))
+        self.assertEqual(["/file"], Handler.requests)
+
+    def test_redirect_loop(self):
+        with self.assertRaises(HttpError) as context:
+            self.get("/loop")
+        self.assertEqual(302, context.exception.status)
+
+    def test_error_status(self):
+        with self.assertRaises(HttpError) as context:
+            self.get("/missing")
+        self.assertEqual(404, context.exception.status)
+
+    def test_closed_idle_connection_is_replaced(self):
+        self.assertEqual(CONTENT, self.get("/drop"))
+        self.assertEqual(CONTENT, self.get("/file"))
+        self.assertEqual(2, Handler.connections)
+
+    def test_timeout(self):
+        client = HttpClient(timeout=0.1)
+        self.assertRaises(socket.timeout, client.open, f"{self.url}/slow")
@@ -0,0 +1,71 @@
+import os
+import subprocess
+import sys
+import tempfile
+from typing import List, Set
+from unittest import TestCase
+
+BOXMAN_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Modules which are only needed for downloading and installing packages
+HEAVY_MODULES = [
+    "tarfile",
+    "hashlib",
+    "ssl",
+    "http.client",
+    "urllib.request",
+    "concurrent.futures",
+]
+RUN_SCRIPT = (
+    "import sys\n"
+    f"sys.path.insert(0, {BOXMAN_DIRECTORY!r})\n"
+    "from boxman import run\n"
+    "run()\n"
+)
+
+
+class TestImportTime(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.script = os.path.join(self.directory.name, "run.py")
+        with open(self.script, "w") as script_file:
+            script_file.write(RUN_SCRIPT)
+        os.makedirs(os.path.join(self.directory.name, "etc"))
+        config_path = os.path.join(self.directory.name, "etc", "boxman.conf")
+        with open(config_path, "w") as config_file:
+            config_file.write("[options]\n\n[pspdev]\nServer = https://localhost/\n")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def get_imported_modules(self, arguments: List[str]) -> Set[str]:
+        """
+        Runs boxman with -X importtime, which lists every module it imports
+        """
+        process = subprocess.run(
+            [sys.executable, "-X", "importtime", self.script] + arguments,
+            cwd=self.directory.name,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+        )
+        self.assertEqual(0, process.returncode, process.stderr)
+        return {
+            line.split("|")[2].strip()
+            for line in process.stderr.splitlines()
+            if line.startswith("import time:") and "cumulative" not in line
+        }
+
+    def assert_lightweight(self, arguments: List[str]) -> None:
+        # Timings vary too much between machines, so only the imports are checked
+        modules = self.get_imported_modules(arguments)
+        for module in HEAVY_MODULES:
+            self.assertNotIn(module, modules)
+
+    def test_config(self):
+        self.assert_lightweight(["config"])
+
+    def test_installed(self):
+        self.assert_lightweight(["installed"])
+
+    def test_help(self):
+        self.assert_lightweight(["--help"])
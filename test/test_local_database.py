@@ -1,7 +1,21 @@
+import os
+import tempfile
 from unittest import TestCase
 from unittest.mock import patch, mock_open, MagicMock
 
 from boxman import LocalDatabase
+from boxman.desc import Desc
+from boxman.files import Files
+
+
+def mock_scandir_entries(mock_scandir: MagicMock, names: list, is_dir=True) -> None:
+    entries = []
+    for name in names:
+        entry = MagicMock()
+        entry.name = name
+        entry.is_dir.return_value = is_dir
+        entries.append(entry)
+    mock_scandir.return_value.__enter__.return_value = entries
 
 
 class TestLocalDatabase(TestCase):
@@ -29,31 +43,38 @@ class TestLocalDatabase(TestCase):
             LocalDatabase(config)
         mock_makedirs.assert_called_once_with("/home/user/pspdev/var/lib/pacman/local")
 
-    @patch("os.listdir")
+    @patch("os.scandir")
     @patch("os.path.isdir")
     def test_get_package_directory(
-        self, mock_isdir: MagicMock, mock_listdir: MagicMock
+        self, mock_isdir: MagicMock, mock_scandir: MagicMock
     ):
         mock_isdir.return_value = True
         config = MagicMock()
         config.options.db_path = "/test/var/lib/pacman"
         db = LocalDatabase(config)
 
-        mock_listdir.return_value = ["test-1.0.1-1"]
+        mock_scandir_entries(mock_scandir, ["test-1.0.1-1", "test-extra-2.0-1"])
 
         self.assertEqual("test-1.0.1-1", db.get_package_directory("test"))
+        self.assertEqual("test-extra-2.0-1", db.get_package_directory("test-extra"))
+        self.assertEqual("1.0.1-1", str(db.get_package_version("test")))
+        self.assertIsNone(db.get_package_directory("tes"))
+        mock_scandir.assert_called_once_with("/test/var/lib/pacman/local")
 
-    @patch("os.listdir")
+    @patch("os.scandir")
     @patch("os.path.isdir")
-    def test_get_desc(self, mock_isdir: MagicMock, mock_listdir: MagicMock):
+    def test_get_desc(self, mock_isdir: MagicMock, mock_scandir: MagicMock):
         mock_isdir.return_value = True
-        mock_listdir.return_value = [
-            "libpspvram-r11.885fd3f-1",
-            "pspgl-r12-1",
-            "pspirkeyb-r1-1",
-            "sdl-1.2.15-1",
-            "sdl2-2.25.0-3",
-        ]
+        mock_scandir_entries(
+            mock_scandir,
+            [
+                "libpspvram-r11.885fd3f-1",
+                "pspgl-r12-1",
+                "pspirkeyb-r1-1",
+                "sdl-1.2.15-1",
+                "sdl2-2.25.0-3",
+            ],
+        )
         desc_content = """%NAME%
 sdl2
 
@@ -134,26 +155,29 @@ sha256
             mock_makedirs.assert_called_once()
             self.assertEqual(mock_writer.call_count, 2)
 
-    @patch("os.listdir")
+    @patch("os.scandir")
     @patch("os.path.isdir")
     def test_get_package_directories(
-        self, mock_isdir: MagicMock, mock_listdir: MagicMock
+        self, mock_isdir: MagicMock, mock_scandir: MagicMock
     ):
         mock_isdir.return_value = True
         config = MagicMock()
         config.options.db_path = "/home/user/pspdev/var/lib/pacman"
         db = LocalDatabase(config)
 
-        mock_listdir.return_value = [
-            "libpspvram-r11.885fd3f-1",
-            "pspgl-r12-1",
-            "pspirkeyb-r1-1",
-            "sdl-1.2.15-1",
-            "sdl2-2.25.0-3",
-            "does-not-match",
-            "somefile",
-            "this-is-a-test",
-        ]
+        mock_scandir_entries(
+            mock_scandir,
+            [
+                "libpspvram-r11.885fd3f-1",
+                "pspgl-r12-1",
+                "pspirkeyb-r1-1",
+                "sdl-1.2.15-1",
+                "sdl2-2.25.0-3",
+                "does-not-match",
+                "somefile",
+                "this-is-a-test",
+            ],
+        )
 
         expected = [
             "libpspvram-r11.885fd3f-1",
@@ -166,3 +190,52 @@ sha256
         actual = db.get_package_directories()
 
         self.assertEqual(expected, actual)
+
+    def test_install_and_remove_keep_index_consistent(self):
+        with tempfile.TemporaryDirectory() as directory:
+            config = MagicMock()
+            config.options.db_path = directory
+            config.options.root_dir = directory
+            db = LocalDatabase(config)
+            self.assertEqual([], db.get_installed_packages())
+
+            desc = Desc(
+                "%NAME%\nsdl2\n\n%VERSION%\n2.26.0-1\n\n%ARCH%\nmips\n\n"
+                "%ISIZE%\n1\n\n%CSIZE%\n1\n\n",
+                "pspdev",
+            )
+            db.install(desc, Files("sdl2", directory, file_list=["include"]))
+            self.assertEqual(["sdl2"], db.get_installed_packages())
+            self.assertEqual("2.26.0-1", str(db.get_package_version("sdl2")))
+
+            self.assertTrue(db.remove_package("sdl2"))
+            self.assertEqual([], db.get_installed_packages())
+            self.assertEqual(["ALPM_DB_VERSION"], os.listdir(f"{directory}/local"))
+
+    def test_file_index(self):
+        with tempfile.TemporaryDirectory() as directory:
+            config = MagicMock()
+            config.options.db_path = directory
+            config.options.root_dir = directory
+            db = LocalDatabase(config)
+            desc = Desc(
+                "%NAME%\nsdl2\n\n%VERSION%\n2.26.0-1\n\n%ARCH%\nmips\n\n"
+                "%ISIZE%\n1\n\n%CSIZE%\n1\n\n",
+                "pspdev",
+            )
+            files = Files("sdl2", directory, file_list=["psp/", "psp/libSDL2.a"])
+            db.install(desc, files)
+            self.assertFalse(os.path.exists(f"{directory}/files.idx"))
+
+            # The missing index is rebuilt from the local database
+            self.assertEqual(["sdl2"], db.get_file_owners("psp/libSDL2.a"))
+            self.assertEqual(["sdl2"], db.get_file_owners(f"{directory}/psp/libSDL2.a"))
+            self.assertEqual(["sdl2"], db.get_file_owners("/psp/"))
+
+            self.assertTrue(db.remove_package("sdl2"))
+            self.assertEqual([], db.get_file_owners("psp/libSDL2.a"))
+            self.assertEqual([], list(db.get_installed_files("sdl2")))
+
+            db.install(desc, files)
+            self.assertEqual(["sdl2"], db.get_file_owners("psp/libSDL2.a"))
+            db.file_index.close()
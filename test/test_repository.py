@@ -9,4 +9,5 @@ class TestRepository(TestCase):
         self.assertEqual("name", repo.name)
         self.assertEqual("https://example.com/repo/name.db", repo.url)
         self.assertEqual("/root/sync/name.db", repo.path)
+        self.assertEqual("/root/sync/name.idx", repo.index_path)
         self.assertEqual("/root/sync", repo.dir)
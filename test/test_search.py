@@ -0,0 +1,46 @@
+from unittest import TestCase
+
+from boxman.search import (
+    DESCRIPTION,
+    EXACT,
+    PREFIX,
+    SUBSTRING,
+    compile_query,
+    get_rank,
+    get_search_fields,
+    get_trigrams,
+)
+
+
+class TestSearch(TestCase):
+    def test_get_trigrams(self):
+        self.assertEqual({"sdl", "dl2"}, get_trigrams("SDL2"))
+        self.assertEqual(set(), get_trigrams("gl"))
+
+    def test_get_search_fields(self):
+        content = (
+            b"%NAME%\npspgl\n\n%DESC%\nOpenGL for the PSP\n\n"
+            b"%PROVIDES%\nopengl=1.1\nlibgl\n\n%GROUPS%\npsp-graphics\n\n"
+        )
+        self.assertEqual(
+            "opengl\nlibgl\npsp-graphics\nOpenGL for the PSP",
+            get_search_fields(content),
+        )
+
+    def test_get_rank(self):
+        pattern = compile_query("sdl2")
+        self.assertEqual(EXACT, get_rank(pattern, "sdl2", ""))
+        self.assertEqual(PREFIX, get_rank(pattern, "sdl2-image", ""))
+        self.assertEqual(SUBSTRING, get_rank(pattern, "libsdl2", ""))
+        self.assertEqual(DESCRIPTION, get_rank(pattern, "pspgl", "uses sdl2"))
+        self.assertIsNone(get_rank(pattern, "pspgl", "OpenGL"))
+
+    def test_compile_query(self):
+        self.assertIsNone(get_rank(compile_query("sdl.*"), "sdl2", ""))
+        self.assertEqual(
+            EXACT, get_rank(compile_query("sdl.*", regex=True), "sdl2", "")
+        )
+        self.assertEqual(
+            EXACT, get_rank(compile_query("SDL2", ignore_case=True), "sdl2", "")
+        )
+        self.assertRaises(Exception, compile_query, "(", regex=True)
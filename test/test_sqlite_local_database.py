@@ -0,0 +1,118 @@
+import os
+import tempfile
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from boxman.base_local_database import BaseLocalDatabase
+from boxman.data.local_db_backend import LocalDBBackend
+from boxman.desc import Desc
+from boxman.files import Files
+from boxman.local_database import LocalDatabase
+from boxman.local_database_factory import create_local_database
+from boxman.sqlite_local_database import SqliteLocalDatabase
+
+DESC = (
+    "%NAME%\n{name}\n\n%VERSION%\n{version}\n\n%ARCH%\nmips\n\n"
+    "%ISIZE%\n1\n\n%CSIZE%\n1\n\n"
+)
+
+
+def create_desc(name: str, version: str) -> Desc:
+    return Desc(DESC.format(name=name, version=version), "pspdev")
+
+
+class TestSqliteLocalDatabase(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.config = MagicMock()
+        self.config.options.db_path = self.directory.name
+        self.config.options.root_dir = self.directory.name
+        self.config.options.local_db_backend = LocalDBBackend.SQLITE
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def create_database(self) -> SqliteLocalDatabase:
+        db = SqliteLocalDatabase(self.config)
+        self.addCleanup(db.close)
+        return db
+
+    def test_factory(self):
+        db = create_local_database(self.config)
+        self.addCleanup(db.close)
+        self.assertIsInstance(db, SqliteLocalDatabase)
+        self.assertNotIsInstance(db, LocalDatabase)
+
+        self.config.options.local_db_backend = LocalDBBackend.ALPM
+        db = create_local_database(self.config)
+        self.assertIsInstance(db, BaseLocalDatabase)
+        self.assertNotIsInstance(db, SqliteLocalDatabase)
+
+    def test_file_index_keeps_database(self):
+        db = self.create_database()
+        files = Files("sdl2", self.directory.name, file_list=["psp/libSDL2.a"])
+        db.install(create_desc("sdl2", "2.26.0-1"), files)
+
+        with self.assertRaises(ValueError):
+            db.file_index.rebuild([])
+        self.assertEqual(["sdl2"], db.get_installed_packages())
+        self.assertEqual(["sdl2"], db.get_file_owners("psp/libSDL2.a"))
+
+    def test_install_and_remove(self):
+        db = self.create_database()
+        files = Files("sdl2", self.directory.name, file_list=["psp/", "psp/libSDL2.a"])
+        db.install(create_desc("sdl2", "2.26.0-1"), files, installed_explicitly=False)
+
+        self.assertEqual(["sdl2"], db.get_installed_packages())
+        self.assertEqual("2.26.0-1", str(db.get_package_version("sdl2")))
+        self.assertTrue(db.get_package_desc("sdl2").installed_as_dependency)
+        self.assertEqual(["sdl2"], [desc.name for desc in db.get_desc_list()])
+        self.assertEqual(
+            ["psp/", "psp/libSDL2.a"], db.get_package_files("sdl2").get_paths()
+        )
+        self.assertEqual(["sdl2"], db.get_file_owners("psp/libSDL2.a"))
+        self.assertEqual(["sdl2"], db.get_file_owners("psp"))
+        self.assertEqual(
+            {"psp/libSDL2.a": "sdl2"},
+            db.file_index.find_conflicts(["psp/libSDL2.a"], {"pspgl"}),
+        )
+        # Neither the ALPM layout nor a separate file index is created
+        self.assertEqual(["local.sqlite"], os.listdir(self.directory.name))
+
+        self.assertTrue(db.remove_package("sdl2"))
+        self.assertFalse(db.remove_package("sdl2"))
+        self.assertEqual([], db.get_installed_packages())
+        self.assertIsNone(db.get_package_files("sdl2"))
+        self.assertEqual([], db.get_file_owners("psp/libSDL2.a"))
+
+        # The state is stored in the database file
+        db.install(create_desc("pspgl", "r12-1"), Files("pspgl", "", file_list=["a"]))
+        db.close()
+        db = self.create_database()
+        self.assertEqual(["pspgl"], db.get_installed_packages())
+
+    def test_import_and_export(self):
+        alpm = LocalDatabase(self.config)
+        alpm.install(
+            create_desc("sdl2", "2.26.0-1"),
+            Files("sdl2", "", file_list=["psp/", "psp/libSDL2.a"]),
+        )
+        alpm.install(create_desc("pspgl", "r12-1"), Files("pspgl", "", file_list=["a"]))
+
+        db = self.create_database()
+        self.assertEqual(["pspgl", "sdl2"], sorted(db.get_installed_packages()))
+        self.assertEqual(["sdl2"], db.get_file_owners("psp/libSDL2.a"))
+
+        db.remove_package("pspgl")
+        db.install(
+            create_desc("sdl2", "2.28.0-1"),
+            Files("sdl2", "", file_list=["psp/", "psp/libSDL2.a"]),
+        )
+        db.export_alpm()
+
+        alpm = LocalDatabase(self.config)
+        self.assertEqual({"sdl2": "sdl2-2.28.0-1"}, alpm.packages)
+        self.assertEqual(
+            ["psp/", "psp/libSDL2.a"], alpm.get_package_files("sdl2").get_paths()
+        )
+        self.assertEqual("2.28.0-1", str(alpm.get_package_desc("sdl2").version))
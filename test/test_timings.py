@@ -0,0 +1,85 @@
+import json
+import os
+import pstats
+import tempfile
+import threading
+from unittest import TestCase
+
+from boxman.timings import DISABLED_SPAN, Timings, profile
+
+
+class TestTimings(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_disabled(self):
+        timings = Timings()
+        self.assertIs(DISABLED_SPAN, timings.span("download"))
+        with timings.span("download"):
+            pass
+        self.assertEqual({}, timings.get_results()["phases"])
+
+    def test_spans_are_added_up(self):
+        timings = Timings()
+        timings.enable()
+        for _ in range(3):
+            with timings.span("download"):
+                with timings.span("checksum"):
+                    pass
+
+        phases = timings.get_results()["phases"]
+        self.assertEqual({"download", "checksum"}, set(phases))
+        self.assertEqual(3, phases["download"]["calls"])
+        self.assertGreaterEqual(
+            phases["download"]["seconds"], phases["checksum"]["seconds"]
+        )
+
+    def test_spans_from_threads(self):
+        timings = Timings()
+        timings.enable()
+
+        def run_spans():
+            for _ in range(100):
+                with timings.span("download"):
+                    pass
+
+        threads = [threading.Thread(target=run_spans) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(400, timings.get_results()["phases"]["download"]["calls"])
+
+    def test_format_and_write_json(self):
+        timings = Timings()
+        timings.enable()
+        with timings.span("extraction"):
+            pass
+
+        output = timings.format()
+        self.assertIn("extraction", output)
+        self.assertIn("1 calls", output)
+        self.assertIn("total", output)
+
+        path = os.path.join(self.directory.name, "timings.json")
+        timings.write_json(path)
+        with open(path) as timings_file:
+            results = json.load(timings_file)
+        self.assertEqual(1, results["phases"]["extraction"]["calls"])
+        self.assertIn("total", results)
+
+    def test_profile(self):
+        path = os.path.join(self.directory.name, "out.prof")
+        with profile(path):
+            sorted(range(1000), key=str)
+        self.assertGreater(pstats.Stats(path).total_calls, 0)
+
+    def test_profile_is_written_on_exit(self):
+        path = os.path.join(self.directory.name, "out.prof")
+        with self.assertRaises(SystemExit):
+            with profile(path):
+                exit(1)
+        self.assertTrue(os.path.isfile(path))
@@ -0,0 +1,126 @@
+from typing import Dict, List, Optional
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from boxman.data.transaction import Action
+from boxman.transaction_planner import TransactionPlanner
+from boxman.version import Version
+
+
+def create_desc(
+    name: str, version: str = "1.0-1", dependencies: Optional[List[str]] = None
+) -> MagicMock:
+    desc = MagicMock()
+    desc.name = name
+    desc.version = Version(version)
+    desc.dependencies = dependencies or []
+    desc.installed_as_dependency = False
+    return desc
+
+
+class TestTransactionPlanner(TestCase):
+    def create_planner(
+        self, sync: Dict[str, MagicMock], local: Dict[str, MagicMock]
+    ) -> TransactionPlanner:
+        self.get_sync_desc = MagicMock(side_effect=sync.get)
+        self.local_database = MagicMock()
+        self.local_database.get_package_desc.side_effect = local.get
+        return TransactionPlanner(self.get_sync_desc, self.local_database)
+
+    def test_plan_install_orders_dependencies_first(self):
+        planner = self.create_planner(
+            {
+                "sdl2-image": create_desc(
+                    "sdl2-image", dependencies=["sdl2", "libpng"]
+                ),
+                "sdl2": create_desc("sdl2", dependencies=["pspgl>=1.0"]),
+                "libpng": create_desc("libpng", dependencies=["zlib"]),
+                "zlib": create_desc("zlib"),
+                "pspgl": create_desc("pspgl"),
+            },
+            {},
+        )
+
+        transaction = planner.plan_install(["sdl2-image"])
+
+        self.assertEqual(
+            ["pspgl", "sdl2", "zlib", "libpng", "sdl2-image"], transaction.names
+        )
+        self.assertEqual(
+            [False, False, False, False, True],
+            [step.installed_explicitly for step in transaction.steps],
+        )
+        self.assertEqual({Action.INSTALL}, {step.action for step in transaction.steps})
+
+    def test_plan_install_looks_up_shared_dependencies_once(self):
+        planner = self.create_planner(
+            {
+                "a": create_desc("a", dependencies=["zlib"]),
+                "b": create_desc("b", dependencies=["zlib"]),
+                "zlib": create_desc("zlib"),
+            },
+            {},
+        )
+
+        transaction = planner.plan_install(["a", "b"])
+
+        self.assertEqual(["zlib", "a", "b"], transaction.names)
+        self.assertEqual(3, self.get_sync_desc.call_count)
+        self.assertEqual(3, self.local_database.get_package_desc.call_count)
+
+    def test_plan_install_dependency_cycle(self):
+        planner = self.create_planner(
+            {
+                "a": create_desc("a", dependencies=["b"]),
+                "b": create_desc("b", dependencies=["a"]),
+            },
+            {},
+        )
+
+        transaction = planner.plan_install(["a"])
+
+        self.assertEqual(["b", "a"], transaction.names)
+
+    def test_plan_install_upgrade(self):
+        installed = create_desc("sdl2", "2.24.0-1")
+        installed.installed_as_dependency = True
+        planner = self.create_planner(
+            {
+                "sdl2": create_desc("sdl2", "2.26.0-1"),
+                "zlib": create_desc("zlib", "1.2-1"),
+            },
+            {"sdl2": installed, "zlib": create_desc("zlib", "1.2-1")},
+        )
+
+        transaction = planner.plan_install(["sdl2", "zlib"])
+
+        self.assertEqual(1, len(transaction.steps))
+        self.assertEqual(Action.UPGRADE, transaction.steps[0].action)
+        self.assertFalse(transaction.steps[0].installed_explicitly)
+
+    def test_plan_install_missing_dependency(self):
+        planner = self.create_planner(
+            {"sdl2": create_desc("sdl2", dependencies=["missing"])}, {}
+        )
+
+        self.assertIsNone(planner.plan_install(["sdl2"]))
+
+    def test_plan_remove_orders_dependents_first(self):
+        planner = self.create_planner(
+            {},
+            {
+                "zlib": create_desc("zlib"),
+                "libpng": create_desc("libpng", dependencies=["zlib"]),
+                "other": create_desc("other"),
+            },
+        )
+
+        transaction = planner.plan_remove(["zlib", "libpng", "other"])
+
+        self.assertEqual(["other", "libpng", "zlib"], transaction.names)
+        self.assertEqual({Action.REMOVE}, {step.action for step in transaction.steps})
+
+    def test_plan_remove_not_installed(self):
+        planner = self.create_planner({}, {})
+
+        self.assertIsNone(planner.plan_remove(["sdl2"]))
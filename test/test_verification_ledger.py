@@ -0,0 +1,69 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from boxman.checksums import calculate_checksums
+from boxman.verification_ledger import VerificationLedger
+
+
+class TestVerificationLedger(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.ledger = VerificationLedger(
+            os.path.join(self.directory.name, "verified.idx")
+        )
+        self.path = os.path.join(self.directory.name, "sdl2-2.26.0-1-mips.pkg.tar.gz")
+        with open(self.path, "wb") as archive:
+            archive.write(b"content")
+        self.checksums = calculate_checksums(self.path)
+
+    def tearDown(self):
+        self.ledger.close()
+        self.directory.cleanup()
+
+    def test_record(self):
+        md5, sha256 = self.checksums.md5, self.checksums.sha256
+        self.assertFalse(self.ledger.is_verified(self.path, md5, sha256))
+
+        self.ledger.record(self.path, self.checksums)
+        self.assertTrue(self.ledger.is_verified(self.path, md5, sha256))
+        self.assertTrue(self.ledger.is_verified(self.path, None, sha256))
+        self.assertFalse(self.ledger.is_verified(self.path, md5, "0" * 64))
+
+    def test_get_checksums(self):
+        self.assertIsNone(self.ledger.get_checksums(self.path))
+        self.ledger.record(self.path, self.checksums)
+        self.assertEqual(
+            (self.checksums.md5, self.checksums.sha256),
+            self.ledger.get_checksums(self.path),
+        )
+
+    def test_changed_file_is_not_verified(self):
+        self.ledger.record(self.path, self.checksums)
+        with open(self.path, "ab") as archive:
+            archive.write(b"more")
+        self.assertFalse(
+            self.ledger.is_verified(self.path, None, self.checksums.sha256)
+        )
+
+    def test_touched_file_is_not_verified(self):
+        self.ledger.record(self.path, self.checksums)
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+        self.assertFalse(
+            self.ledger.is_verified(self.path, None, self.checksums.sha256)
+        )
+
+    def test_forget(self):
+        self.ledger.record(self.path, self.checksums)
+        self.ledger.forget(self.path)
+        self.assertFalse(
+            self.ledger.is_verified(self.path, None, self.checksums.sha256)
+        )
+
+    def test_missing_file(self):
+        self.ledger.record(self.path, self.checksums)
+        os.remove(self.path)
+        self.assertFalse(
+            self.ledger.is_verified(self.path, None, self.checksums.sha256)
+        )
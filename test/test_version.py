@@ -1,30 +1,69 @@
 from unittest import TestCase
 
-from boxman.version import Version
+from boxman.version import Version, get_version_key, parse_version
 
 
 class TestVersion(TestCase):
     def test_init(self):
-        version_and_expected_version_parts = [
-            ("12.2.0-1", [12, 2, 0, 1]),
-            ("2.66-2", [2, 66, 2]),
-            ("20210910_3.1-1", [202109103, 1, 1]),
-            ("0.3.113-1", [0, 3, 113, 1]),
-            ("1.20.7.r38.ge82d1a6-4", [1, 20, 7, 38, 8216, 4]),
-            ("1.0.0.rc16.3-14", [1, 0, 0, 16, 3, 14]),
-            ("0.5.11.5-1", [0, 5, 11, 5, 1]),
-            ("20220913.f09bebf-1", [20220913, 9, 1]),
-            ("6.0.5.arch1-1", [6, 0, 5, 1, 1]),
+        instance = Version("1:12.2.0-1")
+        self.assertEqual("1:12.2.0-1", instance.version)
+        self.assertEqual(
+            (
+                1,
+                ((3, 12, ""), (3, 2, ""), (3, 0, ""), (1, 0, "")),
+                ((3, 1, ""), (1, 0, "")),
+            ),
+            instance.key,
+        )
+
+    def test_vercmp(self):
+        # Expected results of alpm's vercmp, -1 means the first version is older
+        versions_and_expected_results = [
+            ("1.5.0", "1.5.0", 0),
+            ("1.5.1", "1.5.0", 1),
+            ("1.5.1", "1.5", 1),
+            ("1.5.0", "1.5", 1),
+            ("1.0", "1.0a", 1),
+            ("1.0", "1.0.a", -1),
+            ("1.0a", "1.0b", -1),
+            ("1.0alpha", "1.0beta", -1),
+            ("1.0a", "1.0.1", -1),
+            ("1.0.rc1", "1.0", 1),
+            ("1.001", "1.1", 0),
+            ("1.10", "1.9", 1),
+            ("a", "1", -1),
+            ("1.5-1", "1.5-2", -1),
+            ("1.5-2", "1.5.1-1", -1),
+            ("1:1.0-1", "2.0-1", 1),
+            ("0:1.0-1", "1.0-1", 0),
+            ("20220913.f09bebf-1", "20220913.e09bebf-1", 1),
+            ("r11.885fd3f-1", "r12.1a2b3c4-1", -1),
+            # The release is only compared when both versions have one
+            ("1.5-1", "1.5", 0),
+            ("1.1-1", "1.1", 0),
+            ("1.5.b-1", "1.5.b", 0),
+            ("1.5-2", "1.5", 0),
+            ("1.5.1", "1.5-1", 1),
         ]
 
-        for version, version_parts in version_and_expected_version_parts:
-            instance = Version(version)
-            self.assertEqual(version, instance.version)
-            self.assertEqual(
-                version_parts,
-                instance.version_parts,
-                msg=f"Version parts for {version} do not match up",
+        for first, second, expected in versions_and_expected_results:
+            actual = (Version(first) > Version(second)) - (
+                Version(first) < Version(second)
             )
+            self.assertEqual(expected, actual, msg=f"vercmp {first} {second}")
+
+    def test_equal_without_release(self):
+        self.assertEqual(Version("1.5-1"), Version("1.5"))
+        self.assertEqual(hash(Version("1.5-1")), hash(Version("1.5")))
+        self.assertNotEqual(Version("1.5-1"), Version("1.5-2"))
+
+    def test_sort_with_key(self):
+        versions = ["1.0-1", "1.0a-1", "1:0.1-1", "0.9-3", "1.0.1-1"]
+        versions.sort(key=get_version_key)
+        self.assertEqual(["0.9-3", "1.0a-1", "1.0-1", "1.0.1-1", "1:0.1-1"], versions)
+
+    def test_parse_version_is_memoized(self):
+        self.assertIs(parse_version("2.26.0-1"), parse_version("2.26.0-1"))
 
     def test_greater_than(self):
         self.assertTrue(Version("1-2") > Version("1-1"))